@@ -0,0 +1,67 @@
+"""
+Measures the time taken to convert advancements and loot tables into JSON and dump them,
+and the peak memory of dumping a large loot table through a dict and streaming it.
+"""
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from pymcfunc.data_formats.advancements import Advancement, AdvancementDisplay, Icon, Criterion, Rewards, \
+    InventoryChangedTrigger
+from pymcfunc.data_formats.loot_tables import LootTable
+
+
+def advancements(count: int) -> list[Advancement]:
+    result = []
+    for i in range(count):
+        result.append(Advancement(
+            namespace="bench", name=f"advancement_{i}",
+            parent=result[i // 2] if i else None,
+            display=AdvancementDisplay(icon=Icon(item="minecraft:diamond"), title=f"Advancement {i}",
+                                       description="A benchmark", frame="task"),
+            criteria=[Criterion(conditions=InventoryChangedTrigger(items=[]))],
+            rewards=Rewards(experience=i)
+        ))
+    return result
+
+def loot_tables(count: int) -> list[LootTable]:
+    # fields of base classes can't be passed to the constructor, so the tables are read from JSON
+    pool = {
+        "conditions": [{"condition": "minecraft:random_chance", "chance": 0.5}],
+        "functions": [{"function": "minecraft:enchant_randomly", "enchantments": ["minecraft:sharpness"]}],
+        "rolls": 1, "bonus_rolls": 0.0,
+        "entries": [{"type": "minecraft:item", "name": f"minecraft:item_{w}", "weight": w, "quality": 0,
+                     "conditions": [], "functions": []} for w in range(1, 6)]
+    }
+    return [LootTable.from_json({"functions": [], "pools": [pool] * 3}) for _ in range(count)]
+
+def measure(label: str, objs: list, repeat: int = 3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for obj in objs: json.dumps(obj.as_json())
+        best = min(best, time.perf_counter() - start)
+    print(f"{label}: {best:.3f}s")
+
+def measure_peak(label: str, dump):
+    tracemalloc.start()
+    start = time.perf_counter()
+    dump()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {peak / 1e6:.1f} MB peak in {elapsed:.2f}s")
+
+def main(scale: int = 1):
+    measure(f"{5000 * scale} advancements", advancements(5000 * scale))
+    measure(f"{1000 * scale} loot tables", loot_tables(1000 * scale))
+    large = loot_tables(1)[0]
+    large.pools = [pool for table in loot_tables(2000 * scale) for pool in table.pools]
+    measure_peak(f"Loot table of {len(large.pools)} pools through as_json", lambda: json.dumps(large.as_json(), indent=2))
+    measure_peak(f"Loot table of {len(large.pools)} pools streamed", lambda: large.write_json(io.StringIO(), indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -0,0 +1,37 @@
+"""Measures the memory and time taken to build, render and encode an :py:class:`IntArray` of a million values."""
+import array
+import io
+import sys
+import time
+import tracemalloc
+
+from pymcfunc.data_formats.nbt_binary import write_nbt
+from pymcfunc.data_formats.nbt_tags import IntArray, Compound, Int
+
+
+def measure(label: str, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {size / 1e6:.1f} MB in {elapsed:.2f}s")
+    return value
+
+def main(length: int = 1_000_000):
+    values = list(range(length))
+    tag = measure(f"IntArray of {length} ints", lambda: IntArray(values))
+    measure(f"IntArray of {length} ints from an array.array", lambda: IntArray(array.array("i", values)))
+    measure(f"IntArray of {length} ints from a buffer", lambda: IntArray.frombuffer(array.array("i", values).tobytes()))
+    measure(f"{length} Int tags", lambda: [Int(v) for v in values])
+    start = time.perf_counter()
+    str(tag)
+    print(f"Rendered SNBT in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    write_nbt(io.BytesIO(), Compound({'values': tag}))
+    print(f"Encoded NBT in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,41 @@
+"""Measures how fast :py:func:`pymcfunc.data_formats.snbt.parse_snbt` parses a generated 10 MB SNBT corpus."""
+import random
+import sys
+import time
+
+from pymcfunc.data_formats.snbt import parse_snbt
+
+
+def entity(rng: random.Random) -> str:
+    items = ",".join(f'{{Slot:{slot}b,id:"minecraft:{rng.choice(["stone", "diamond_sword", "oak_log"])}",Count:{rng.randint(1, 64)}b,'
+                     f'tag:{{Damage:{rng.randint(0, 1561)},display:{{Name:\'{{"text":"Item {slot}"}}\'}}}}}}'
+                     for slot in range(rng.randint(0, 9)))
+    return (f'{{id:"minecraft:zombie",Health:{rng.uniform(0, 20):.2f}f,Pos:[{rng.uniform(-1e4, 1e4):.3f}d,'
+            f'{rng.uniform(0, 256):.3f}d,{rng.uniform(-1e4, 1e4):.3f}d],Rotation:[{rng.uniform(0, 360):.1f}f,0.0f],'
+            f'UUID:[I;{",".join(str(rng.randint(-2**31, 2**31 - 1)) for _ in range(4))}],'
+            f'Tags:["spawned","wave_{rng.randint(1, 50)}"],NoAI:{rng.choice(["0b", "1b"])},'
+            f'Inventory:[{items}],Brain:{{memories:{{}}}},HeightMap:[L;{",".join(str(rng.randint(0, 2**40)) + "L" for _ in range(8))}]}}')
+
+def corpus(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    entities, length = [], 0
+    while length < size:
+        entities.append(entity(rng))
+        length += len(entities[-1]) + 1
+    return "{Entities:[" + ",".join(entities) + "]}"
+
+def main(size: int = 10_000_000):
+    text = corpus(size)
+    depth = "{a:" * 50_000 + "1b" + "}" * 50_000
+    start = time.perf_counter()
+    tag = parse_snbt(text)
+    elapsed = time.perf_counter() - start
+    print(f"Parsed {len(text) / 1e6:.1f} MB ({len(tag['Entities'])} entities) in {elapsed:.2f}s, "
+          f"{len(text) / 1e6 / elapsed:.2f} MB/s")
+    start = time.perf_counter()
+    parse_snbt(depth)
+    print(f"Parsed 50000 nested compounds in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from pymcfunc.report import sort_entries
+from pymcfunc.watch import Watcher
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="pymcfunc")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    watch = subparsers.add_parser("watch", help="rebuild a pack whenever its source changes")
+    watch.add_argument("target", help="the pack to build, as module:attribute")
+    watch.add_argument("pack_format", type=int, help="the pack format of the pack")
+    watch.add_argument("description", help="the description of the pack")
+    watch.add_argument("-o", "--output", default=".", help="the folder to build the pack in")
+    watch.add_argument("-i", "--interval", type=float, default=0.25, help="seconds between polls of the source files")
+    report = subparsers.add_parser("report", help="list the functions or resources of a build report")
+    report.add_argument("file", help="the report written by JavaPack.build(report=...)")
+    report.add_argument("-s", "--sort", default="wall_time",
+                        help="the field to sort by, or commands.<name> for the number of a command")
+    report.add_argument("-r", "--resources", action="store_true", help="list resources instead of functions")
+    report.add_argument("-n", "--top", type=int, default=20, help="the number of entries to list")
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        sys.path.insert(0, "")
+        try:
+            Watcher(args.target, args.pack_format, args.description, args.output, interval=args.interval).run()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "report":
+        with open(args.file, encoding="utf-8") as f:
+            build_report = json.load(f)
+        for phase, seconds in build_report['phases'].items():
+            print(f"{phase:>16} {seconds:10.3f}s")
+        entries = sort_entries(build_report['resources' if args.resources else 'functions'], args.sort)
+        for entry in entries[:args.top]:
+            value = entry.get('commands', {}).get(args.sort.removeprefix("commands."), 0) \
+                if args.sort.startswith("commands.") else entry.get(args.sort)
+            print(f"{str(value):>16} {entry.get('name', entry['path'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+BuildPlan = dict[str, Callable[[], str | bytes]]
+"""A mapping of output paths, relative to the pack root and separated by ``/``, to the function that serialises each file."""
+
+FileStats = dict[str, tuple[int, float, float]]
+"""A mapping of output paths to the number of bytes in each file, and the seconds spent serialising and writing it."""
+
+MANIFEST_NAME = ".pymcfunc_manifest.json"
+_BATCH_SIZE = 32
+
+
+@dataclass
+class BuildSummary:
+    """What a build did to each output file."""
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        lines = [f"{len(self.added)} added, {len(self.changed)} changed, "
+                 f"{len(self.removed)} removed, {len(self.unchanged)} unchanged"]
+        for prefix, paths in (("+", self.added), ("~", self.changed), ("-", self.removed)):
+            lines.extend(f"  {prefix} {path}" for path in sorted(paths))
+        return "\n".join(lines)
+
+
+def _encode(content: str | bytes) -> bytes:
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+def _hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _generator_version() -> str:
+    from pymcfunc import __version__
+    return __version__
+
+def _read_manifest(root: pathlib.Path) -> tuple[str | None, dict[str, str]]:
+    try:
+        with open(root / MANIFEST_NAME, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    return manifest.get('generator'), manifest.get('files', {})
+
+def read_manifest(root: str | os.PathLike) -> dict[str, str]:
+    """
+    Reads the output path to content hash manifest of a previous build.
+    Returns an empty manifest if there is none, or if it was written by a different version of pymcfunc.
+
+    :param root: The directory the pack was built into
+    """
+    generator, files = _read_manifest(pathlib.Path(root))
+    return files if generator == _generator_version() else {}
+
+def write_manifest(root: str | os.PathLike, files: dict[str, str]):
+    """
+    Writes the output path to content hash manifest of a build.
+
+    :param root: The directory the pack was built into
+    :param files: The content hash of each output path
+    """
+    pathlib.Path(root, MANIFEST_NAME).write_text(
+        json.dumps({'generator': _generator_version(), 'files': dict(sorted(files.items()))}, separators=(",", ":")),
+        encoding="utf-8")
+
+def write_tree(root: str | os.PathLike, plan: BuildPlan, threads: int | None = None, max_in_flight: int = 64,
+               incremental: bool = False, stats: FileStats | None = None) -> BuildSummary:
+    """
+    Writes a build plan to a directory.
+
+    Files are serialised and written on a thread pool, in batches of up to 32 files. At most ``max_in_flight`` files
+    are queued or being written at once, which bounds the memory held by serialised files that have not been written yet.
+    The process working directory is never changed.
+
+    A manifest of the content hash of every file is kept in the directory. Files in the manifest that are no longer
+    in the plan are deleted, and in incremental mode, files whose hash matches the manifest are not written.
+    The manifest is trusted, so files edited by hand are only restored by a full build. A manifest written by
+    a different version of pymcfunc is only used to delete stale files, so every file is written again.
+
+    :param root: The directory to write the pack into
+    :param BuildPlan plan: The files to write
+    :param threads: The number of worker threads, or None for the :py:class:`ThreadPoolExecutor` default
+    :type threads: int | None
+    :param int max_in_flight: The maximum number of files queued or being written at once
+    :param bool incremental: Whether to skip unchanged files
+    :param stats: A mapping to record the size and timings of each file in
+    :type stats: FileStats | None
+    :return: What was done to each file
+    """
+    root = pathlib.Path(root).resolve()
+    generator, previous = _read_manifest(root)
+    old_manifest = previous if incremental and generator == _generator_version() else {}
+    created = set()
+    created_lock = threading.Lock()
+    if not incremental:
+        for directory in sorted({(root / path).parent for path in plan}, key=lambda d: len(d.parts)):
+            directory.mkdir(parents=True, exist_ok=True)
+            created.add(directory)
+
+    def write(batch: list[tuple[str, Callable[[], str | bytes]]]) -> list[tuple[str, bool]]:
+        results = []
+        for path, serialise in batch:
+            start = time.perf_counter()
+            content = _encode(serialise())
+            digest = _hash(content)
+            serialised = time.perf_counter()
+            if incremental and old_manifest.get(path) == digest:
+                if stats is not None: stats[path] = (len(content), serialised - start, 0.0)
+                results.append((digest, False))
+                continue
+            directory = (root / path).parent
+            if directory not in created:
+                directory.mkdir(parents=True, exist_ok=True)
+                with created_lock: created.add(directory)
+            (root / path).write_bytes(content)
+            if stats is not None: stats[path] = (len(content), serialised - start, time.perf_counter() - serialised)
+            results.append((digest, True))
+        return results
+
+    items = list(plan.items())
+    batch_size = max(1, min(_BATCH_SIZE, max_in_flight))
+    in_flight = threading.BoundedSemaphore(max(1, max_in_flight // batch_size))
+    futures: list[Future] = []
+    with ThreadPoolExecutor(threads) as executor:
+        for i in range(0, len(items), batch_size):
+            in_flight.acquire()
+            future = executor.submit(write, items[i:i+batch_size])
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+
+    summary = BuildSummary()
+    manifest = {}
+    results = (result for future in futures for result in future.result())
+    for (path, _), (digest, written) in zip(items, results):
+        manifest[path] = digest
+        if not written: summary.unchanged.append(path)
+        elif path in previous: summary.changed.append(path)
+        else: summary.added.append(path)
+
+    emptied = set()
+    for path in sorted(previous.keys() - manifest.keys()):
+        (root / path).unlink(missing_ok=True)
+        summary.removed.append(path)
+        emptied.update(d for d in (root / path).parents if root in d.parents)
+    for directory in sorted(emptied, key=lambda d: len(d.parts), reverse=True):
+        if directory.is_dir() and not any(directory.iterdir()): directory.rmdir()
+
+    write_manifest(root, manifest)
+    return summary
+
+
+_ZIP_VERSION = 20
+_ZIP_UTF8_FLAG = 0x0800
+_ZIP_DOS_DATE = (1 << 5) | 1  # 1980-01-01, the earliest date a zip entry can hold
+_ZIP_DOS_TIME = 0
+_ZIP_FILE_MODE = 0o100644 << 16
+# without ZIP64, counts, sizes and offsets have 16 or 32 bits, and their largest values mean that a ZIP64 record follows
+_ZIP_MAX_ENTRIES = 0xFFFE
+_ZIP_MAX_OFFSET = 0xFFFFFFFE
+
+def _compress(content: bytes, level: int) -> tuple[int, bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(content) + compressor.flush()
+    if len(compressed) >= len(content):
+        return zipfile.ZIP_STORED, content
+    return zipfile.ZIP_DEFLATED, compressed
+
+def _check_zip_size(what: str, size: int):
+    if size > _ZIP_MAX_OFFSET:
+        raise ValueError(f"{what} is {size} bytes, but a zip archive without ZIP64 can hold at most {_ZIP_MAX_OFFSET}")
+
+def write_zip(zip_path: str | os.PathLike, plan: BuildPlan, threads: int | None = None, max_in_flight: int = 64,
+              compression_level: int = 6, stats: FileStats | None = None) -> BuildSummary:
+    """
+    Writes a build plan straight into a zip archive, without an intermediate directory.
+
+    Files are serialised and deflated on a thread pool, then appended to the archive one at a time
+    in path order. Files that deflate does not make smaller are stored uncompressed.
+    Every entry has the same timestamp and permissions, so the same plan always produces a byte-identical archive.
+    The archive is written to a temporary file first and moved into place once complete.
+
+    Archives are written without ZIP64, so they can hold at most 65534 files, and no file or offset can reach 4 GiB.
+
+    :param zip_path: The path of the archive
+    :param BuildPlan plan: The files to write
+    :param threads: The number of worker threads, or None for the :py:class:`ThreadPoolExecutor` default
+    :type threads: int | None
+    :param int max_in_flight: The maximum number of compressed files waiting to be appended at once
+    :param int compression_level: The zlib compression level, from 1 to 9
+    :param stats: A mapping to record the size and timings of each file in, where writing includes compressing
+    :type stats: FileStats | None
+    :return: What was done to each file
+    :raises ValueError: If the pack is too large for a zip archive without ZIP64
+    """
+    if len(plan) > _ZIP_MAX_ENTRIES:
+        raise ValueError(f"Pack has {len(plan)} files, but a zip archive without ZIP64 can hold at most {_ZIP_MAX_ENTRIES}")
+    zip_path = pathlib.Path(zip_path).resolve()
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = zip_path.with_name(zip_path.name + ".tmp")
+
+    def compress(path: str, serialise: Callable[[], str | bytes]) -> tuple[int, int, int, bytes]:
+        start = time.perf_counter()
+        content = _encode(serialise())
+        serialised = time.perf_counter()
+        method, data = _compress(content, compression_level)
+        if stats is not None: stats[path] = (len(content), serialised - start, time.perf_counter() - serialised)
+        return method, zlib.crc32(content), len(content), data
+
+    central_directory = []
+    try:
+        with open(temp_path, "wb") as f, ThreadPoolExecutor(threads) as executor:
+            def append(path: str, future: Future):
+                method, crc, size, data = future.result()
+                name = path.encode("utf-8")
+                _check_zip_size(f"The offset of `{path}`", f.tell())
+                _check_zip_size(f"`{path}`", max(size, len(data)))
+                fields = (_ZIP_VERSION, _ZIP_UTF8_FLAG, method, _ZIP_DOS_TIME, _ZIP_DOS_DATE, crc, len(data), size)
+                central_directory.append((fields, f.tell(), name))
+                f.write(struct.pack("<IHHHHHIIIHH", 0x04034b50, *fields, len(name), 0))
+                f.write(name)
+                f.write(data)
+
+            pending: collections.deque[tuple[str, Future]] = collections.deque()
+            for path in sorted(plan):
+                pending.append((path, executor.submit(compress, path, plan[path])))
+                if len(pending) >= max_in_flight:
+                    append(*pending.popleft())
+            while pending:
+                append(*pending.popleft())
+
+            directory_offset = f.tell()
+            _check_zip_size("The offset of the central directory", directory_offset)
+            for fields, offset, name in central_directory:
+                f.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | _ZIP_VERSION, *fields,
+                                    len(name), 0, 0, 0, 0, _ZIP_FILE_MODE, offset))
+                f.write(name)
+            directory_size = f.tell() - directory_offset
+            _check_zip_size("The central directory", directory_size)
+            f.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, len(central_directory), len(central_directory),
+                                directory_size, directory_offset, 0))
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path, zip_path)
+
+    return BuildSummary(added=sorted(plan))
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import inspect
 import re
+import sys
+import time
+from contextvars import ContextVar
 from functools import wraps
 from types import UnionType, NoneType
 # noinspection PyUnresolvedReferences
@@ -116,6 +119,12 @@ _bedrock_objective_regex = r"^[-:.\w]+$"
 _JavaObjectiveName: TypeAlias = Annotated[str, Regex(_java_objective_regex)]
 _BedrockObjectiveName: TypeAlias = Annotated[str, Regex(_bedrock_objective_regex), Quoted]
 
+validation_timer: ContextVar[list[float] | None] = ContextVar('validation_timer', default=None)
+"""
+While set, the time spent checking and formatting the arguments of commands is added to the only item of the list,
+e.g. by :py:meth:`~pymcfunc.report.BuildReport.generate`. Each thread and task has its own.
+"""
+
 class Command:
     order: list[Element]
     fh: BaseFunctionHandler | None
@@ -136,24 +145,27 @@ class Command:
             cmd.func = func
             cmd.name = cmd_name or func.__name__.split("_")[0].strip()
             cmd.segment_name = segment_name or func.__name__.replace("_", " ").strip()
-            cmd.arg_namelist = []
-            for name, arg in inspect.signature(func).parameters.items():
-                if name == "self": pass
-                if arg.POSITIONAL_OR_KEYWORD or arg.POSITIONAL_ONLY:
-                    cmd.arg_namelist.append(name)
-
-                cmd.eles = cls._process_order(order, func)
+            # commands are called without self, so positional arguments start at the first parameter after it
+            cmd.arg_namelist = [name for name, arg in inspect.signature(func).parameters.items()
+                                if name != "self" and arg.kind in (arg.POSITIONAL_ONLY, arg.POSITIONAL_OR_KEYWORD)]
+            cmd.eles = cls._process_order(order, func)
             cmd.__call__ = wraps(func)(cmd)
             return cmd
         return decorator
 
     def __call__(self, *args, **kwargs) -> ExecutedCommand:
-        for i, arg in enumerate(args):
-            if self.arg_namelist[i] == 'self': i += 1
-            kwargs[self.arg_namelist[i]] = arg
-
-        cmd_string, subcmd_obj = self._process_arglist(kwargs)
-        print(cmd_string)
+        if len(args) > len(self.arg_namelist):
+            raise TypeError(f"`{self.segment_name}` takes at most {len(self.arg_namelist)} positional arguments "
+                            f"({len(args)} given)")
+        kwargs.update(zip(self.arg_namelist, args))
+
+        timer = validation_timer.get()
+        if timer is not None:
+            start = time.perf_counter()
+            cmd_string, subcmd_obj = self._process_arglist(kwargs)
+            timer[0] += time.perf_counter() - start
+        else:
+            cmd_string, subcmd_obj = self._process_arglist(kwargs)
         cmd = ExecutedCommand(self.fh, self.name, cmd_string)
         if subcmd_obj:
             subcmd_obj.name = self.name
@@ -207,15 +219,16 @@ class Command:
                 element: AE
                 value = args[element.name] if element.name in args else element.default
 
-                # for eval
-                # noinspection PyUnresolvedReferences
-                from pymcfunc.data_formats.advancements import Advancement
+                # annotations are evaluated where the command is defined, which imports the names they use,
+                # except for Function, which it can only import when type checking
+                from pymcfunc.functions import Function
                 from pymcfunc.raw_commands import JavaRawCommands
-                # noinspection PyUnusedLocal
-                ExecuteSubcommandHandler = JavaRawCommands.ExecuteSubcommandHandler
+                namespace = {**vars(sys.modules[self.func.__module__]), 'Function': Function,
+                             'ExecuteSubcommandHandler': JavaRawCommands.ExecuteSubcommandHandler}
 
-                value = Command._check_and_process_arg(eval(inspect.signature(self.func).parameters[element.name].annotation),
-                                                       value, element.name)
+                value = Command._check_and_process_arg(
+                    eval(inspect.signature(self.func).parameters[element.name].annotation, namespace),
+                    value, element.name)
                 if not element.optional and value == element.default:
                     raise MissingArgumentError(element.name)
 
@@ -294,6 +307,8 @@ class Command:
             annotation: _AnnotatedAlias
             res = Command._check_and_process_arg(get_args(annotation)[0], value, varname)
             for anno in get_args(annotation)[1:]:
+                # annotations without parameters, e.g. Single, are written as the class
+                if isinstance(anno, type): anno = anno()
                 anno.check(res, varname)
                 res = anno.convert(res, varname)
             return res
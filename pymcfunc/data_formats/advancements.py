@@ -107,9 +107,16 @@ class Criterion(JsonFormat):
     def trigger(self) -> str: return self.conditions.type
 
     JSON_FORMAT = {
-        'trigger': str
+        'trigger': str,
+        'conditions': dict
     }
 
+    @classmethod
+    def from_json(cls, data: dict[str, Any], **kwargs) -> Criterion:
+        """Creates a criterion from its JSON, whose trigger is named outside of its conditions."""
+        kwargs.setdefault('conditions', Trigger.from_json({'type': data.get('trigger', ""), **data.get('conditions', {})}))
+        return super().from_json(data, **kwargs)
+
 @define(kw_only=True, init=True, frozen=True)
 @base_class
 class Trigger(JsonFormat):
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import json
+import sys
+import types
+from collections.abc import Iterator
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
 # noinspection PyUnresolvedReferences
 from typing import _LiteralGenericAlias, Any, _UnionGenericAlias, get_args, get_origin, _GenericAlias, Type, TypeVar, \
-    Generic, TYPE_CHECKING
+    Generic, TYPE_CHECKING, Union, Callable, Literal, TextIO
+
+import attr
 
 if TYPE_CHECKING: pass
-from pymcfunc.data_formats.nbt_tags import NBT, CompoundReprAsList, Compound, String, Byte
+from pymcfunc.data_formats.nbt_tags import NBT, CompoundReprAsList, Compound, String, Byte, NBTTag, List
 
 
 def pascal_case_ify(var: str, is_potion_effect: bool = False) -> str:
@@ -23,6 +31,24 @@ class NBTFormat(NBT):
     def __init_subclass__(cls, do_pascal_case_ify: bool = True, **kwargs):
         super().__init_subclass__(**kwargs)
         cls._do_pascal_case_ify = do_pascal_case_ify
+        # compiled on first use, as annotations can name classes that are defined after this one
+        cls._serialiser = None
+
+    @classmethod
+    def _compile(cls) -> list[tuple[str, str, Callable[[Any], NBT | None]]]:
+        """
+        Gives the attribute name, NBT key and converter of every field, working them out the first time
+        so that :py:meth:`as_nbt` doesn't have to look at the annotations again.
+        """
+        serialiser = cls.__dict__.get('_serialiser')
+        if serialiser is None:
+            serialiser = []
+            for name, hint in _field_types(cls).items():
+                is_byte = isinstance(hint, type) and issubclass(hint, Byte)
+                key = pascal_case_ify(name, is_byte) if cls._do_pascal_case_ify else name
+                serialiser.append((name, key, _nbt_converter(name, hint)))
+            cls._serialiser = serialiser
+        return serialiser
 
     @classmethod
     def get_format(cls) -> dict[str, Type[NBT]]:
@@ -31,135 +57,393 @@ class NBTFormat(NBT):
     @property
     def py(self) -> dict:
         d = {}
-        for var, anno in type(self).get_format().items():
-            #if var not in self.NBT_FORMAT: continue
-            if anno == CompoundReprAsList:
-                d[var] = [v.as_json() for v in getattr(self, var)]
+        for var, _, _ in type(self)._compile():
+            val = getattr(self, var)
+            if isinstance(val, NBT):
+                d[var] = val.py
+            elif isinstance(val, list):
+                d[var] = [v.py for v in val]
+            elif isinstance(val, dict):
+                d[var] = {k: v.py for k, v in val.items()}
             else:
-                if isinstance(getattr(self, var), NBT):
-                    d[var] = getattr(self, var).py
-                elif isinstance(getattr(self, var), list):
-                    d[var] = [v.py for v in getattr(self, var)]
-                elif isinstance(getattr(self, var), dict):
-                    d[var] = {k: v.py for k, v in getattr(self, var).items()}
-                else:
-                    d[var] = getattr(self, var)
+                d[var] = val
         return d
 
-    def _convert_to_nbt(self, name: str,
-                        val: Any,
-                        py_type: type,
-                        format_type: Type[NBT] | dict) -> NBT | None:
-        if not isinstance(format_type, _LiteralGenericAlias) and not isinstance(val, py_type):
-            raise TypeError(f"`{name}` must be of {py_type} (got {val})")
-        if issubclass(format_type, NBTFormat) and isinstance(val, format_type):
-            return val.as_nbt()
-        elif issubclass(format_type, NBT) and isinstance(val, format_type):
-            return val
-        elif isinstance(format_type, _LiteralGenericAlias):
-            if val not in get_args(format_type):
-                raise ValueError(f"{val} is not in {get_args(format_type)}")
-            return String(val)
-        elif isinstance(format_type, dict):
-            d = {}
-            for subname, subformat_type in format_type.items():
-                subval = getattr(self, subname, None)
-                d[subname] = self._convert_to_nbt(subname, subval,
-                                                  type(self).get_format()[subname], format_type)
-            return Compound(d)
-        elif isinstance(format_type, _UnionGenericAlias):
-            if type(None) in get_args(format_type) and val is None: return None
-            for format_subtype in get_args(format_type):
-                try:
-                    return self._convert_to_nbt(name, val, py_type, format_subtype)
-                except Exception:
-                    pass
-            else:
-                raise TypeError(
-                    f"`{name}` is not one of types {', '.join(str(a) for a in get_args(format_type))} (got {val})")
-        elif isinstance(format_type, _GenericAlias):
-            if isinstance(get_origin(format_type), CompoundReprAsList):
-                val: list
-                ft, = get_args(format_type)
-                pt, = get_args(py_type)
-                return Compound({v.name: self._convert_to_nbt(name, v, pt, ft) for v in val})
-            elif isinstance(get_origin(format_type), dict):
-                val: dict
-                kft, vft = get_args(format_type)
-                _, vpt = get_args(py_type)
-                if isinstance(kft, _LiteralGenericAlias):
-                    for k in val.keys():
-                        if not isinstance(k, kft):
-                            raise TypeError(f"{k} is not of type {kft}")
-                return Compound({k: self._convert_to_nbt(name, v, vpt, vft) for k, v in val.items()})
-        else:
-            return format_type(val)
-
     def as_nbt(self) -> Compound:
         d = {}
-        for var, anno in type(self).get_format().items():
-            if self._do_pascal_case_ify: var = pascal_case_ify(var, isinstance(anno, Byte))
-            #if var not in self.NBT_FORMAT: continue
-            #format_type = self.NBT_FORMAT[var]
-            d[var] = self._convert_to_nbt(var, getattr(self, var), anno, anno)
-            if d[var] is None: del d[var]
+        for var, key, convert in type(self)._compile():
+            val = convert(getattr(self, var))
+            if val is not None: d[key] = val
         return Compound(d)
 
+def _nbt_converter(name: str, hint: Any) -> Callable[[Any], NBT | None]:
+    """Makes a function that converts a value of a field annotated with ``hint`` into NBT."""
+    origin, args = get_origin(hint), get_args(hint)
+    if hint is None or hint is Any:
+        return lambda val: val if val is None or isinstance(val, NBT) and not isinstance(val, NBTFormat) \
+            else val.as_nbt() if isinstance(val, NBTFormat) else NBTTag(val)
+    if origin is Union or origin is types.UnionType:
+        optional = type(None) in args
+        options = [(arg, _nbt_converter(name, arg)) for arg in args if arg is not type(None)]
+        def convert(val):
+            if val is None and optional: return None
+            for arg, convert_arg in options:
+                try:
+                    return convert_arg(val)
+                except (TypeError, ValueError):
+                    pass
+            raise TypeError(f"`{name}` is not one of types {', '.join(str(a) for a in args)} (got {val})")
+        return convert
+    if origin is Literal:
+        def convert(val):
+            if val not in args: raise ValueError(f"{val} is not in {args}")
+            return String(val)
+        return convert
+    if origin is CompoundReprAsList:
+        convert_item = _nbt_converter(name, args[0])
+        return lambda val: Compound({v.name: convert_item(v) for v in _check(name, val, list)})
+    if origin is dict:
+        convert_item = _nbt_converter(name, args[1])
+        return lambda val: Compound({k: convert_item(v) for k, v in _check(name, val, dict).items()})
+    if origin is list:
+        convert_item = _nbt_converter(name, args[0])
+        return lambda val: List([convert_item(v) for v in _check(name, val, list)], nbt_type=lambda v: v)
+    cls = origin if isinstance(origin, type) else hint
+    if isinstance(cls, type) and issubclass(cls, NBTFormat):
+        return lambda val: _check(name, val, cls).as_nbt()
+    if isinstance(cls, type) and issubclass(cls, NBT):
+        return lambda val: _check(name, val, cls)
+    if isinstance(cls, type):
+        return lambda val: NBTTag(_check(name, val, cls))
+    return lambda val: val if isinstance(val, NBT) else NBTTag(val)
+
+def _check(name: str, val: Any, cls: type) -> Any:
+    if not isinstance(val, cls): raise TypeError(f"`{name}` must be of {cls} (got {val})")
+    return val
+
+def _json_converter(name: str, format_type: Any, shallow: bool = False) -> Callable[[Any], Any]:
+    """
+    Makes a function that converts a value of a ``JSON_FORMAT`` entry of type ``format_type`` into JSON.
+    Shallow converters leave formats inside the value as they are, and give lists as iterators,
+    for :py:meth:`JsonFormat.write_json` to walk.
+    """
+    origin, args = get_origin(format_type), get_args(format_type)
+    to_json = _identity if shallow else _to_json
+    if format_type is None or format_type is Any or format_type is dict:
+        return to_json
+    if origin is Union or origin is types.UnionType:
+        options = [(_json_instance_check(arg), _json_converter(name, arg, shallow))
+                   for arg in args if arg is not type(None)]
+        def convert(val):
+            for is_instance, convert_arg in options:
+                if is_instance(val): return convert_arg(val)
+            # e.g. JSON kept as it is by JsonFormat.from_json
+            if isinstance(val, JsonFormat): return to_json(val)
+            return options[0][1](val)
+        return convert
+    if origin is Literal:
+        def convert(val):
+            if val not in args: raise ValueError(f"`{name}` is not in {args} (got {val})")
+            return val
+        return convert
+    if origin is CompoundReprAsList:
+        convert_item = _json_converter(name, args[0], shallow)
+        return lambda val: {getattr(v, 'name', str(i)): convert_item(v) for i, v in enumerate(_check(name, val, list))}
+    if origin is dict:
+        convert_item = _json_converter(name, args[1], shallow) if len(args) == 2 else to_json
+        return lambda val: {k: convert_item(v) for k, v in _check(name, val, dict).items()}
+    if origin is list or origin is tuple:
+        convert_item = _json_converter(name, args[0], shallow) if args else to_json
+        if shallow: return lambda val: map(convert_item, _check(name, val, (list, tuple)))
+        return lambda val: [convert_item(v) for v in _check(name, val, (list, tuple))]
+    if format_type is str:
+        return _to_json_str_shallow if shallow else _to_json_str
+    if format_type in (int, float, bool):
+        return lambda val: val if isinstance(val, format_type) else format_type(val)
+    return to_json
+
+def _json_instance_check(format_type: Any) -> Callable[[Any], bool]:
+    origin, args = get_origin(format_type), get_args(format_type)
+    if origin is Literal: return lambda val: val in args
+    if origin in (list, tuple, CompoundReprAsList): return lambda val: isinstance(val, (list, tuple))
+    if origin is dict: return lambda val: isinstance(val, dict)
+    if format_type is str: return lambda val: isinstance(val, str)
+    if isinstance(format_type, type): return lambda val: isinstance(val, format_type)
+    return lambda val: True
+
+def _identity(val: Any) -> Any:
+    return val
+
+def _to_json(val: Any) -> Any:
+    if isinstance(val, JsonFormat): return val.as_json()
+    if isinstance(val, NBT): return val.py
+    if isinstance(val, (list, tuple)): return [_to_json(v) for v in val]
+    if isinstance(val, dict): return {k: _to_json(v) for k, v in val.items()}
+    return val
+
+def _to_json_str_shallow(val: Any) -> Any:
+    # files are referred to by their namespaced name, and other formats without a string form are written inline
+    if isinstance(val, str): return val
+    namespaced = getattr(val, 'namespaced', None)
+    if namespaced is not None: return namespaced
+    if isinstance(val, JsonFormat) and type(val).__str__ is object.__str__: return val
+    return str(val)
+
+def _to_json_str(val: Any) -> Any:
+    val = _to_json_str_shallow(val)
+    return val.as_json() if isinstance(val, JsonFormat) else val
+
 class JsonFormat:
     @classmethod
     def _get_annotations(cls):
         return {k: v for c in cls.mro() if hasattr(c, '__annotations__') for k, v in c.__annotations__.items()}
 
-    def _convert_to_json(self, name: str, val: Any, py_type: type, format_type: type) -> Any:
-        if not isinstance(format_type, _LiteralGenericAlias) and not isinstance(val, py_type):
-            raise TypeError(f"`{name}` must be of {py_type} (got {val})")
-        if issubclass(format_type, dict):
-            if isinstance(val, JsonFormat):
-                return val.as_json()
-            elif isinstance(val, NBT):
-                return val.py
-            else:
-                return val
-        elif issubclass(format_type, _LiteralGenericAlias):
-            if val not in get_args(format_type):
-                raise ValueError(f"{val} is not in {get_args(format_type)}")
-            return val
-        elif issubclass(format_type, _UnionGenericAlias):
-            if type(None) in get_args(format_type) and val is None: return None
-            for format_subtype in get_args(format_type):
-                try:
-                    return self._convert_to_json(name, val, py_type, format_subtype)
-                except Exception:
-                    pass
-            else:
-                raise TypeError(
-                    f"`{name}` is not one of types {', '.join(str(a) for a in get_args(format_type))} (got {val})")
-        elif isinstance(format_type, _GenericAlias):
-            if isinstance(get_origin(format_type), CompoundReprAsList):
-                val: list
-                ft, = get_args(format_type)
-                pt, = get_args(py_type)
-                return {v.name: self._convert_to_json(name, v, pt, ft) for v in val}
-            elif isinstance(get_origin(format_type), dict):
-                val: dict
-                kft, vft = get_args(format_type)
-                _, vpt = get_args(py_type)
-                if isinstance(kft, _LiteralGenericAlias):
-                    for k in val.keys():
-                        if not isinstance(k, kft):
-                            raise TypeError(f"{k} is not of type {kft}")
-                return {k: self._convert_to_json(name, v, vpt, vft) for k, v in val.items()}
-        else:
-            return format_type(val)
+    @classmethod
+    def _compile(cls, obj: JsonFormat, shallow: bool = False) -> list[tuple[str, str, Callable[[Any], Any]]]:
+        """
+        Gives the JSON key, attribute name and converter of every entry of the class's ``JSON_FORMAT``,
+        working them out the first time so that :py:meth:`as_json` doesn't have to look at the format again.
+        A ``JSON_FORMAT`` that is a property is read from the first object, as it is the same for the whole class.
+        """
+        cache = '_stream_encoder' if shallow else '_encoder'
+        encoder = cls.__dict__.get(cache)
+        if encoder is None:
+            annotations = _field_types(cls)
+            encoder = [(key, key + "_" if key not in annotations and key + "_" in annotations else key,
+                        _json_converter(key, format_type, shallow))
+                       for key, format_type in obj.JSON_FORMAT.items()]
+            setattr(cls, cache, encoder)
+        return encoder
 
     def as_json(self) -> dict:
         d = {}
-        for var, anno in type(self)._get_annotations().items():
-            var = var.removesuffix("_")
-            if var not in self.JSON_FORMAT: continue
-            format_type = self.JSON_FORMAT[var]
-            d[var] = self._convert_to_json(var, getattr(self, var), anno, format_type)
-            if d[var] is None: del d[var]
+        for key, attr, convert in type(self)._compile(self):
+            val = getattr(self, attr, None)
+            if val is not None: val = convert(val)
+            if val is not None: d[key] = val
         return d
 
+    def _json_entries(self) -> Iterator[tuple[str, Any]]:
+        for key, attr, convert in type(self)._compile(self, shallow=True):
+            val = getattr(self, attr, None)
+            if val is not None: val = convert(val)
+            if val is not None: yield key, val
+
+    def write_json(self, fp: TextIO, indent: int | str | None = None, separators: tuple[str, str] | None = None,
+                   replace: Callable[[JsonFormat], JsonFormat] | None = None):
+        """
+        Writes the object as JSON to a text stream a piece at a time, without building its :py:meth:`as_json` dict.
+        The output is the same as ``json.dump(obj.as_json(), fp, indent=indent, separators=separators)``,
+        with keys in the order of the ``JSON_FORMAT``.
+        To write into a zip archive, wrap the entry from :py:meth:`zipfile.ZipFile.open` in an :py:class:`io.TextIOWrapper`.
+
+        :param fp: The text stream, e.g. an open file
+        :param indent: If given, the JSON is pretty-printed with each entry on its own line, indented by this many spaces
+                       or this string per level
+        :param separators: The item and key separators, as in :py:func:`json.dump`
+        :param replace: If given, a function giving the object to write in place of each object nested in this one
+        """
+        if isinstance(indent, int): indent = " " * indent
+        if separators is None: separators = (", ", ": ") if indent is None else (",", ": ")
+        _write_json(fp, self, indent, *separators, replace)
+
     JSON_FORMAT: dict[str, type] | property = {}
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], **kwargs):
+        """
+        Creates an object from its JSON. If the class has subclasses, the one named by the ``type``, ``condition``,
+        ``function`` or ``trigger`` key of the JSON is created instead.
+
+        Values are converted into the classes their fields are annotated with where possible, and kept as they are
+        otherwise. Fields that the JSON leaves out and have no default are given an empty list or dict, or None.
+
+        If the object wouldn't give the same JSON back, e.g. as the JSON names a kind of object that pymcfunc doesn't know
+        or has keys that the class doesn't have, an :py:class:`UnparsedJson` keeping the JSON as it is is given instead.
+
+        :param data: The JSON
+        :param kwargs: Fields to set instead of reading them from the JSON, e.g. ``namespace`` and ``name``
+        """
+        sub = _subclasses(cls).get(_discriminator(data), cls)
+        if sub is not cls: return sub.from_json(data, **kwargs)
+        if not attr.has(cls): raise TypeError(f"{cls.__name__} can't be created from JSON")
+        fields = {field.name: field for field in attr.fields(cls)}
+        init, extra = {}, {}
+        for name, hint in _field_types(cls).items():
+            field, key = fields.get(name), name.lstrip("_")
+            if key in kwargs: value = kwargs.pop(key)
+            elif name.strip("_") in data: value = _from_json(data[name.strip("_")], hint)
+            elif field is not None and field.init and field.default is attr.NOTHING:
+                value = [] if get_origin(hint) is list else {} if get_origin(hint) is dict else None
+            else: continue
+            if field is not None and field.init: init[key] = value
+            else: extra[name] = value
+        obj = cls(**init, **kwargs)
+        # fields of base classes aren't attrs fields, as the attrs class is made before the base class wrapper
+        for name, value in extra.items():
+            try:
+                setattr(obj, name, value)
+            except AttributeError:
+                pass
+        return obj if _reproduces(obj, data) else UnparsedJson(data)
+
+class UnparsedJson(JsonFormat):
+    """
+    JSON that can't be read into one of the classes of pymcfunc without losing some of it,
+    kept as it is so that it is written back out unchanged.
+    """
+
+    def __init__(self, data: dict[str, Any]):
+        """
+        Initialises the JSON.
+
+        :param data: The JSON
+        """
+        self.data = data
+
+    def as_json(self) -> dict:
+        return self.data
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, UnparsedJson) and self.data == other.data
+
+    def __repr__(self) -> str:
+        return f"UnparsedJson({self.data!r})"
+
+def _reproduces(obj: JsonFormat, data: Any) -> bool:
+    """
+    Gives whether an object gives back the JSON it was read from, other than ``minecraft:`` prefixes,
+    the keys that were only read to pick its class, and empty lists and dicts for keys that the JSON leaves out.
+    """
+    if not isinstance(data, dict): return False
+    try:
+        written, json_format = obj.as_json(), obj.JSON_FORMAT
+    except Exception:
+        return False
+    return _same_json(written, {k: v for k, v in data.items() if k not in _DISCRIMINATORS or k in json_format})
+
+def _same_json(written: Any, data: Any) -> bool:
+    if isinstance(written, str) and isinstance(data, str):
+        return written.removeprefix("minecraft:") == data.removeprefix("minecraft:")
+    if isinstance(written, dict) and isinstance(data, dict):
+        data = {k.removeprefix("minecraft:"): v for k, v in data.items()}
+        written = {k.removeprefix("minecraft:"): v for k, v in written.items()}
+        return data.keys() <= written.keys() \
+            and all(_same_json(v, data[k]) if k in data else v == [] or v == {} for k, v in written.items())
+    if isinstance(written, (list, tuple)) and isinstance(data, list):
+        return len(written) == len(data) and all(_same_json(w, d) for w, d in zip(written, data))
+    return written == data and isinstance(written, bool) == isinstance(data, bool)
+
+_DISCRIMINATORS = ('type', 'condition', 'function', 'trigger')
+
+def _discriminator(data: Any) -> tuple[str, str] | None:
+    if not isinstance(data, dict): return None
+    for key in _DISCRIMINATORS:
+        if isinstance(data.get(key), str): return key, data[key].removeprefix("minecraft:")
+    return None
+
+@lru_cache(maxsize=None)
+def _subclasses(cls: type) -> dict[tuple[str, str], type]:
+    """Maps the discriminator of every subclass to the subclass, for subclasses that set one as a property."""
+    found, stack = {}, list(cls.__subclasses__())
+    while stack:
+        sub = stack.pop()
+        stack.extend(sub.__subclasses__())
+        for key in _DISCRIMINATORS:
+            prop = vars(sub).get(key)
+            if isinstance(prop, property) and prop.fget is not None:
+                try:
+                    value = prop.fget(None)
+                except Exception:
+                    continue
+                if isinstance(value, str) and value: found.setdefault((key, value.removeprefix("minecraft:")), sub)
+    return found
+
+@lru_cache(maxsize=None)
+def _field_types(cls: type) -> dict[str, Any]:
+    """Evaluates the annotation of every field, or gives None if it names something that can't be imported."""
+    hints = {}
+    for c in reversed(cls.mro()):
+        namespace = {**vars(sys.modules[c.__module__]), **{k: v for k, v in vars(c).items() if isinstance(v, type)}}
+        for name, annotation in vars(c).get('__annotations__', {}).items():
+            try:
+                hints[name] = eval(annotation, namespace) if isinstance(annotation, str) else annotation
+            except Exception:
+                hints[name] = None
+    return hints
+
+def _from_json(value: Any, hint: Any) -> Any:
+    if hint is None: return value
+    origin, args = get_origin(hint), get_args(hint)
+    if origin is Union or origin is types.UnionType:
+        for arg in args:
+            if arg is type(None): continue
+            if isinstance(value, dict) and isinstance(arg, type) and issubclass(arg, JsonFormat) \
+                    or isinstance(value, list) and get_origin(arg) in (list, tuple):
+                try:
+                    return _from_json(value, arg)
+                except Exception:
+                    continue
+        return value
+    if origin in (list, tuple) and args and isinstance(value, (list, dict)):
+        return [_from_json(v, args[0]) for v in (value.values() if isinstance(value, dict) else value)]
+    if origin is dict and len(args) == 2 and isinstance(value, dict):
+        return {k: _from_json(v, args[1]) for k, v in value.items()}
+    if isinstance(hint, type) and issubclass(hint, JsonFormat) and isinstance(value, dict):
+        try:
+            return hint.from_json(value)
+        except TypeError:
+            return value
+    return value
+
+_END = object()
+
+def _json_key(key: Any) -> str:
+    return encode_basestring_ascii(key) if isinstance(key, str) else '"' + json.dumps(key) + '"'
+
+def _json_scalar(val: Any) -> str:
+    if isinstance(val, str): return encode_basestring_ascii(val)
+    if val is None: return "null"
+    if val is True: return "true"
+    if val is False: return "false"
+    if isinstance(val, int): return int.__repr__(val)
+    return json.dumps(val)
+
+def _write_json(fp: TextIO, value: Any, indent: str | None, item_separator: str, key_separator: str,
+                replace: Callable[[JsonFormat], JsonFormat] | None = None):
+    write = fp.write
+    stack: list[list] = []  # [entries left, closing bracket, whether they are object entries, whether any are written]
+    while True:
+        entries = None
+        if isinstance(value, JsonFormat) and type(value).as_json is JsonFormat.as_json:
+            entries, is_object = value._json_entries(), True
+        else:
+            if isinstance(value, JsonFormat): value = value.as_json()
+            elif isinstance(value, NBT): value = value.py
+            if isinstance(value, dict): entries, is_object = iter(value.items()), True
+            elif isinstance(value, (list, tuple, Iterator)): entries, is_object = iter(value), False
+            else: write(_json_scalar(value))
+        if entries is not None:
+            write("{" if is_object else "[")
+            stack.append([entries, "}" if is_object else "]", is_object, False])
+
+        while stack:
+            entries, closing, is_object, started = frame = stack[-1]
+            entry = next(entries, _END)
+            if entry is _END:
+                stack.pop()
+                if started and indent is not None: write("\n" + indent * len(stack))
+                write(closing)
+                continue
+            if started: write(item_separator)
+            frame[3] = True
+            if indent is not None: write("\n" + indent * len(stack))
+            if is_object:
+                key, value = entry
+                write(_json_key(key) + key_separator)
+            else:
+                value = entry
+            if replace is not None and isinstance(value, JsonFormat): value = replace(value)
+            break
+        else:
+            return
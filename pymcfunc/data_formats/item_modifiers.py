@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Literal, Union, Optional, TYPE_CHECKING
+from typing import Literal, Union, Optional, ClassVar, TYPE_CHECKING
 from uuid import UUID
 
 from attr import field, define
@@ -22,6 +22,8 @@ from pymcfunc.data_formats.predicates import Predicate
 @base_class
 class ItemModifier(JsonFormat):
     function = property(lambda self: "")
+    namespaced: ClassVar[str | None] = None
+    """The namespaced name of the item modifier's file, given to the item modifiers of a pack when it is built"""
     conditions: list[Predicate]
 
     JSON_FORMAT = {
@@ -199,6 +201,16 @@ class LootingEnchantItemModifier(ItemModifier):
         'limit': int
     }
 
+@define(kw_only=True, init=True)
+class ReferenceItemModifier(ItemModifier):
+    function = property(lambda self: "reference")
+    name: ResourceLocation | ItemModifier
+
+    JSON_FORMAT = {
+        **ItemModifier.JSON_FORMAT,
+        'name': str
+    }
+
 @define(kw_only=True, init=True)
 class SetAttributesItemModifier(ItemModifier):
     function = property(lambda self: "set_attributes")
@@ -117,7 +117,7 @@ class Pool(JsonFormat):
         "functions": list[ItemModifier],
         "rolls": Union[int, NumberProvider],
         "bonus_rolls": Union[float, NumberProvider],
-        "entries": list[str]
+        "entries": list[Entry]
     }
 
 @define(kw_only=True, init=True)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import array
+import gzip
+import io
+import os
+import re
+import struct
+import sys
+import zlib
+from typing import Any, BinaryIO, Callable, Literal
+
+from pymcfunc.data_formats.nbt_tags import NBTTag, Byte, Short, Int, Long, Float, Double, String, List, ByteArray, \
+    IntArray, LongArray, Boolean, Compound
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+Compression = Literal['gzip', 'zlib'] | None
+
+_IDS: dict[type, int] = {Byte: 1, Boolean: 1, Short: 2, Int: 3, Long: 4, Float: 5, Double: 6, ByteArray: 7, String: 8,
+                         List: 9, Compound: 10, IntArray: 11, LongArray: 12}
+_SCALARS: dict[int, tuple[str, type]] = {1: ("b", Byte), 2: ("h", Short), 3: ("i", Int), 4: ("q", Long),
+                                         5: ("f", Float), 6: ("d", Double)}
+_ARRAYS: dict[int, tuple[str, int, type, type]] = {7: ("b", 1, ByteArray, Byte), 11: ("i", 4, IntArray, Int),
+                                                   12: ("q", 8, LongArray, Long)}
+_SUPPLEMENTARY = re.compile("[\U00010000-\U0010ffff]")
+_FLUSH_SIZE = 1 << 16
+
+
+def _to_surrogates(match: re.Match) -> str:
+    code = ord(match.group()) - 0x10000
+    return chr(0xD800 + (code >> 10)) + chr(0xDC00 + (code & 0x3FF))
+
+def _encode_mutf8(string: str) -> bytes:
+    """Encodes a string as the modified UTF-8 that Java Edition uses, in which null and supplementary characters
+    are encoded differently from UTF-8."""
+    if string.isascii() and "\0" not in string: return string.encode("ascii")
+    string = _SUPPLEMENTARY.sub(_to_surrogates, string)
+    return string.encode("utf-8", "surrogatepass").replace(b"\0", b"\xc0\x80")
+
+def _decode_mutf8(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        string = data.replace(b"\xc0\x80", b"\0").decode("utf-8", "surrogatepass")
+        return string.encode("utf-16-le", "surrogatepass").decode("utf-16-le")
+
+
+class _ZlibReader(io.RawIOBase):
+    """Decompresses a zlib stream as it is read."""
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.decompressor = zlib.decompressobj()
+        self.pending = b""
+
+    def readable(self) -> bool: return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending and not self.decompressor.eof:
+            chunk = self.fp.read(_FLUSH_SIZE)
+            self.pending = self.decompressor.decompress(chunk) if chunk else self.decompressor.flush()
+            if not chunk: break
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+class _ZlibWriter(io.RawIOBase):
+    """Compresses a zlib stream as it is written. Closing the writer finishes the stream but not the file."""
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.compressor = zlib.compressobj()
+
+    def writable(self) -> bool: return True
+
+    def write(self, data) -> int:
+        self.fp.write(self.compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed: self.fp.write(self.compressor.flush())
+        super().close()
+
+
+class _Buffered(io.BufferedReader):
+    """Buffers a file object without closing it when the buffer is closed or garbage collected."""
+
+    def close(self): pass
+
+
+class _Reader:
+    def __init__(self, fp: BinaryIO, little_endian: bool, arrays: Literal['array', 'numpy']):
+        self.fp = fp
+        self.order = "<" if little_endian else ">"
+        self.little_endian = little_endian
+        self.swap = little_endian != (sys.byteorder == "little")
+        self.arrays = arrays
+        self.structs = {type_id: struct.Struct(self.order + code) for type_id, (code, _) in _SCALARS.items()}
+        self.short = self.structs[2]
+        self.int = self.structs[3]
+        self.payloads: dict[int, Callable[[], Any]] = {type_id: self.scalar(type_id) for type_id in _SCALARS}
+        self.payloads.update({type_id: self.array(type_id) for type_id in _ARRAYS})
+        self.payloads.update({8: self.string, 9: self.list, 10: self.compound})
+
+    def read(self, size: int) -> bytes:
+        data = self.fp.read(size)
+        if len(data) != size: raise EOFError("Unexpected end of NBT data")
+        return data
+
+    def read_into(self, view: memoryview):
+        while view:
+            size = self.fp.readinto(view)
+            if not size: raise EOFError("Unexpected end of NBT data")
+            view = view[size:]
+
+    def scalar(self, type_id: int) -> Callable[[], NBTTag]:
+        unpack, size, tag = self.structs[type_id].unpack, self.structs[type_id].size, _SCALARS[type_id][1]
+        return lambda: tag(unpack(self.read(size))[0])
+
+    def array(self, type_id: int) -> Callable[[], NBTTag]:
+        code, size, tag, _ = _ARRAYS[type_id]
+        def payload():
+            length = self.int.unpack(self.read(4))[0]
+            if self.arrays == 'numpy':
+                values = numpy.empty(length, dtype=numpy.dtype(code).newbyteorder(self.order))
+                self.read_into(memoryview(values).cast("B"))
+                return tag(values.astype(values.dtype.newbyteorder("="), copy=False))
+            values = array.array(code, bytes(size)) * length
+            self.read_into(memoryview(values).cast("B"))
+            if self.swap: values.byteswap()
+            return tag(values)
+        return payload
+
+    def string(self) -> String:
+        data = self.read(self.short.unpack(self.read(2))[0] & 0xFFFF)
+        return String(data.decode("utf-8") if self.little_endian else _decode_mutf8(data))
+
+    def list(self) -> List:
+        type_id, length = self.read(1)[0], self.int.unpack(self.read(4))[0]
+        if type_id == 0 or length <= 0: return List([])
+        payload = self.payloads[type_id]
+        return List([payload() for _ in range(length)], nbt_type=lambda v: v)
+
+    def compound(self) -> Compound:
+        values = {}
+        while (type_id := self.read(1)[0]) != 0:
+            name = self.string()._val
+            values[name] = self.payloads[type_id]()
+        return Compound(values)
+
+
+class _Writer:
+    def __init__(self, fp: BinaryIO, little_endian: bool):
+        self.fp = fp
+        self.buffer = bytearray()
+        self.order = "<" if little_endian else ">"
+        self.little_endian = little_endian
+        self.swap = little_endian != (sys.byteorder == "little")
+        self.structs = {type_id: struct.Struct(self.order + code) for type_id, (code, _) in _SCALARS.items()}
+        self.short = self.structs[2]
+        self.int = self.structs[3]
+
+    def flush(self):
+        self.fp.write(self.buffer)
+        self.buffer = bytearray()
+
+    def write(self, data: bytes | memoryview):
+        self.buffer += data
+        if len(self.buffer) >= _FLUSH_SIZE: self.flush()
+
+    def string(self, string: str):
+        data = string.encode("utf-8") if self.little_endian else _encode_mutf8(string)
+        if len(data) > 0xFFFF: raise ValueError(f"String is too long for NBT ({len(data)} bytes)")
+        self.write(self.short.pack(len(data)))
+        self.write(data)
+
+    def payload(self, type_id: int, tag: NBTTag):
+        if type_id in _SCALARS:
+            self.write(self.structs[type_id].pack(tag._val))
+        elif type_id == 8:
+            self.string(tag._val)
+        elif type_id == 10:
+            for name, value in tag.items():
+                value_id = _tag_id(value)
+                self.write(bytes((value_id,)))
+                self.string(name)
+                self.payload(value_id, value)
+            self.write(b"\0")
+        elif type_id == 9:
+            element_id = _tag_id(tag[0]) if len(tag) else 0
+            self.write(bytes((element_id,)))
+            self.write(self.int.pack(len(tag)))
+            for value in tag: self.payload(element_id, value)
+        else:
+            self.array(type_id, tag)
+
+    def array(self, type_id: int, tag: NBTTag):
+        code = _ARRAYS[type_id][0]
+        values = tag._val
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            values = numpy.ascontiguousarray(values, dtype=numpy.dtype(code).newbyteorder(self.order))
+            self.write(self.int.pack(len(values)))
+            self.write(memoryview(values).cast("B"))
+            return
+        if not isinstance(values, array.array) or values.typecode != code:
+            values = array.array(code, map(int, values))
+        elif self.swap:
+            values = array.array(code, values)
+        if self.swap: values.byteswap()
+        self.write(self.int.pack(len(values)))
+        self.write(memoryview(values).cast("B"))
+
+
+def _tag_id(tag: NBTTag) -> int:
+    for cls in type(tag).mro():
+        if cls in _IDS: return _IDS[cls]
+    raise TypeError(f"{type(tag).__name__} can't be written as binary NBT")
+
+def _detect(fp: BinaryIO) -> tuple[BinaryIO, Compression]:
+    """Detects the compression of a stream from its first two bytes, without losing them."""
+    fp = fp if hasattr(fp, 'peek') else _Buffered(fp)
+    head = fp.peek(2)[:2]
+    if head[:2] == b"\x1f\x8b": return fp, 'gzip'
+    if len(head) == 2 and head[0] & 0x0F == 8 and int.from_bytes(head, "big") % 31 == 0: return fp, 'zlib'
+    return fp, None
+
+
+def read_nbt(fp: BinaryIO, little_endian: bool = False, compression: Compression | Literal['auto'] = 'auto',
+             arrays: Literal['array', 'numpy'] = 'array') -> tuple[str, NBTTag]:
+    """
+    Reads a binary NBT tag from a file object, decompressing it as it is read.
+    The file is read a buffer at a time, and the contents of byte, int and long arrays are read straight into
+    an :py:class:`array.array` or NumPy array.
+
+    :param fp: The file object, opened in binary mode
+    :param bool little_endian: Whether the NBT is little-endian, as in Bedrock Edition, rather than big-endian, as in Java Edition.
+                               The 8-byte header of Bedrock Edition's ``level.dat`` should be read before this.
+    :param compression: ``gzip``, ``zlib``, None, or ``auto`` to detect it
+    :param arrays: Whether to read arrays into an :py:class:`array.array` or a NumPy array, which requires NumPy
+    :return: The name of the root tag, and the root tag
+    """
+    if arrays == 'numpy' and numpy is None: raise ImportError("Reading arrays into NumPy arrays requires NumPy")
+    if compression == 'auto': fp, compression = _detect(fp)
+    if compression == 'gzip': fp = gzip.GzipFile(fileobj=fp, mode="rb")
+    elif compression == 'zlib': fp = io.BufferedReader(_ZlibReader(fp))
+    elif not hasattr(fp, 'readinto'): fp = _Buffered(fp)
+    reader = _Reader(fp, little_endian, arrays)
+    type_id = reader.read(1)[0]
+    if type_id == 0: return "", Compound({})
+    name = reader.string()._val
+    return name, reader.payloads[type_id]()
+
+def write_nbt(fp: BinaryIO, tag: NBTTag, name: str = "", little_endian: bool = False, compression: Compression = None):
+    """
+    Writes a tag as binary NBT to a file object, compressing it as it is written.
+    Output is written in blocks of 64 KiB, and arrays backed by an :py:class:`array.array` or NumPy array
+    are written from their buffers. Gzipped output has no timestamp, so it only depends on the tag.
+
+    :param fp: The file object, opened in binary mode
+    :param NBTTag tag: The root tag, usually a :py:class:`Compound`
+    :param str name: The name of the root tag
+    :param bool little_endian: Whether to write little-endian NBT, as in Bedrock Edition, rather than big-endian, as in Java Edition
+    :param compression: ``gzip``, ``zlib``, or None
+    """
+    out = fp
+    if compression == 'gzip': out = gzip.GzipFile(fileobj=fp, mode="wb", mtime=0)
+    elif compression == 'zlib': out = _ZlibWriter(fp)
+    writer = _Writer(out, little_endian)
+    type_id = _tag_id(tag)
+    writer.write(bytes((type_id,)))
+    writer.string(name)
+    writer.payload(type_id, tag)
+    writer.flush()
+    if out is not fp: out.close()
+
+def read_nbt_file(path: str | os.PathLike, little_endian: bool = False,
+                  compression: Compression | Literal['auto'] = 'auto',
+                  arrays: Literal['array', 'numpy'] = 'array') -> tuple[str, NBTTag]:
+    """
+    Reads a binary NBT file. See :py:func:`read_nbt`.
+
+    :param path: The path of the file
+    """
+    with open(path, "rb") as f:
+        return read_nbt(f, little_endian, compression, arrays)
+
+def write_nbt_file(path: str | os.PathLike, tag: NBTTag, name: str = "", little_endian: bool = False,
+                   compression: Compression = 'gzip'):
+    """
+    Writes a binary NBT file, gzipped by default as Java Edition expects. See :py:func:`write_nbt`.
+
+    :param path: The path of the file
+    """
+    with open(path, "wb") as f:
+        write_nbt(f, tag, name, little_endian, compression)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import Literal, TYPE_CHECKING
+
+from pymcfunc.data_formats.base_formats import NBTFormat
+from pymcfunc.data_formats.nbt_path import Path, NamedTag
+from pymcfunc.data_formats.nbt_tags import NBTTag, Compound, List, ByteArray, IntArray, LongArray, Byte, Int, Long
+
+if TYPE_CHECKING:
+    from pymcfunc.command import ExecutedCommand
+    from pymcfunc.functions import JavaFunctionHandler
+
+Operation = tuple[Literal['set', 'merge', 'remove'], Path, NBTTag | None]
+
+_SEQUENCES = (List, ByteArray, IntArray, LongArray)
+_ELEMENTS = {ByteArray: Byte, IntArray: Int, LongArray: Long}
+# the length of `data modify entity @s  set value ` and the like, to compare the size of operations with
+_OVERHEAD = 32
+
+
+class NBTPatch:
+    """
+    The changes that turn one piece of NBT into another, as a compound to ``data merge`` into it,
+    and ``data modify`` and ``data remove`` operations at paths inside it.
+    """
+
+    def __init__(self, merge: Compound, operations: list[Operation]):
+        """
+        :param Compound merge: The entries to merge into the NBT
+        :param operations: The mode, path and value of each operation, where the mode is ``set`` or ``merge``
+                           for a ``data modify`` operation, or ``remove`` for a ``data remove`` operation
+        """
+        self.merge = merge
+        self.operations = operations
+
+    def __bool__(self) -> bool:
+        return bool(self.merge) or bool(self.operations)
+
+    def __repr__(self):
+        return f"NBTPatch(merge={self.merge}, operations=[{', '.join(f'({m}, {p}, {v})' for m, p, v in self.operations)}])"
+
+    def commands(self, fh: JavaFunctionHandler, **target) -> list[ExecutedCommand]:
+        """
+        Adds the commands that apply the patch to a function. Removals go first, then the merge, then modifications.
+
+        :param fh: The function handler to add the commands to
+        :param target: The NBT to change, as ``block=``, ``entity=`` or ``storage=``,
+                       as in :py:meth:`~pymcfunc.raw_commands.JavaRawCommands.data_merge`
+        """
+        commands = [fh.r.data_remove(**target, path=path) for mode, path, _ in self.operations if mode == 'remove']
+        if self.merge: commands.append(fh.r.data_merge(**target, nbt=self.merge))
+        modify_target = {f"target_{k}": v for k, v in target.items()}
+        commands.extend(fh.r.data_modify(**modify_target, target_path=path, mode=mode, value=value)
+                        for mode, path, value in self.operations if mode != 'remove')
+        return commands
+
+
+def diff_nbt(old: Compound | NBTFormat, new: Compound | NBTFormat) -> NBTPatch:
+    """
+    Works out a small patch that turns one compound into another.
+
+    Changes that only go through compounds are gathered into one compound to merge, as merging keeps the entries it
+    doesn't mention. Lists and arrays are replaced by merging unless they keep their length and setting the changed
+    elements is shorter, since merging can't reach inside them. Compounds inside lists are merged into with
+    ``data modify ... merge``, and entries that were deleted are removed with ``data remove``.
+
+    :param old: The NBT before, or the format that makes it
+    :param new: The NBT after, or the format that makes it
+    """
+    old = old.as_nbt() if isinstance(old, NBTFormat) else old
+    new = new.as_nbt() if isinstance(new, NBTFormat) else new
+    merge, operations = _diff_compound(old, new, None)
+    return NBTPatch(merge, operations)
+
+def _child(path: Path | None, key: str) -> Path:
+    return NamedTag(key) if path is None else path[key]
+
+def _same(old: NBTTag, new: NBTTag) -> bool:
+    # containers compare their cached SNBT, so unchanged subtrees are skipped quickly
+    return type(old) is type(new) and (str(old) == str(new) if isinstance(old, (Compound,) + _SEQUENCES) else old == new)
+
+def _size(operations: list[Operation]) -> int:
+    return sum(_OVERHEAD + len(str(path)) + (len(str(value)) if value is not None else 0)
+               for _, path, value in operations)
+
+def _diff_compound(old: Compound, new: Compound, path: Path | None) -> tuple[Compound, list[Operation]]:
+    """Gives the entries to merge into a compound, and the operations needed below it that merging can't do."""
+    merge, operations = {}, []
+    for key in old:
+        if key not in new: operations.append(('remove', _child(path, key), None))
+    for key, value in new.items():
+        before = old.get(key)
+        if before is None:
+            merge[key] = value
+        elif _same(before, value):
+            continue
+        elif isinstance(before, Compound) and isinstance(value, Compound):
+            sub_merge, sub_operations = _diff_compound(before, value, _child(path, key))
+            if sub_merge: merge[key] = sub_merge
+            operations.extend(sub_operations)
+        elif type(before) is type(value) and isinstance(value, _SEQUENCES):
+            sub_operations = _diff_sequence(before, value, _child(path, key))
+            if sub_operations is None or _size(sub_operations) >= len(str(value)): merge[key] = value
+            else: operations.extend(sub_operations)
+        else:
+            merge[key] = value
+    return Compound(merge), operations
+
+def _diff_sequence(old: List | ByteArray | IntArray | LongArray, new: List | ByteArray | IntArray | LongArray,
+                   path: Path) -> list[Operation] | None:
+    """Gives the operations that set the changed elements of a list or array, or None if it changed length."""
+    if len(old) != len(new): return None
+    if isinstance(new, List) and len(new) and old.content_type is not new.content_type: return None
+    operations = []
+    if not isinstance(new, List):
+        element = _ELEMENTS[type(new)]
+        for i, (before, value) in enumerate(zip(old.py, new.py)):
+            if before != value: operations.append(('set', path[i], element(value)))
+        return operations
+    for i, (before, value) in enumerate(zip(old, new)):
+        if _same(before, value): continue
+        if isinstance(before, Compound) and isinstance(value, Compound):
+            sub_merge, sub_operations = _diff_compound(before, value, path[i])
+            if sub_merge: operations.append(('merge', path[i], sub_merge))
+            operations.extend(sub_operations)
+        elif type(before) is type(value) and isinstance(value, _SEQUENCES):
+            sub_operations = _diff_sequence(before, value, path[i])
+            if sub_operations is None or _size(sub_operations) >= len(str(value)):
+                operations.append(('set', path[i], value))
+            else:
+                operations.extend(sub_operations)
+        else:
+            operations.append(('set', path[i], value))
+    return operations
@@ -1,78 +1,120 @@
 from __future__ import annotations
 
-from abc import ABC
-from copy import copy
-from functools import singledispatch
-from typing import Self
+import json
+import re
+from types import EllipsisType
+from typing import Self, Any, TypeVar, Generic
 
 from pymcfunc.data_formats.nbt_tags import NBT
 from pymcfunc.internal import base_class, _generic
 
+_T = TypeVar('_T')
+_UNQUOTED_KEY = re.compile(r"[A-Za-z0-9_\-+]+")
+
+
+def _quote(key: str) -> str:
+    if _UNQUOTED_KEY.fullmatch(key) or len(key) >= 2 and key[0] == key[-1] == '"': return key
+    return '"' + key.replace('\\', '\\\\').replace('"', '\\"') + '"'
 
 @base_class
 @_generic(NBT)
 class Path:
+    """
+    A path to NBT. Paths are immutable chains of nodes that each link to their parent,
+    so extending a path doesn't copy it, and a path's string and hash are only worked out once.
+    Paths can be used as dict keys, and are equal when their strings are.
+    """
     def __init__(self, root: str | None = None): # TODO maybe a source parameter for direct resolution?
-        self._components = [f"\"{root}\"" if ' ' in root else (root or "")]
+        self._link(None, _quote(root) if root else "")
+
+    def _link(self, parent: Path | None, component: str):
+        object.__setattr__(self, '_parent', parent)
+        object.__setattr__(self, '_component', component)
+        object.__setattr__(self, '_str', None)
+        object.__setattr__(self, '_hash', None)
+
+    def _child(self, cls: type[Path], component: str) -> Path:
+        node = object.__new__(cls)
+        node._link(self, component)
+        return node
+
+    def __setattr__(self, key: str, value: Any):
+        # typing sets __orig_class__ on instances made by e.g. NamedTag[Short]("Air"), for Path.T
+        if key != '__orig_class__': raise AttributeError(f"{type(self).__name__} is immutable")
+        object.__setattr__(self, key, value)
 
     def __str__(self):
-        return "".join(self._components)
+        if self._str is None:
+            components, node = [], self
+            while node is not None and node._str is None:
+                components.append(node._component)
+                node = node._parent
+            if node is not None: components.append(node._str)
+            object.__setattr__(self, '_str', "".join(reversed(components)))
+        return self._str
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self)!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Path): return NotImplemented
+        return self is other or hash(self) == hash(other) and str(self) == str(other)
+
+    def __hash__(self) -> int:
+        if self._hash is None: object.__setattr__(self, '_hash', hash(str(self)))
+        return self._hash
 
     def parent(self) -> Path:
-        path = copy(self)
-        path._components.pop()
-        return path
+        return self._parent if self._parent is not None else NamedTag("")
 
     def copy(self) -> Self:
-        return copy(self)
+        return self
+
+    def compound_keys(self) -> list[str] | None:
+        """
+        Gives the keys that the path goes through, if it only goes through entries of compounds,
+        or None if it indexes a list or filters by a compound.
+        """
+        keys = []
+        node = self
+        while node is not None:
+            component = node._component
+            if node._parent is not None:
+                if not component.startswith("."): return None
+                component = component[1:]
+            if not component or component[0] in "[{": return None
+            keys.append(json.loads(component) if component.startswith('"') else component)
+            node = node._parent
+        return keys[::-1]
 
     def __getattr__(self, attr: str) -> NamedTag:
-        tag = NamedTag("."+attr)
-        tag._components = self._components + tag._components
-        return tag
+        if attr.startswith("__") and attr.endswith("__"): raise AttributeError(attr)
+        return self._child(NamedTag, "." + _quote(attr))
 
 class RootCompoundTag(Path):
     def __init__(self, root: dict[str, NBT] | None = None):
-        super().__init__(str(root) or "{}") # TODO proper parsing of dicts
+        self._link(None, str(root) if root else "{}") # TODO proper parsing of dicts
 
-class NamedTag(Path):
+class NamedTag(Path, Generic[_T]):
     def __init__(self, root: str):
         super().__init__(root)
 
     def __call__(self, item: dict[str, NBT] | None = None) -> NamedCompoundTag:
-        tag = NamedCompoundTag("")
-        tag._components = self._components + [str(item)]
-        return tag
-
-    @singledispatch
-    def __getitem__(self, item):
-        raise NotImplementedError
-
-    @__getitem__.register
-    def __getitem__(self, item: int) -> NamedListTag:
-        tag = NamedListTag("", "")
-        tag._components = self._components + ["["+str(item)+"]"]
-        return tag
-    @__getitem__.register
-    def __getitem__(self, item: Ellipsis) -> NamedListTag:
-        tag = NamedListTag("", "")
-        tag._components = self._components + ["[]"]
-        return tag
-    @__getitem__.register
-    def __getitem__(self, item: dict) -> NamedCompoundTag:
-        tag = NamedCompoundTag("")
-        tag._components = self._components + ["["+str(item)+"]"]
-        return tag
-    @__getitem__.register
-    def __getitem__(self, item: str) -> NamedTag:
-        return self.__getattr__(item)
-
-class NamedCompoundTag(NamedTag, ABC):
+        return self._child(NamedCompoundTag, str(item))
+
+    def __getitem__(self, item: int | EllipsisType | dict | str) -> NamedTag:
+        if isinstance(item, str): return self.__getattr__(item)
+        if isinstance(item, dict): return self._child(NamedCompoundTag, "["+str(item)+"]")
+        return self._child(NamedListTag, "[]" if item is ... else "["+str(item)+"]")
+
+class NamedCompoundTag(NamedTag):
     # noinspection PyMissingConstructor
     def __init__(self, root: str, item: dict[str, NBT] | None = None):
-        self._components = NamedTag(root)(item)._components
+        node = NamedTag(root)(item)
+        self._link(node._parent, node._component)
 
-class NamedListTag(NamedTag, ABC):
+class NamedListTag(NamedTag):
     # noinspection PyMissingConstructor
-    def __init__(self, root: str, item: int | Ellipsis):
-        self._components = NamedTag(root)[item]._components
\ No newline at end of file
+    def __init__(self, root: str, item: int | EllipsisType):
+        node = NamedTag(root)[item]
+        self._link(node._parent, node._component)
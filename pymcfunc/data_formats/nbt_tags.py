@@ -1,243 +1,562 @@
 from __future__ import annotations
 
+import array
 import functools
-import json
-from abc import ABC
+import re
+import weakref
 from collections.abc import MutableSequence, Sequence
 # noinspection PyUnresolvedReferences
 from types import UnionType, GenericAlias
 # noinspection PyUnresolvedReferences
 from typing import Any, get_args, Type, TypeVar, Generic, _UnionGenericAlias, Union, get_origin, _LiteralGenericAlias, \
-    _GenericAlias, TYPE_CHECKING
+    _GenericAlias, TYPE_CHECKING, Iterable, TextIO
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_UNQUOTED_KEY = re.compile(r"[A-Za-z0-9_\-.+]+")
+_INTERNED: weakref.WeakValueDictionary[str, NBTTag] = weakref.WeakValueDictionary()
+_ARRAY_CHUNK = 4096
 
 
 def _numerical(min_: str | float, max_: str | float, type_: type, suffix: str=""):
+    """
+    Makes a numerical tag, which is an :py:class:`int` or :py:class:`float` of its value.
+    Numerical tags compare and hash as the numbers they hold, so ``Byte(5) == Int(5) == 5``.
+    Where the type of a tag matters, compare the types too.
+    """
     def decorator(cls):
         @functools.wraps(cls, updated=())
         class NumericalNBT(cls, type_):
+            __slots__ = ()
             val_type = type_
             min = min_
             max = max_
 
-            def __init__(self, val: type_):
+            def __new__(cls, val: type_):
+                if not isinstance(val, type_):
+                    raise TypeError(f"Value must be a(n) {type_.__name__} (Got {val})")
                 if not (min_ <= val <= max_):
                     raise ValueError(f"Value must be between {min_} and {max_}")
-                elif not isinstance(val, self.val_type):
-                    raise TypeError(f"Value must be a(n) {self.val_type.__name__} (Got {val})")
-                NBTTag.__init__(self, val)
+                return type_.__new__(cls, val)
 
             def __str__(self):
-                return str(self._val) + suffix
+                return type_.__repr__(self) + suffix
 
             @property
-            def py(self) -> val_type:
-                return self._val
+            def _val(self) -> type_:
+                return type_(self)
+            py = _val
         return NumericalNBT
     return decorator
 
-def _sequential(type_: type, prefix: str=""):
-    if prefix != "": prefix += ";"
-
+def _typed_array(typecode: str, element: type, dtype: str, prefix: str):
+    """
+    Makes an array tag whose values are kept in an :py:class:`array.array` or a NumPy array, rather than as tags.
+    Values are only wrapped in tags when they are accessed one at a time.
+    """
     def decorator(cls):
         @functools.wraps(cls, updated=())
-        class SequentialNBT(MutableSequence, cls, ABC, list):
+        class TypedArrayNBT(cls, MutableSequence):
+            __slots__ = ('_val', '_snbt', '_hash', '_parents', '__weakref__')
             val_type = list
-            content_type: type
+            content_type = element
+            _prefix = prefix
 
             # noinspection PyMissingConstructor
-            def __init__(self, val: Sequence[content_type], nbt_type: type=NBTTag):
-                self.content_type = type_
-                val = [nbt_type(v) for v in val]
-                if len(val) >= 1:
-                    if self.content_type != Any and not isinstance(val[0], self.content_type):
-                        raise TypeError(f"Value must be of type {self.content_type.__name__} (Got {val[0]})")
-                    if self.content_type == Any: self.content_type = type(val[0])
-                    for v in val:
-                        if not isinstance(v, type(val[0])):
-                            raise TypeError(f"value must be of type {type(val[0]).__name__} (Got {v})")
-
-                self._val = val
-                self.__setattr__ = _immutable_lock
-
-            def __str__(self):
-                return "[" + prefix + ",".join(str(v) for v in self._val) + "]"
-
-            def __iter__(self):
-                for v in self._val: yield v
+            def __init__(self, val: Iterable[int] | array.array = (), nbt_type: type | None = None):
+                """
+                :param val: The values. An :py:class:`array.array` with the right type code, or a NumPy array with
+                            the right dtype, is used without copying it.
+                :param nbt_type: Ignored, kept for compatibility
+                """
+                if isinstance(val, array.array) and val.typecode == typecode:
+                    values = val
+                elif numpy is not None and isinstance(val, numpy.ndarray):
+                    values = val if val.dtype == numpy.dtype(dtype) else val.astype(dtype)
+                else:
+                    try:
+                        values = array.array(typecode, (int(v) for v in val))
+                    except OverflowError:
+                        raise ValueError(f"Values must be between {element.min} and {element.max}") from None
+                object.__setattr__(self, '_val', values)
+                self._uncache()
+
+            @classmethod
+            def frombuffer(cls, buffer) -> TypedArrayNBT:
+                """
+                Creates the array from a buffer of native-endian values, without copying it if NumPy is installed.
+
+                :param buffer: The buffer, e.g. :py:class:`bytes` or a :py:class:`memoryview`
+                """
+                if numpy is not None: return cls(numpy.frombuffer(buffer, dtype=dtype))
+                values = array.array(typecode)
+                values.frombytes(buffer)
+                return cls(values)
+
+            def __reduce__(self):
+                return type(self), (self._val,)
+
+            def _render(self) -> str:
+                return "[" + prefix + ";" + ",".join(str(element(v)) for v in self.py) + "]"
+
+            def _structural_hash(self) -> int:
+                return hash((prefix, self._val.tobytes()))
 
             def __len__(self):
                 return len(self._val)
 
-            def __getitem__(self, index: int) -> content_type:
-                return self._val[index]
-
-            def __setitem__(self, index: int, val: content_type):
-                val = NBTTag(val) if not issubclass(type(val), NBTTag) else val
-                if not isinstance(val, self.content_type):
-                    raise TypeError(f"value must be of type {self.content_type.__name__} (Got {val})")
-                self._val[index] = val
+            def __iter__(self):
+                for v in self.py: yield element(v)
 
-            def __delitem__(self, index: int):
-                del self._val[index]
+            def __getitem__(self, index: int) -> element:
+                if isinstance(index, slice): return type(self)(self._val[index])
+                return element(int(self._val[index]))
 
-            def __contains__(self, item: content_type) -> bool:
-                return item in self._val
+            def __setitem__(self, index: int, val: int):
+                self._val[index] = element(int(val))
+                self._changed()
 
-            def insert(self, index: int, val: content_type):
-                if not isinstance(val, self.content_type):
-                    raise TypeError(f"value must be of type {self.content_type.__name__} (Got {val})")
-                self._val.insert(index, val)
+            def __delitem__(self, index: int):
+                if numpy is not None and isinstance(self._val, numpy.ndarray):
+                    object.__setattr__(self, '_val', numpy.delete(self._val, index))
+                else:
+                    del self._val[index]
+                self._changed()
+
+            def insert(self, index: int, val: int):
+                val = element(int(val))
+                if numpy is not None and isinstance(self._val, numpy.ndarray):
+                    object.__setattr__(self, '_val', numpy.insert(self._val, index, val))
+                else:
+                    self._val.insert(index, val)
+                self._changed()
+
+            def __eq__(self, other: Any) -> bool:
+                if isinstance(other, TypedArrayNBT): return self.py == other.py
+                return NotImplemented
+
+            __hash__ = cls.__hash__
 
             @property
-            def py(self) -> list[content_type]:
-                return [i.py for i in self._val]
-
-        return SequentialNBT
+            def py(self) -> list[int]:
+                return self._val.tolist()
+        return TypedArrayNBT
     return decorator
 
-def _immutable_lock(*_):
-    raise AttributeError("Value is immutable")
-
 
 class NBT:
+    __slots__ = ()
+
     @property
     def py(self) -> Any: return None
 
 class NBTTag(NBT):
+    __slots__ = ()
     val_type: type
-    def __new__(cls, val: val_type, *args, **kwargs):
-        if cls != NBTTag: return super().__new__(cls)
-        if isinstance(val, bool):
-            return Boolean.__new__(Boolean, val, *args, **kwargs)
+    def __new__(cls, val: val_type = None, *args, **kwargs):
+        if cls is not NBTTag: return super().__new__(cls)
+        if isinstance(val, NBTTag):
+            return val
+        elif isinstance(val, bool):
+            return Boolean(val)
         elif isinstance(val, int):
-            if Int.min <= val <= Int.max:
-                # noinspection PyArgumentList
-                return Int.__new__(Int, val, *args, **kwargs)
-            else:
-                # noinspection PyArgumentList
-                return Long.__new__(Long, val, *args, **kwargs)
+            return Int(val) if Int.min <= val <= Int.max else Long(val)
         elif isinstance(val, float):
-            # noinspection PyArgumentList
-            return Double.__new__(Double, val, *args, **kwargs)
+            return Double(val)
         elif isinstance(val, list):
-            # noinspection PyArgumentList
-            return List.__new__(List, val, *args, **kwargs)
+            return List(val)
         elif isinstance(val, dict):
-            return Compound.__new__(Compound, val, *args, **kwargs)
+            return Compound(val)
         elif isinstance(val, str) or hasattr(val, '__str__'):
-            return String.__new__(String, str(val), *args, **kwargs)
+            return String(str(val))
         raise TypeError(f"Type {type(val).__name__} not supported as NBTTag value (Got {val})")
 
-    def __init__(self, val: val_type):
-        if not isinstance(val, self.val_type):
-            raise TypeError(f"value must be of type {self.val_type.__name__} (Got {val})")
-        self._val = val
-
-        self.__setattr__ = _immutable_lock
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError("Value is immutable")
 
     def __repr__(self):
         return type(self).__name__+"("+str(self)+")"
 
-    @property
-    def py(self) -> val_type:
-        return self._val
+    def write_snbt(self, fp: TextIO, indent: int | str | None = None):
+        """
+        Writes the tag as SNBT to a text stream a piece at a time, without building the whole string.
+        Nesting is tracked with a stack rather than recursion, so deeply nested tags can be written too.
+
+        :param fp: The text stream, e.g. an open file
+        :param indent: If given, the SNBT is pretty-printed with each entry on its own line, indented by this many spaces
+                       or this string per level. Otherwise it is as compact as ``str(tag)``.
+        """
+        _write_snbt(fp, self, " " * indent if isinstance(indent, int) else indent)
+
+class _CachedNBT(NBTTag):
+    """
+    A mutable tag that caches its SNBT and structural hash. Changing the tag clears both caches,
+    along with those of the cached tags that contain it.
+
+    The caches are only kept up to date by changes made through the tag's methods,
+    not by changes made to the underlying :py:class:`array.array` or NumPy array of an array tag.
+    """
+    __slots__ = ()
+
+    def _render(self) -> str: raise NotImplementedError
+    def _structural_hash(self) -> int: raise NotImplementedError
+    def _children(self) -> Iterable[Any]: return ()
+
+    def _uncache(self):
+        object.__setattr__(self, '_snbt', None)
+        object.__setattr__(self, '_hash', None)
+        object.__setattr__(self, '_parents', None)
+
+    def _link_children(self):
+        # a tag only caches after its children have, so a child only needs to know its parents once they cache
+        for child in self._children():
+            if isinstance(child, _CachedNBT):
+                if child._parents is None: object.__setattr__(child, '_parents', weakref.WeakSet())
+                child._parents.add(self)
+
+    def _changed(self):
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            if tag._snbt is None and tag._hash is None: continue
+            object.__setattr__(tag, '_snbt', None)
+            object.__setattr__(tag, '_hash', None)
+            if tag._parents: stack.extend(tag._parents)
+
+    def __str__(self) -> str:
+        if self._snbt is None:
+            object.__setattr__(self, '_snbt', self._render())
+            self._link_children()
+        return self._snbt
+
+    def __hash__(self) -> int:
+        """
+        A hash of the tag's contents, consistent with its equality.
+        Changing a tag while it is in a set or used as a key leaves it unfindable, as with any mutable key.
+        """
+        if self._hash is None:
+            object.__setattr__(self, '_hash', self._structural_hash())
+            self._link_children()
+        return self._hash
+
+    def intern(self) -> NBTTag:
+        """
+        Returns the first tag interned with the same SNBT as this one, or this tag if there is none,
+        so that identical payloads share one object and one rendered string.
+        Interned tags are shared, so they shouldn't be changed afterwards.
+        """
+        return _INTERNED.setdefault(str(self), self)
 
 @_numerical(-128, 127, int, "b")
-class Byte(NBTTag): pass
+class Byte(NBTTag): __slots__ = ()
 
 @_numerical(-32768, 32767, int, "s")
-class Short(NBTTag): pass
+class Short(NBTTag): __slots__ = ()
 
 @_numerical(-2_147_483_648, 2_147_483_647, int)
-class Int(NBTTag): pass
+class Int(NBTTag): __slots__ = ()
 
 @_numerical(-9_223_372_036_854_775_808, 9_223_372_036_854_775_807, int, "L")
-class Long(NBTTag): pass
+class Long(NBTTag): __slots__ = ()
 
 @_numerical(-3.4e38, 3.4e38, float, "f")
-class Float(NBTTag): pass
+class Float(NBTTag): __slots__ = ()
 
 @_numerical(-1.7e308, 1.7e308, float)
-class Double(NBTTag): pass
+class Double(NBTTag): __slots__ = ()
 
 class String(NBTTag, str):
+    __slots__ = ()
     val_type = str
+
+    def __new__(cls, val: str):
+        if not isinstance(val, str):
+            raise TypeError(f"value must be of type str (Got {val})")
+        return str.__new__(cls, val)
+
     def __str__(self):
-        return json.dumps(self._val)
+        return _quote(str.__str__(self))
+
+    @property
+    def _val(self) -> str:
+        return str.__str__(self)
+    py = _val
 
 _T = TypeVar('_T')
-@_sequential(_T)
-class List(NBTTag, Generic[_T]): pass
+class List(_CachedNBT, list, Generic[_T]):
+    """A list of tags of the same type, kept as a :py:class:`list` of the tags."""
+    __slots__ = ('content_type', '_snbt', '_hash', '_parents', '__weakref__')
+    val_type = list
+
+    def __new__(cls, *args, **kwargs):
+        self = list.__new__(cls)
+        self._uncache()
+        return self
+
+    # noinspection PyMissingConstructor
+    def __init__(self, val: Sequence[Any] = (), nbt_type: type = NBTTag):
+        """
+        :param val: The values
+        :param nbt_type: The type to convert each value with
+        """
+        values = [nbt_type(v) for v in val]
+        content_type = type(values[0]) if values else Any
+        for v in values:
+            if not isinstance(v, content_type):
+                raise TypeError(f"value must be of type {content_type.__name__} (Got {v})")
+        object.__setattr__(self, 'content_type', content_type)
+        list.__init__(self, values)
+
+    def _check(self, val: Any) -> NBTTag:
+        val = NBTTag(val)
+        if self.content_type is Any:
+            object.__setattr__(self, 'content_type', type(val))
+        elif not isinstance(val, self.content_type):
+            raise TypeError(f"value must be of type {self.content_type.__name__} (Got {val})")
+        return val
+
+    def __reduce__(self):
+        return List, (list(self),)
+
+    def _render(self) -> str:
+        return "[" + ",".join(str(v) for v in self) + "]"
+
+    def _structural_hash(self) -> int:
+        return hash(tuple(hash(v) for v in self))
+
+    def _children(self) -> Iterable[Any]:
+        return self
+
+    def __setitem__(self, index: int, val: _T):
+        if isinstance(index, slice): list.__setitem__(self, index, [self._check(v) for v in val])
+        else: list.__setitem__(self, index, self._check(val))
+        self._changed()
+
+    def __delitem__(self, index: int):
+        list.__delitem__(self, index)
+        self._changed()
+
+    def append(self, val: _T):
+        list.append(self, self._check(val))
+        self._changed()
+
+    def insert(self, index: int, val: _T):
+        list.insert(self, index, self._check(val))
+        self._changed()
+
+    def extend(self, values: Iterable[_T]):
+        list.extend(self, [self._check(v) for v in values])
+        self._changed()
+
+    def __iadd__(self, values: Iterable[_T]):
+        self.extend(values)
+        return self
+
+    def __imul__(self, times: int):
+        list.__imul__(self, times)
+        self._changed()
+        return self
+
+    def pop(self, index: int = -1) -> _T:
+        val = list.pop(self, index)
+        self._changed()
+        return val
+
+    def remove(self, val: _T):
+        list.remove(self, val)
+        self._changed()
+
+    def clear(self):
+        list.clear(self)
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        list.reverse(self)
+        self._changed()
+
+    @property
+    def _val(self) -> list[_T]:
+        return self
+
+    @property
+    def py(self) -> list[Any]:
+        return [i.py for i in self]
 
-@_sequential(Byte, "B")
-class ByteArray(NBTTag): pass
+@_typed_array("b", Byte, "int8", "B")
+class ByteArray(_CachedNBT): __slots__ = ()
 
-@_sequential(Int, "I")
-class IntArray(NBTTag): pass
+@_typed_array("i", Int, "int32", "I")
+class IntArray(_CachedNBT): __slots__ = ()
 
-@_sequential(Long, "L")
-class LongArray(NBTTag): pass
+@_typed_array("q", Long, "int64", "L")
+class LongArray(_CachedNBT): __slots__ = ()
 
 class Boolean(NBTTag):
+    __slots__ = ('_val',)
     val_type = bool
+
+    def __init__(self, val: bool):
+        if not isinstance(val, bool):
+            raise TypeError(f"value must be of type bool (Got {val})")
+        object.__setattr__(self, '_val', val)
+
+    def __reduce__(self):
+        return Boolean, (self._val,)
+
     def __str__(self):
         return "true" if self._val else "false"
 
+    def __eq__(self, other: Any) -> bool:
+        return self._val == (other._val if isinstance(other, Boolean) else other)
+
+    def __hash__(self) -> int:
+        return hash(self._val)
+
     @property
     def py(self) -> val_type:
         # noinspection PyTypeChecker
         return self._val
 
-class Compound(NBTTag, dict):
+class Compound(_CachedNBT, dict):
+    """A compound tag, kept as a :py:class:`dict` of tags. Its entries can also be accessed as attributes."""
+    __slots__ = ('_snbt', '_hash', '_parents', '__weakref__')
     val_type = dict
 
+    def __new__(cls, *args, **kwargs):
+        self = dict.__new__(cls)
+        self._uncache()
+        return self
+
     # noinspection PyMissingConstructor
-    def __init__(self, val: dict[str, Any]):
-        from pymcfunc.data_formats.base_formats import NBTFormat
-        self._val = {str(k): (v if isinstance(v, NBTTag)
-                              else v.as_nbt() if isinstance(v, NBTFormat)
-                              else NBTTag(v)) for k, v in val.items()}
+    def __init__(self, val: dict[str, Any] | None = None):
+        dict.__init__(self, {str(k): _to_tag(v) for k, v in (val or {}).items()})
 
-        def _immutable_lock2(self2, key: str, value: Any):
-            value = NBTTag(value) if not issubclass(type(value), NBTTag) else value
-            if key == "_val": _immutable_lock()
-            self2._val[key] = value
+    def __reduce__(self):
+        return type(self), (dict(self),)
 
-        self.__setitem__ = self.__setattr__ = _immutable_lock2
+    def __setitem__(self, key: str, value: Any):
+        dict.__setitem__(self, str(key), _to_tag(value))
+        self._changed()
 
-    def __iter__(self):
-        for i in self._val: yield i
+    __setattr__ = __setitem__
+
+    def __delitem__(self, key: str):
+        dict.__delitem__(self, key)
+        self._changed()
 
     def __getattr__(self, item: str) -> Any:
-        return self._val[item]
-    __getitem__ = __getattr__
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item) from None
 
     def __delattr__(self, key: str):
-        if key == "_val": _immutable_lock()
-        del self._val[key]
-    __delitem__ = __delattr__
+        del self[key]
 
-    def __contains__(self, item: str) -> bool:
-        return item in self._val
+    def update(self, *args, **kwargs):
+        dict.update(self, {str(k): _to_tag(v) for k, v in dict(*args, **kwargs).items()})
+        self._changed()
 
-    def __len__(self) -> int:
-        return len(self._val)
+    def __ior__(self, other: dict[str, Any]):
+        self.update(other)
+        return self
 
-    def keys(self):
-        return self._val.keys()
+    def pop(self, key: str, *default: Any) -> Any:
+        val = dict.pop(self, key, *default)
+        self._changed()
+        return val
 
-    def values(self):
-        return self._val.values()
+    def popitem(self) -> tuple[str, NBTTag]:
+        item = dict.popitem(self)
+        self._changed()
+        return item
 
-    def items(self):
-        return self._val.items()
+    def clear(self):
+        dict.clear(self)
+        self._changed()
 
-    def __str__(self) -> str:
-        return "{"+",".join(k+":"+str(v) for k, v in self.items())+"}"
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self: self[key] = default
+        return self[key]
+
+    @property
+    def _val(self) -> dict[str, NBTTag]:
+        return self
+
+    def _render(self) -> str:
+        return "{"+",".join(_snbt_key(k)+":"+str(v) for k, v in self.items())+"}"
+
+    def _structural_hash(self) -> int:
+        return hash(frozenset((k, hash(v)) for k, v in self.items()))
+
+    def _children(self) -> Iterable[Any]:
+        return self.values()
 
     @property
     def py(self) -> dict[str, Any]:
-        return {k: v.py for k, v in self._val}
+        return {k: v.py for k, v in self.items()}
+
+def _quote(string: str) -> str:
+    # as Minecraft writes strings: only backslashes and double quotes are escaped, and other characters are kept
+    return '"' + string.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _snbt_key(key: str) -> str:
+    return key if _UNQUOTED_KEY.fullmatch(key) else _quote(key)
+
+def _write_array(write, tag: NBTTag):
+    """Writes a typed array a chunk of values at a time."""
+    write("[" + tag._prefix + ";")
+    for start in range(0, len(tag), _ARRAY_CHUNK):
+        if start: write(",")
+        write(",".join(map(str, map(tag.content_type, tag._val[start:start + _ARRAY_CHUNK].tolist()))))
+    write("]")
+
+def _write_snbt(fp: TextIO, tag: NBTTag, indent: str | None):
+    write = fp.write
+    colon = ":" if indent is None else ": "
+    stack: list[list] = []  # [entries left, closing bracket, whether they are compound entries, whether any are written]
+    while True:
+        if isinstance(tag, (Compound, List)) and len(tag) and (indent is not None or tag._snbt is None):
+            compound = isinstance(tag, Compound)
+            write("{" if compound else "[")
+            stack.append([iter(tag.items() if compound else tag), "}" if compound else "]", compound, False])
+        elif isinstance(tag, (ByteArray, IntArray, LongArray)) and tag._snbt is None:
+            _write_array(write, tag)
+        else:
+            write(str(tag))
+
+        while stack:
+            entries, closing, compound, started = frame = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                if indent is not None: write("\n" + indent * len(stack))
+                write(closing)
+                continue
+            if started: write(",")
+            frame[3] = True
+            if indent is not None: write("\n" + indent * len(stack))
+            if compound:
+                key, tag = entry
+                write(_snbt_key(key) + colon)
+            else:
+                tag = entry
+            break
+        else:
+            return
+
+def _to_tag(value: Any) -> NBTTag:
+    from pymcfunc.data_formats.base_formats import NBTFormat
+    if isinstance(value, NBTTag): return value
+    if isinstance(value, NBTFormat): return value.as_nbt()
+    return NBTTag(value)
 
 _I = TypeVar('_I')
 class CompoundReprAsList(Generic[_I]): pass
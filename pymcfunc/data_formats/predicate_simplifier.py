@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+from pymcfunc.data_formats.base_formats import JsonFormat
+from pymcfunc.data_formats.predicates import Predicate, AlternativePredicate, InvertedPredicate, \
+    KilledByPlayerPredicate, RandomChancePredicate, WeatherCheckPredicate, ValueCheckPredicate
+
+PREDICATE_COSTS: dict[str, int] = {
+    'random_chance': 1,  # one random number
+    'killed_by_player': 1,  # whether the loot context has a player who killed the entity
+    'survives_explosion': 1,  # one random number, if there was an explosion
+    'weather_check': 1,  # two flags of the level
+    'time_check': 1,  # the day time of the level
+    'random_chance_with_looting': 2,  # one random number and the looting level of the killer
+    'value_check': 2,  # a number provider and a range
+    'table_bonus': 2,  # the enchantment level of the tool
+    'entity_scores': 2,  # plus one per score, each a scoreboard lookup
+    'block_state_property': 3,  # the properties of the block state
+    'damage_source_properties': 5,  # a damage source predicate, which can check the entities involved
+    'match_tool': 5,  # an item predicate, which can check enchantments
+    'entity_properties': 8,  # an entity predicate, which can check equipment, effects, passengers and location
+    'location_check': 10,  # can look up blocks, fluids, lights, biomes and structures
+    'reference': 10,  # another predicate, whose cost isn't known here
+}
+"""
+The rough relative cost of checking each kind of predicate, by condition.
+Predicates that check NBT cost :py:data:`NBT_COST` more, as the NBT of the entity, block or item has to be written
+out to compare it. Predicates of other kinds cost :py:data:`DEFAULT_COST`.
+"""
+NBT_COST = 10
+DEFAULT_COST = 10
+
+_AND, _OR, _NOT = "and", "or", "not"
+# a predicate in negation normal form: a predicate, True, False, (_NOT, predicate), or (_AND | _OR, [terms])
+_Expr = Union[Predicate, bool, tuple]
+
+
+def predicate_cost(predicate: Predicate) -> int:
+    """
+    Gives the rough cost of checking a predicate, from :py:data:`PREDICATE_COSTS`.
+    Alternatives and inversions cost as much as all of their terms, which is what they cost when no term short-circuits.
+
+    :param Predicate predicate: The predicate
+    """
+    if isinstance(predicate, AlternativePredicate): return sum(predicate_cost(t) for t in predicate.terms)
+    if isinstance(predicate, InvertedPredicate): return predicate_cost(predicate.term)
+    data = predicate.as_json() if isinstance(predicate, JsonFormat) else predicate
+    condition = data.get('condition', "") if isinstance(data, dict) else ""
+    cost = PREDICATE_COSTS.get(condition.removeprefix("minecraft:"), DEFAULT_COST)
+    if condition.removeprefix("minecraft:") == 'entity_scores': cost += len(data.get('scores', {}))
+    if _mentions_nbt(data): cost += NBT_COST
+    return cost
+
+def simplify_predicate(predicate: Predicate) -> Predicate:
+    """
+    Gives a predicate that passes whenever the given one does, simplified so that it is cheaper to check.
+
+    Inversions are pushed down to the terms they invert, nested alternatives and conjunctions are flattened,
+    duplicate terms are removed, and terms that always pass or fail are folded away, along with alternatives that
+    contain both a term and its inversion. The terms of every alternative and conjunction are then ordered from cheapest
+    to most expensive by :py:func:`predicate_cost`, so that Minecraft, which stops at the first term that decides
+    the result, usually checks the cheap terms only. A conjunction is written as an inverted alternative of
+    inverted terms, since predicates have no conjunction of their own.
+
+    A predicate that always passes is simplified into an inverted empty alternative,
+    and one that never passes into an empty alternative.
+
+    :param Predicate predicate: The predicate
+    """
+    return _predicate(_simplify(_expr(predicate)))
+
+def simplify_conditions(conditions: list[Predicate]) -> list[Predicate]:
+    """
+    Simplifies a list of conditions that all have to pass, e.g. the conditions of a loot pool,
+    as :py:func:`simplify_predicate` does. Conjunctions inside the conditions are flattened into the list.
+    Conditions that always pass give an empty list, and conditions that never pass give a list of an empty alternative.
+
+    :param conditions: The conditions
+    """
+    expr = _simplify((_AND, [_expr(c) for c in conditions]))
+    if expr is True: return []
+    if isinstance(expr, tuple) and expr[0] == _AND: return [_predicate(t) for t in expr[1]]
+    return [_predicate(expr)]
+
+def _mentions_nbt(data: Any) -> bool:
+    if isinstance(data, dict): return 'nbt' in data or any(_mentions_nbt(v) for v in data.values())
+    if isinstance(data, list): return any(_mentions_nbt(v) for v in data)
+    return False
+
+def _constant(predicate: Predicate) -> bool | None:
+    """Gives whether a predicate always passes or always fails, or None if it depends on the game."""
+    if isinstance(predicate, RandomChancePredicate) and isinstance(predicate.chance, (int, float)):
+        return True if predicate.chance >= 1 else False if predicate.chance <= 0 else None
+    if isinstance(predicate, WeatherCheckPredicate) and predicate.raining is None and predicate.thundering is None:
+        return True
+    if isinstance(predicate, ValueCheckPredicate) and type(predicate.value) is int and type(predicate.range) is int:
+        return predicate.value == predicate.range
+    return None
+
+def _expr(predicate: Predicate, negated: bool = False) -> _Expr:
+    """Converts a predicate into negation normal form, pushing every inversion down to a single term."""
+    if isinstance(predicate, InvertedPredicate): return _expr(predicate.term, not negated)
+    if isinstance(predicate, AlternativePredicate):
+        return _AND if negated else _OR, [_expr(t, negated) for t in predicate.terms]
+    constant = _constant(predicate)
+    if constant is not None: return constant != negated
+    return _negate(predicate) if negated else predicate
+
+def _negate(expr: _Expr) -> _Expr:
+    if isinstance(expr, bool): return not expr
+    if isinstance(expr, tuple):
+        kind, value = expr
+        if kind == _NOT: return value
+        return _AND if kind == _OR else _OR, [_negate(t) for t in value]
+    if isinstance(expr, KilledByPlayerPredicate): return KilledByPlayerPredicate(inverse=not expr.inverse)
+    return _NOT, expr
+
+def _key(expr: _Expr) -> str:
+    if isinstance(expr, tuple):
+        kind, value = expr
+        if kind == _NOT: return "!" + _key(value)
+        return kind + "(" + ",".join(_key(t) for t in value) + ")"
+    return json.dumps(expr.as_json() if isinstance(expr, JsonFormat) else expr, sort_keys=True)
+
+def _cost(expr: _Expr) -> int:
+    if isinstance(expr, bool): return 0
+    if isinstance(expr, tuple):
+        kind, value = expr
+        return _cost(value) if kind == _NOT else sum(_cost(t) for t in value)
+    return predicate_cost(expr)
+
+def _simplify(expr: _Expr) -> _Expr:
+    if not isinstance(expr, tuple) or expr[0] == _NOT: return expr
+    kind, terms = expr
+    # True decides an alternative, and False a conjunction
+    deciding = kind == _OR
+    result, keys = [], set()
+    for term in terms:
+        term = _simplify(term)
+        for t in term[1] if isinstance(term, tuple) and term[0] == kind else [term]:
+            if t is deciding: return deciding
+            if t is (not deciding): continue
+            key = _key(t)
+            if key in keys: continue
+            if (key[1:] if key.startswith("!") else "!" + key) in keys: return deciding
+            keys.add(key)
+            result.append(t)
+    if not result: return not deciding
+    if len(result) == 1: return result[0]
+    result.sort(key=_cost)
+    return kind, result
+
+def _predicate(expr: _Expr) -> Predicate:
+    if isinstance(expr, bool):
+        empty = AlternativePredicate(terms=[])
+        return InvertedPredicate(term=empty) if expr else empty
+    if isinstance(expr, tuple):
+        kind, value = expr
+        if kind == _NOT: return InvertedPredicate(term=value)
+        if kind == _OR: return AlternativePredicate(terms=[_predicate(t) for t in value])
+        return InvertedPredicate(term=AlternativePredicate(terms=[_predicate(_negate(t)) for t in value]))
+    return expr
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from typing import Literal, Union, Optional
+from typing import Literal, Union, Optional, Any, ClassVar
 
 from attr import define
 
 from pymcfunc.command import ResourceLocation
 from pymcfunc.data_formats.base_formats import JsonFormat
-from pymcfunc.data_formats.json_formats import DamageJson, IntRangeJson, NumberProviderRangeJson, LocationJson, ItemJson
+from pymcfunc.data_formats.json_formats import DamageJson, EntityJson, IntRangeJson, NumberProviderRangeJson, LocationJson, ItemJson
 from pymcfunc.data_formats.number_providers import NumberProvider
 from pymcfunc.internal import base_class
 
@@ -15,6 +15,8 @@ from pymcfunc.internal import base_class
 @base_class
 class Predicate(JsonFormat):
     condition: str = property(lambda self: "")
+    namespaced: ClassVar[str | None] = None
+    """The namespaced name of the predicate's file, given to the predicates of a pack when it is built"""
 
     JSON_FORMAT = {
         "condition": str
@@ -58,12 +60,12 @@ class DamageSourcePropertiesPredicate(Predicate):
 class EntityPropertiesPredicate(Predicate):
     condition = property(lambda self: "entity_properties")
     entity: Literal["this", "killer", "killer_player"]
-    predicate: DamageJson
+    predicate: EntityJson
 
     JSON_FORMAT = {
         **Predicate.JSON_FORMAT,
         "entity": Literal["this", "killer", "killer_player"],
-        "predicate": DamageJson
+        "predicate": EntityJson
     }
 
 @define(kw_only=True, init=True)
@@ -151,11 +153,26 @@ class ReferencePredicate(Predicate):
     condition = property(lambda self: "reference")
     reference: ResourceLocation | Predicate
 
+    @property
+    def name(self) -> str:
+        """The namespaced name of the referenced predicate."""
+        if isinstance(self.reference, str): return self.reference
+        if self.reference.namespaced is None:
+            raise ValueError(f"The referenced predicate has no name, as it isn't a predicate of a pack that has been built "
+                             f"(got {self.reference})")
+        return self.reference.namespaced
+
     JSON_FORMAT = {
         **Predicate.JSON_FORMAT,
-        "reference": str
+        "name": str
     }
 
+    @classmethod
+    def from_json(cls, data: dict[str, Any], **kwargs) -> ReferencePredicate:
+        """Creates a reference from its JSON, which names the predicate with ``name``."""
+        kwargs.setdefault('reference', data.get('name', ""))
+        return super().from_json(data, **kwargs)
+
 @define(kw_only=True, init=True)
 class SurvivesExplosionPredicate(Predicate):
     condition = property(lambda self: "survives_explosion")
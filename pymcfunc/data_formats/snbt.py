@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import array
+import re
+from functools import lru_cache
+
+from pymcfunc.data_formats.nbt_tags import NBTTag, Byte, Short, Int, Long, Float, Double, String, List, ByteArray, \
+    IntArray, LongArray, Boolean, Compound
+
+# one token per match: a typed array, a bracket or separator, a quoted string, an unquoted word, or anything else
+_TOKEN = re.compile(r"""\s*(?:\[\s*([BIL])\s*;([^\]]*)]|([{}\[\],:])|("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|([A-Za-z0-9_\-.+]+)|(\S))""",
+                    re.S)
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_INTEGER = re.compile(r"([-+]?(?:0|[1-9][0-9]*))([bBsSlL]?)")
+_DECIMAL = re.compile(r"([-+]?(?:[0-9]+\.?|[0-9]*\.[0-9]+)(?:[eE][-+]?[0-9]+)?)([fFdD]?)")
+
+_INTEGER_TAGS = {'': Int, 'b': Byte, 's': Short, 'l': Long}
+_ARRAYS = {'B': ("b", ByteArray, Byte), 'I': ("i", IntArray, Int), 'L': ("q", LongArray, Long)}
+
+
+def _error(text: str, index: int, message: str) -> ValueError:
+    """Makes an error for a token, finding where it is only now, as tokens don't keep their positions."""
+    pos = len(text)
+    for i, match in enumerate(_TOKEN.finditer(text)):
+        if i == index:
+            pos = match.start(match.lastindex)
+            break
+    return ValueError(f"{message} at position {pos} of SNBT (near `{text[max(pos - 10, 0):pos + 10]}`)")
+
+def _unescape(string: str) -> str:
+    string = string[1:-1]
+    return _ESCAPE.sub(r"\1", string) if "\\" in string else string
+
+@lru_cache(maxsize=4096)
+def _scalar(word: str) -> NBTTag:
+    """Converts an unquoted word into a number, boolean or string tag, as Minecraft does."""
+    if word == "true" or word == "false": return Boolean(word == "true")
+    match = _INTEGER.fullmatch(word)
+    if match is not None:
+        tag = _INTEGER_TAGS[match.group(2).lower()]
+        value = int(match.group(1))
+        return tag(value) if tag.min <= value <= tag.max else String(word)
+    match = _DECIMAL.fullmatch(word)
+    # decimals without a suffix need a point, so e.g. 1e5 and 01 are strings
+    if match is not None and (match.group(2) or "." in match.group(1)):
+        return (Float if match.group(2).lower() == "f" else Double)(float(match.group(1)))
+    return String(word)
+
+def _typed_array(kind: str, body: str) -> NBTTag:
+    """Reads the contents of a typed array straight into an :py:class:`array.array`."""
+    code, tag, _ = _ARRAYS[kind]
+    words = [word.strip().rstrip("bBlL") for word in body.split(",")] if body.strip() else []
+    if kind == "B": words = ["1" if word == "true" else "0" if word == "false" else word for word in words]
+    return tag(array.array(code, map(int, words)))
+
+def _key(text: str, tokens: list[tuple[str, ...]], i: int) -> tuple[str, int]:
+    _, _, _, string, word, _ = tokens[i]
+    if not (string or word) or tokens[i + 1][2] != ":": raise _error(text, i, "Expected a key")
+    return (word or _unescape(string)), i + 2
+
+def parse_snbt(text: str) -> NBTTag:
+    """
+    Parses SNBT into tags in a single pass.
+
+    The text is split into tokens by one regular expression, and nesting is tracked with a stack instead of recursion,
+    so deeply nested input can't exceed the recursion limit.
+    Typed arrays (``[B;...]``, ``[I;...]`` and ``[L;...]``) are read straight into an :py:class:`array.array`.
+    Unquoted words are converted as Minecraft does, so integers out of range for their type become strings.
+
+    :param str text: The SNBT
+    :raises ValueError: If the SNBT is invalid
+    """
+    tokens = _TOKEN.findall(text)
+    tokens += [("", "", "", "", "", "")] * 2
+    stack: list[tuple[dict | list, list[str | None]]] = []
+    i = 0
+    while True:
+        kind, body, bracket, string, word, _ = tokens[i]
+        i += 1
+        if word:
+            value = _scalar(word)
+        elif string:
+            value = String(_unescape(string))
+        elif kind:
+            try:
+                value = _typed_array(kind, body)
+            except (ValueError, OverflowError):
+                raise _error(text, i - 1, f"Invalid {_ARRAYS[kind][1].__name__}") from None
+        elif bracket == "{":
+            if tokens[i][2] == "}":
+                i, value = i + 1, Compound({})
+            else:
+                key, i = _key(text, tokens, i)
+                stack.append(({}, [key]))
+                continue
+        elif bracket == "[":
+            if tokens[i][2] == "]":
+                i, value = i + 1, List([])
+            else:
+                stack.append(([], [None]))
+                continue
+        else:
+            raise _error(text, i - 1, "Expected a value")
+
+        while True:
+            if not stack:
+                if i < len(tokens) - 2: raise _error(text, i, "Unexpected text after the end")
+                return value
+            values, key = stack[-1]
+            if key[0] is None: values.append(value)
+            else: values[key[0]] = value
+            char = tokens[i][2]
+            i += 1
+            if char == ",":
+                if key[0] is not None: key[0], i = _key(text, tokens, i)
+                break
+            if char != ("]" if key[0] is None else "}"):
+                raise _error(text, i - 1, "Expected `,` or the end of a compound or list")
+            stack.pop()
+            try:
+                value = List(values, nbt_type=lambda v: v) if key[0] is None else Compound(values)
+            except TypeError as e:
+                raise _error(text, i - 1, str(e)) from None
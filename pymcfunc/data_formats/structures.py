@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import gzip
+import io
+import re
+from typing import Iterator, Sequence
+
+from pymcfunc.data_formats.nbt_binary import _Writer
+from pymcfunc.data_formats.nbt_tags import Compound, Int, List, String
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAX_SIZE = 48
+DATA_VERSION = 3120
+
+_BLOCK_STATE = re.compile(r"([^\[]+)(?:\[(.*)])?")
+
+
+def block_state(state: str) -> Compound:
+    """
+    Converts a block state, e.g. ``minecraft:oak_log[axis=y]``, into an entry of a structure template's palette.
+
+    :param str state: The block state
+    """
+    match = _BLOCK_STATE.fullmatch(state.strip())
+    if match is None: raise ValueError(f"Invalid block state `{state}`")
+    name, properties = match.groups()
+    name = name if ":" in name else f"minecraft:{name}"
+    entry = {'Name': String(name)}
+    if properties:
+        entry['Properties'] = Compound({k.strip(): String(v.strip()) for k, v in
+                                        (p.split("=", 1) for p in properties.split(","))})
+    return Compound(entry)
+
+def _block_records(states, positions) -> bytes:
+    """Encodes the ``blocks`` entries of a template, which all have the same layout, in one go."""
+    record = numpy.dtype([
+        ('state_head', 'S8'), ('state', '>i4'),
+        ('pos_head', 'S11'), ('x', '>i4'), ('y', '>i4'), ('z', '>i4'),
+        ('end', 'S1')
+    ])
+    records = numpy.zeros(len(states), dtype=record)
+    records['state_head'] = b"\x03\x00\x05state"
+    records['state'] = states
+    records['pos_head'] = b"\x09\x00\x03pos\x03\x00\x00\x00\x03"
+    records['x'], records['y'], records['z'] = positions.T
+    return records.tobytes()
+
+def encode_template(blocks, palette: Sequence[str], block_entities: dict[tuple[int, int, int], Compound] | None = None,
+                    data_version: int = DATA_VERSION) -> bytes:
+    """
+    Encodes a structure template as gzipped NBT.
+    The blocks are encoded as one NumPy record array rather than tag by tag, so large templates encode quickly.
+
+    :param blocks: A 3D NumPy array of indices into ``palette``, indexed by x, y and z.
+                   Negative indices are left out of the template, so the blocks already there are kept.
+    :param palette: The block states that the indices refer to, see :py:func:`block_state`
+    :param block_entities: The block entity NBT of blocks, by their position in the template
+    :param int data_version: The data version of the template
+    """
+    if numpy is None: raise ImportError("Structure templates require NumPy")
+    block_entities = block_entities or {}
+    blocks = numpy.asarray(blocks)
+    positions = numpy.argwhere(blocks >= 0)
+    used, states = numpy.unique(blocks[blocks >= 0], return_inverse=True)
+    with_nbt = numpy.zeros(len(positions), dtype=bool)
+    if block_entities:
+        wanted = set(block_entities)
+        with_nbt = numpy.fromiter((tuple(p) in wanted for p in positions.tolist()), dtype=bool, count=len(positions))
+
+    out = io.BytesIO()
+    writer = _Writer(out, False)
+    writer.write(b"\x0a")
+    writer.string("")
+    for name, tag in (('DataVersion', Int(data_version)),
+                      ('size', List([Int(int(s)) for s in blocks.shape], nbt_type=lambda v: v)),
+                      ('palette', List([block_state(palette[i]) for i in used.tolist()], nbt_type=lambda v: v)),
+                      ('entities', List([]))):
+        writer.write(bytes((9 if isinstance(tag, List) else 3,)))
+        writer.string(name)
+        writer.payload(9 if isinstance(tag, List) else 3, tag)
+    writer.write(b"\x09")
+    writer.string("blocks")
+    writer.write(b"\x0a" + len(positions).to_bytes(4, "big", signed=True))
+    writer.write(_block_records(states[~with_nbt], positions[~with_nbt]))
+    for state, position in zip(states[with_nbt].tolist(), positions[with_nbt].tolist()):
+        writer.payload(10, Compound({
+            'state': Int(state),
+            'pos': List([Int(c) for c in position], nbt_type=lambda v: v),
+            'nbt': block_entities[tuple(position)]
+        }))
+    writer.write(b"\x00")
+    writer.flush()
+    return gzip.compress(out.getvalue(), compresslevel=6, mtime=0)
+
+def split_structure(blocks, palette: Sequence[str], origin: tuple[int, int, int],
+                    block_entities: dict[tuple[int, int, int], Compound] | None = None,
+                    data_version: int = DATA_VERSION) -> Iterator[tuple[tuple[int, int, int], bytes]]:
+    """
+    Splits a volume of blocks into structure templates of at most 48×48×48 blocks, the largest size a structure
+    block can save. Templates are aligned to a 48-block grid in the world, so that each covers whole chunks,
+    and they are ordered by chunk and then by height. Templates with no blocks in them are left out.
+
+    The palette is compacted first: block states that are listed more than once share an index,
+    and each template's palette only has the states it uses.
+
+    :param blocks: A 3D NumPy array of indices into ``palette``, indexed by x, y and z.
+                   Negative indices are left out, so the blocks already there are kept.
+    :param palette: The block states that the indices refer to, see :py:func:`block_state`
+    :param origin: The position in the world of the corner of the volume with the lowest coordinates
+    :param block_entities: The block entity NBT of blocks, by their position in the volume
+    :param int data_version: The data version of the templates
+    :return: The position in the world and gzipped NBT of every template
+    """
+    if numpy is None: raise ImportError("Structure templates require NumPy")
+    blocks = numpy.asarray(blocks)
+    if blocks.ndim != 3: raise ValueError(f"Blocks must be a 3D array (Got {blocks.ndim} dimensions)")
+    first = {}
+    canonical = numpy.array([first.setdefault(state, i) for i, state in enumerate(palette)] or [0])
+    blocks = numpy.where(blocks >= 0, canonical[numpy.clip(blocks, 0, None)], -1)
+    block_entities = block_entities or {}
+
+    bounds = []
+    for axis in range(3):
+        start, end = origin[axis], origin[axis] + blocks.shape[axis]
+        edges = [start] + list(range((start // MAX_SIZE + 1) * MAX_SIZE, end, MAX_SIZE)) + [end]
+        bounds.append(list(zip(edges, edges[1:])))
+    tiles = [(x, y, z) for x in bounds[0] for z in bounds[2] for y in bounds[1]]
+    tiles.sort(key=lambda tile: (tile[0][0] // 16, tile[2][0] // 16, tile[1][0]))
+
+    for (x0, x1), (y0, y1), (z0, z1) in tiles:
+        low = (x0 - origin[0], y0 - origin[1], z0 - origin[2])
+        tile = blocks[low[0]:x1 - origin[0], low[1]:y1 - origin[1], low[2]:z1 - origin[2]]
+        if not (tile >= 0).any(): continue
+        entities = {(x - low[0], y - low[1], z - low[2]): nbt for (x, y, z), nbt in block_entities.items()
+                    if low[0] <= x < x1 - origin[0] and low[1] <= y < y1 - origin[1] and low[2] <= z < z1 - origin[2]}
+        yield (x0, y0, z0), encode_template(tile, palette, entities, data_version)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from typing import Any, Iterable
+
+from pymcfunc.data_formats.base_formats import JsonFormat
+from pymcfunc.data_formats.item_modifiers import ItemModifier, ReferenceItemModifier
+from pymcfunc.data_formats.predicates import Predicate, ReferencePredicate
+from pymcfunc.minify import short_name
+
+_SHARED_DIRECTORY = "shared/"
+
+
+def canonical_json(obj: JsonFormat) -> str:
+    """
+    Returns the JSON of an object with sorted keys and no whitespace, so that equal objects give the same text.
+
+    :param JsonFormat obj: The object
+    """
+    return json.dumps(obj.as_json(), sort_keys=True, separators=(",", ":"))
+
+def _nested(root: JsonFormat) -> Iterator[JsonFormat]:
+    """Gives every object nested inside an object, at any depth, not including the object itself."""
+    stack: list[Any] = [root]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, JsonFormat):
+            if value is not root: yield value
+            if type(value).as_json is JsonFormat.as_json: stack.extend(v for _, v in value._json_entries())
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, Iterator)):
+            stack.extend(value)
+
+
+class SharedFiles:
+    """
+    Inline predicates and item modifiers that are repeated across a pack, moved into files of their own
+    and replaced by ``reference`` predicates and item modifiers.
+    """
+
+    def __init__(self, predicates: dict[str, Predicate], item_modifiers: dict[str, ItemModifier],
+                 references: dict[str, JsonFormat]):
+        """
+        Initialises the shared files.
+
+        :param predicates: The new predicate files, by namespaced name
+        :param item_modifiers: The new item modifier files, by namespaced name
+        :param references: The reference to write in place of each repeated object, by the object's canonical JSON
+                           (see :py:func:`canonical_json`)
+        """
+        self.predicates = predicates
+        self.item_modifiers = item_modifiers
+        self.references = references
+
+    @classmethod
+    def find(cls, namespace: str, roots: Iterable[JsonFormat], threshold: int,
+             predicates: dict[str, Predicate] | None = None,
+             item_modifiers: dict[str, ItemModifier] | None = None) -> SharedFiles:
+        """
+        Finds the predicates and item modifiers that are written inline at least ``threshold`` times
+        inside the given files, comparing them by their canonical JSON.
+
+        Each one is moved into a file in ``<namespace>:shared/``, named from the hash of its JSON
+        so that it keeps its name between builds. Objects equal to a predicate or item modifier file that the pack
+        already has reference that file instead, however often they are repeated.
+        Objects whose reference wouldn't be shorter than them are left inline.
+
+        :param str namespace: The namespace to put the new files in
+        :param roots: The files to look inside
+        :param int threshold: The number of times an object has to be repeated to be moved into a file
+        :param predicates: The predicate files that the pack already has, by namespaced name
+        :param item_modifiers: The item modifier files that the pack already has, by namespaced name
+        """
+        existing = {canonical_json(obj): name
+                    for files in (predicates or {}, item_modifiers or {}) for name, obj in files.items()}
+        taken = {name.removeprefix(namespace + ":") for files in (predicates or {}, item_modifiers or {})
+                 for name in files}
+        # only read while the roots, and so every object in them, are alive, so ids can't be reused
+        keys: dict[int, str] = {}
+        counts: dict[str, int] = {}
+        first: dict[str, Predicate | ItemModifier] = {}
+        for root in roots:
+            for obj in _nested(root):
+                if not isinstance(obj, (Predicate, ItemModifier)): continue
+                key = keys.get(id(obj))
+                if key is None: key = keys[id(obj)] = canonical_json(obj)
+                counts[key] = counts.get(key, 0) + 1
+                first.setdefault(key, obj)
+
+        new_predicates, new_item_modifiers, references = {}, {}, {}
+        for key in sorted(counts):
+            obj, name = first[key], existing.get(key)
+            if name is None and counts[key] < threshold: continue
+            new = name is None
+            if new: name = namespace + ":" + short_name(key, taken, _SHARED_DIRECTORY)
+            reference, text = _reference(obj, name)
+            if len(text) >= len(key):
+                if new: taken.discard(name.removeprefix(namespace + ":"))
+                continue
+            if new: (new_predicates if isinstance(obj, Predicate) else new_item_modifiers)[name] = obj
+            references[key] = reference
+        return cls(new_predicates, new_item_modifiers, references)
+
+    def replace(self, obj: JsonFormat) -> JsonFormat:
+        """
+        Returns the reference to write in place of an object, or the object itself if it isn't shared.
+        Objects are compared by their canonical JSON, so objects changed or created after :py:meth:`find`
+        are replaced if they are equal to a shared one.
+        To be passed to :py:meth:`JsonFormat.write_json`.
+
+        :param JsonFormat obj: The object
+        """
+        if not self.references or not isinstance(obj, (Predicate, ItemModifier)): return obj
+        return self.references.get(canonical_json(obj), obj)
+
+def _reference(obj: Predicate | ItemModifier, name: str) -> tuple[JsonFormat, str]:
+    reference = ReferencePredicate(reference=name) if isinstance(obj, Predicate) else ReferenceItemModifier(name=name)
+    return reference, canonical_json(reference)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, Callable, List, Sequence
 
 import pymcfunc.entities as entities
+from pymcfunc.data_formats.structures import DATA_VERSION, split_structure
 from pymcfunc.entities import Entity
 from pymcfunc.internal import base_class
 from pymcfunc.raw_commands import JavaRawCommands, BedrockRawCommands, ExecutedCommand
@@ -10,17 +11,35 @@ from pymcfunc.proxies.selectors import BaseSelector, JavaSelector, BedrockSelect
 from pymcfunc.variables import JavaVariable, BedrockVariable
 
 if TYPE_CHECKING:
+    from pymcfunc.data_formats.nbt_tags import Compound
     from pymcfunc.pack import JavaPack, BasePack
+    from pymcfunc.report import BuildReport
 
 class Function:
-    def __init__(self, p: BasePack, fh: BaseFunctionHandler, namespace: str, name: str):
+    def __init__(self, p: BasePack, fh: BaseFunctionHandler, namespace: str, name: str,
+                 generator: Callable[[BaseFunctionHandler], Any] | None = None):
         self.p = p
         self.fh = fh
         self.namespace = namespace
         self.name = name
+        self.generator = generator
 
     @property
     def namespaced(self) -> str: return f'{self.namespace}:{self.name}'
+    @property
+    def generated(self) -> bool: return self.generator is None
+
+    def generate(self, report: BuildReport | None = None):
+        """
+        Runs the Python function that generates this function's commands, if it hasn't been run yet.
+
+        :param report: The report to record the generator's time and memory in, if any
+        :type report: BuildReport | None
+        """
+        if self.generator is None: return
+        generator, self.generator = self.generator, None
+        if report is None: generator(self.fh)
+        else: report.generate(self.namespaced, generator, self.fh)
     def __str__(self): return self.namespaced
 
 @base_class
@@ -108,3 +127,23 @@ class JavaFunctionHandler(BaseFunctionHandler):
         :returns: The entity selector object
         :rtype: Entity"""
         return getattr(entities, entity_name)(self, target)
+
+    def place_blocks(self, name: str, blocks, palette: Sequence[str], origin: tuple[int, int, int],
+                     block_entities: dict[tuple[int, int, int], Compound] | None = None,
+                     data_version: int = DATA_VERSION):
+        """
+        Places a volume of blocks by registering it as structure templates and adding a ``place template`` command
+        for each, which is far lighter than a ``setblock`` or ``fill`` for every block.
+        See :py:func:`split_structure` for how the volume is split.
+
+        :param str name: The name of the structures, which are named ``<name>/<index>``
+        :param blocks: A 3D NumPy array of indices into ``palette``, indexed by x, y and z.
+                       Negative indices are left out, so the blocks already there are kept.
+        :param palette: The block states that the indices refer to, e.g. ``minecraft:oak_log[axis=y]``
+        :param origin: The position in the world of the corner of the volume with the lowest coordinates
+        :param block_entities: The block entity NBT of blocks, by their position in the volume
+        :param int data_version: The data version of the templates
+        """
+        for i, ((x, y, z), template) in enumerate(split_structure(blocks, palette, origin, block_entities, data_version)):
+            structure = self.p.structure(f"{name}/{i}", template)
+            self.commands.append(ExecutedCommand(self, 'place', f"place template {structure} {x} {y} {z}"))
@@ -1,7 +1,31 @@
 import functools
-from typing import Tuple, Any, Sequence, Type, Generic, TypeVar, Callable
+from typing import Tuple, Any, Sequence, Type, Generic, TypeVar, Callable, get_args, get_origin
 import pymcfunc.errors as errors
 
+def split_arguments(command: str, keep_empty: bool = False) -> list[str]:
+    """
+    Splits a command into its arguments at spaces that aren't inside brackets or quotes.
+
+    :param str command: The command
+    :param bool keep_empty: Whether to keep the empty arguments between consecutive spaces,
+                            so that joining the arguments with spaces gives back the command
+    """
+    tokens = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, c in enumerate(command):
+        if quote is not None:
+            if c == quote and command[i-1] != "\\": quote = None
+        elif c in "\"'": quote = c
+        elif c in "[{": depth += 1
+        elif c in "]}": depth -= 1
+        elif c == " " and depth == 0:
+            if keep_empty or i > start: tokens.append(command[start:i])
+            start = i+1
+    if keep_empty or start < len(command): tokens.append(command[start:])
+    return tokens
+
 def defaults(*vals: Tuple[Any, Any]):
     """(v, dv)"""
     args = ""
@@ -125,7 +149,8 @@ def _generic(t: type = Any) -> Callable[[object], object]:
         class F(f, Generic[_T]):
 
             def __class_getitem__(cls, item: Type[t]) -> _T:
-                if t != Any and not issubclass(item, t):
+                origin = get_origin(item) or item
+                if t != Any and isinstance(origin, type) and not issubclass(origin, t):
                     raise TypeError(f"{item} is not a subclass of {t}")
                 # noinspection PyUnresolvedReferences
                 return super().__class_getitem__(item)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import string
+from typing import Iterable
+
+from pymcfunc.functions import BaseFunctionHandler
+from pymcfunc.internal import split_arguments
+
+_ALPHABET = string.digits + string.ascii_lowercase
+_RESOURCE_LOCATION = re.compile(r"#?[a-z0-9_.-]+:[a-z0-9_./-]+")
+
+
+def short_name(name: str, taken: set[str], prefix: str = "") -> str:
+    """
+    Returns a short identifier derived from the hash of a name, so that it stays the same between builds.
+    The identifier is lengthened until it isn't in ``taken``, and is then added to it.
+
+    :param str name: The name to shorten
+    :param set[str] taken: The identifiers that can't be used
+    :param str prefix: A prefix for the identifier
+    """
+    number = int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
+    digits = ""
+    while True:
+        number, digit = divmod(number, len(_ALPHABET))
+        digits += _ALPHABET[digit]
+        if len(digits) >= 3 and prefix + digits not in taken: break
+    taken.add(prefix + digits)
+    return prefix + digits
+
+
+class Minifier:
+    """
+    Renames internal functions, objectives and fake players to short identifiers, and strips comments.
+
+    Objectives and fake players are only renamed where a command names one: the arguments of ``scoreboard``,
+    ``trigger``, ``execute if|unless score`` and ``execute store ... score``, the ``scores`` argument of selectors,
+    and the ``name`` and ``objective`` of score text components. Other text that happens to match is left alone.
+    """
+
+    def __init__(self, functions: dict[str, str], objectives: dict[str, str], players: dict[str, str]):
+        """
+        Initialises the minifier.
+
+        :param functions: The new namespaced name of each renamed function
+        :param objectives: The new name of each renamed objective
+        :param players: The new name of each renamed fake player
+        """
+        self.functions = functions
+        self.objectives = objectives
+        self.players = players
+
+    @classmethod
+    def rename(cls, namespace: str, functions: Iterable[str], objectives: Iterable[str], players: Iterable[str],
+               reserved: Iterable[str] = (), reserved_objectives: Iterable[str] = (),
+               reserved_players: Iterable[str] = ()) -> Minifier:
+        """
+        Chooses short identifiers for functions, objectives and fake players.
+
+        :param str namespace: The namespace to put renamed functions in
+        :param functions: The namespaced names of the functions to rename
+        :param objectives: The objectives to rename
+        :param players: The fake players to rename, which keep their first character if it is ``#`` or ``$``
+        :param reserved: Namespaced names that renamed functions can't take
+        :param reserved_objectives: Objectives that renamed objectives can't take, e.g. the ones the pack uses
+                                    but doesn't rename, see :py:meth:`score_names`
+        :param reserved_players: Players that renamed fake players can't take
+        """
+        taken = {name.removeprefix(namespace + ":") for name in reserved}
+        renamed_functions = {name: f"{namespace}:{short_name(name, taken)}" for name in sorted(functions)}
+        objectives = sorted(objectives)
+        taken = set(reserved_objectives) - set(objectives)
+        renamed_objectives = {name: short_name(name, taken) for name in objectives}
+        players = sorted(players)
+        taken = set(reserved_players) - set(players)
+        renamed_players = {name: short_name(name, taken, name[0] if name[0] in "#$" else "") for name in players}
+        return cls(renamed_functions, renamed_objectives, renamed_players)
+
+    @staticmethod
+    def score_names(commands: Iterable[str]) -> tuple[set[str], set[str]]:
+        """
+        Finds the objectives and players that commands name, in the places that a minifier renames them in.
+
+        :param commands: The commands
+        :return: The objectives, and the players
+        """
+        objectives, players = _Recorder(), _Recorder()
+        finder = Minifier({}, objectives, players)
+        for command in commands: finder.command(command)
+        return objectives.seen, players.seen
+
+    def mapping(self) -> dict[str, dict[str, str]]:
+        """Returns the new name of everything that was renamed, to be kept for debugging."""
+        return {'functions': self.functions, 'objectives': self.objectives, 'players': self.players}
+
+    def text(self, text: str) -> str:
+        """
+        Renames functions and the objectives and fake players of score text components in a piece of text,
+        e.g. a JSON file.
+
+        :param str text: The text
+        """
+        if self.functions:
+            text = _RESOURCE_LOCATION.sub(lambda m: self.functions.get(m.group(), m.group()), text)
+        if (self.objectives or self.players) and '"score"' in text:
+            text = _SCORE_COMPONENT.sub(self._score_component, text)
+        return text
+
+    def command(self, command: str) -> str:
+        """
+        Renames functions, and the objectives and fake players in the arguments of a command that name them.
+
+        :param str command: The command
+        """
+        command = self.text(command)
+        if not self.objectives and not self.players: return command
+        tokens = split_arguments(command, keep_empty=True)
+        for i, token in enumerate(tokens):
+            if token.startswith("@") and "scores=" in token:
+                tokens[i] = _SELECTOR_SCORES.sub(lambda m: m.group(1) + _SELECTOR_OBJECTIVE.sub(
+                    lambda o: o.group(1) + self.objectives.get(o.group(2), o.group(2)) + o.group(3), m.group(2)
+                ) + m.group(3), token)
+        self._rename_command(tokens, 0)
+        return " ".join(tokens)
+
+    def function(self, fh: BaseFunctionHandler) -> str:
+        """
+        Returns the minified text of a function, without comments.
+
+        :param BaseFunctionHandler fh: The function handler of the function
+        """
+        return "\n".join(self.command(c.command_string) for c in fh.commands if c.name != '#')
+
+    def _score_component(self, match: re.Match) -> str:
+        body = _SCORE_FIELD.sub(lambda m: m.group(1) + json.dumps(
+            (self.players if m.group(2) == "name" else self.objectives).get(json.loads(m.group(3)), json.loads(m.group(3)))
+        ), match.group(2))
+        return match.group(1) + body + match.group(3)
+
+    def _rename_command(self, tokens: list[str], start: int):
+        """Renames the objectives and fake players in the tokens of a command, from the index it starts at."""
+        if start >= len(tokens): return
+        name = tokens[start]
+        arguments = lambda offset: [start + o for o in offset if start + o < len(tokens)]
+        if name == "scoreboard" and len(tokens) > start + 2:
+            group, action = tokens[start + 1], tokens[start + 2]
+            if group == "objectives":
+                self._rename(tokens, objectives=arguments((4,) if action == "setdisplay" else (3,)))
+            elif action == "operation":
+                self._rename(tokens, players=arguments((3, 6)), objectives=arguments((4, 7)))
+            elif action == "list":
+                self._rename(tokens, players=arguments((3,)))
+            else:
+                self._rename(tokens, players=arguments((3,)), objectives=arguments((4,)))
+        elif name == "trigger":
+            self._rename(tokens, objectives=arguments((1,)))
+        elif name == "execute":
+            i = start + 1
+            while i < len(tokens):
+                if tokens[i] == "run":
+                    self._rename_command(tokens, i + 1)
+                    return
+                if tokens[i] in ("if", "unless") and i + 1 < len(tokens) and tokens[i + 1] == "score":
+                    self._rename(tokens, players=[i + 2], objectives=[i + 3])
+                    if i + 4 < len(tokens) and tokens[i + 4] != "matches":
+                        self._rename(tokens, players=[i + 5], objectives=[i + 6])
+                elif tokens[i] == "store" and i + 2 < len(tokens) and tokens[i + 2] == "score":
+                    self._rename(tokens, players=[i + 3], objectives=[i + 4])
+                i += 1
+
+    def _rename(self, tokens: list[str], players: Iterable[int] = (), objectives: Iterable[int] = ()):
+        for i in players:
+            if i < len(tokens): tokens[i] = self.players.get(tokens[i], tokens[i])
+        for i in objectives:
+            if i < len(tokens): tokens[i] = self.objectives.get(tokens[i], tokens[i])
+
+class _Recorder(dict):
+    """An empty mapping that records the names it is asked for, so that a minifier finds names instead of renaming them."""
+
+    def __init__(self):
+        super().__init__()
+        self.seen: set[str] = set()
+
+    def __bool__(self) -> bool:
+        return True
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        self.seen.add(key)
+        return default
+
+_SCORE_COMPONENT = re.compile(r'("score"\s*:\s*\{)([^{}]*)(})')
+_SCORE_FIELD = re.compile(r'(\s*"(name|objective)"\s*:\s*)("(?:[^"\\]|\\.)*")')
+_SELECTOR_SCORES = re.compile(r"(scores=\{)([^}]*)(})")
+_SELECTOR_OBJECTIVE = re.compile(r"((?:^|,)\s*)([^=,\s]+)(\s*=)")
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import zipfile
+from typing import Any
+
+from pymcfunc.data_formats.advancements import Advancement
+from pymcfunc.data_formats.base_formats import JsonFormat
+from pymcfunc.data_formats.item_modifiers import ItemModifier
+from pymcfunc.data_formats.loot_tables import LootTable
+from pymcfunc.data_formats.predicates import Predicate
+from pymcfunc.data_formats.recipes import Recipe
+
+MOUNTABLE: dict[str, type[JsonFormat]] = {
+    'advancements': Advancement,
+    'loot_tables': LootTable,
+    'predicates': Predicate,
+    'recipes': Recipe,
+    'item_modifiers': ItemModifier
+}
+
+
+class MountedResource:
+    """A JSON file of a mounted datapack, which is only read when it is written or searched for references,
+    and only parsed when its :py:attr:`value` is accessed."""
+
+    def __init__(self, mount: Mount, kind: str, namespaced: str, entry: str):
+        """
+        :param Mount mount: The datapack the file is in
+        :param str kind: The kind of resource, e.g. ``loot_tables``
+        :param str namespaced: The resource location of the resource
+        :param str entry: The path of the file, relative to the root of the datapack
+        """
+        self.mount = mount
+        self.kind = kind
+        self.namespaced = namespaced
+        self.entry = entry
+        self._value: JsonFormat | None = None
+
+    def __repr__(self):
+        return f"MountedResource({self.kind!r}, {self.namespaced!r})"
+
+    def data(self) -> bytes:
+        """Reads the file, without decoding it."""
+        return self.mount.read_bytes(self.entry)
+
+    def text(self) -> str:
+        """Reads the file."""
+        return self.mount.read(self.entry)
+
+    def as_json(self) -> Any:
+        """Reads the file as JSON, without parsing it into a :py:class:`JsonFormat`."""
+        return json.loads(self.text())
+
+    @property
+    def value(self) -> JsonFormat:
+        """The resource, parsed into its :py:class:`JsonFormat` class the first time it is accessed."""
+        if self._value is None:
+            namespace, _, name = self.namespaced.partition(":")
+            names = {'namespace': namespace, 'name': name} if self.kind in ('advancements', 'recipes') else {}
+            self._value = MOUNTABLE[self.kind].from_json(self.as_json(), **names)
+        return self._value
+
+
+class Mount:
+    """
+    An existing datapack folder or zip archive, whose JSON resources are indexed by resource location.
+    Mounting only lists the files; none of them are read.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """
+        :param path: The root folder of the datapack, containing ``data``, or a zip archive of it
+        """
+        self.path = pathlib.Path(path)
+        self.resources: dict[str, dict[str, MountedResource]] = {kind: {} for kind in MOUNTABLE}
+        self._zip = zipfile.ZipFile(self.path) if self.path.is_file() else None
+        for entry in self._entries():
+            parts = entry.split("/")
+            if len(parts) < 4 or parts[0] != "data" or parts[2] not in MOUNTABLE or not entry.endswith(".json"):
+                continue
+            namespaced = f"{parts[1]}:{'/'.join(parts[3:]).removesuffix('.json')}"
+            self.resources[parts[2]][namespaced] = MountedResource(self, parts[2], namespaced, entry)
+
+    def _entries(self) -> list[str]:
+        if self._zip is not None:
+            return self._zip.namelist()
+        data = self.path / "data"
+        entries = []
+        if not data.is_dir(): return entries
+        for namespace in os.scandir(data):
+            for kind in MOUNTABLE:
+                folder = os.path.join(namespace.path, kind)
+                for directory, _, files in os.walk(folder):
+                    relative = pathlib.Path(directory).relative_to(self.path).as_posix()
+                    entries.extend(f"{relative}/{file}" for file in files)
+        return entries
+
+    def read(self, entry: str) -> str:
+        """
+        Reads a file of the datapack.
+
+        :param str entry: The path of the file, relative to the root of the datapack
+        """
+        return self.read_bytes(entry).decode("utf-8")
+
+    def read_bytes(self, entry: str) -> bytes:
+        """
+        Reads a file of the datapack without decoding it.
+
+        :param str entry: The path of the file, relative to the root of the datapack
+        """
+        if self._zip is not None: return self._zip.read(entry)
+        return (self.path / entry).read_bytes()
+
+    def close(self):
+        """Closes the zip archive, if the datapack is one."""
+        if self._zip is not None: self._zip.close()
@@ -1,12 +1,32 @@
 from __future__ import annotations
 
+import contextlib
+import gzip
+import importlib
+import io
+import json
+import os
+import pathlib
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Callable, Optional
 
+from pymcfunc.build import BuildPlan, BuildSummary, FileStats, write_tree, write_zip
 from pymcfunc.proxies import selectors
 from pymcfunc.data_formats.advancements import Advancement
+from pymcfunc.data_formats.base_formats import JsonFormat
+from pymcfunc.dedupe import SharedFiles
 from pymcfunc.functions import JavaFunctionHandler, Function
 from pymcfunc.internal import base_class
+from pymcfunc.minify import Minifier, _RESOURCE_LOCATION
+from pymcfunc.mount import Mount, MountedResource
+from pymcfunc.parser import UnparseableLine, parse_functions
+from pymcfunc.raw_commands import ExecutedCommand
+from pymcfunc.report import BuildReport
 from pymcfunc.data_formats.loot_tables import LootTable
+from pymcfunc.data_formats.nbt_binary import write_nbt
+from pymcfunc.data_formats.nbt_tags import NBTTag
 from pymcfunc.data_formats.predicates import Predicate
 from pymcfunc.data_formats.recipes import Recipe
 from pymcfunc.version import JavaVersion
@@ -19,43 +39,552 @@ class BasePack: pass
 
 class JavaPack(BasePack):
     """Represents a Java Edition Datapack."""
+    deferred_by_default: bool = False
 
-    def __init__(self, name: str, version: str | JavaVersion):
+    def __init__(self, name: str, version: str | JavaVersion, deferred: bool | None = None):
         """
         Initialises the pack.
         
         :param str name: The name of the pack
         :param version: The version of the pack
         :type version: str | JavaVersion
+        :param deferred: Whether to only register functions when they are decorated, and generate them at build time.
+                         Defaults to :py:attr:`deferred_by_default`.
+        :type deferred: bool | None
         """
         self.name = name
-        self.functions: list[Function] = []
+        self.namespace = name.lower()
+        self.funcs: list[Function] = []
         self.tags: dict[str, dict[str, list[str]]] = {'blocks': {}, 'entity_types': {}, 'fluids': {}, 'functions': {}, 'items': {}}
         self.minecraft_tags: dict[str, list] = {'load': [], 'tick': []}
         self.advancements: list[Advancement] = []
-        self.loot_tables: list[LootTable] = []
-        self.predicates: list[Predicate] = []
+        self.loot_tables: dict[str, LootTable] = {}
+        self.predicates: dict[str, Predicate] = {}
         self.recipes: list[Recipe] = []
-        self.item_modifiers: list[ItemModifier] = []
+        self.item_modifiers: dict[str, ItemModifier] = {}
+        self.structures: dict[str, bytes] = {}
         self.sel = selectors.JavaSelector
         self.version = JavaVersion(version) if isinstance(version, str) else version
+        self.deferred = self.deferred_by_default if deferred is None else deferred
+        self.exports: list[Function | Advancement] = []
+        self.internal_objectives: dict[str, None] = {}
+        self.internal_players: dict[str, None] = {}
+        self.mounts: list[Mount] = []
 
-    def function(self, name: Optional[str]=None):
+    def function(self, name: Optional[str]=None, export: bool = False):
         """
         Registers a Python function and translates it into a Minecraft function.
 
         The decorator calls the function being decorated with one argument being a PackageHandler.
+        If the pack is deferred, the function is only called when the pack is built.
 
         :param name: The name of the Minecraft function, if it isn't the name of the Python function.
         :type name: [type] | None
+        :param bool export: Whether the function is an entry point of the pack, see :py:meth:`export`
         """
         def decorator(func: Callable[[JavaFunctionHandler], Any]):
             m = JavaFunctionHandler(self)
-            func(m)
             fname = func.__name__ if name is None else name
-            function = Function(self, m, "", fname)
+            function = Function(self, m, self.namespace, fname, generator=func)
             self.funcs.append(function)
+            if export: self.exports.append(function)
+            if not self.deferred: function.generate()
             return function
         return decorator
 
-    def build(self): pass
+    def export(self, *objects: Function | Advancement):
+        """
+        Marks functions or advancements as entry points of the pack.
+
+        When the pack is built with ``tree_shake=True``, only entry points, functions in the ``load`` and ``tick`` tags,
+        and whatever they reference are generated and written.
+
+        :param objects: The functions or advancements
+        """
+        self.exports.extend(objects)
+
+    def internal_objective(self, name: str) -> str:
+        """
+        Registers a scoreboard objective that is only used inside the pack, so that a minified build can rename it.
+
+        :param str name: The name of the objective
+        :return: The name of the objective
+        """
+        self.internal_objectives[name] = None
+        return name
+
+    def internal_player(self, name: str) -> str:
+        """
+        Registers a fake player that is only used inside the pack, so that a minified build can rename it.
+
+        :param str name: The name of the fake player, usually starting with ``#`` or ``$``
+        :return: The name of the fake player
+        """
+        self.internal_players[name] = None
+        return name
+
+    def import_functions(self, datapack_folder: str | os.PathLike, workers: int | None = None) -> list[UnparseableLine]:
+        """
+        Parses the functions of an existing datapack and registers them, with their commands, to this pack.
+
+        :param datapack_folder: The root folder of the datapack, containing ``data``
+        :param workers: The number of processes to parse files with, or None for the default
+        :type workers: int | None
+        :return: The lines that couldn't be parsed, which are left out of the functions
+        """
+        functions, errors = parse_functions(datapack_folder, workers)
+        for name, commands in functions.items():
+            namespace, _, path = name.partition(":")
+            fh = JavaFunctionHandler(self)
+            for command in commands: command.fh = fh
+            fh.commands = commands
+            self.funcs.append(Function(self, fh, namespace, path))
+        return errors
+
+    def structure(self, name: str, template: NBTTag | bytes) -> str:
+        """
+        Registers a structure template, which is kept as gzipped NBT.
+
+        :param str name: The name of the structure
+        :param template: The template, as a tag or as gzipped NBT
+        :type template: NBTTag | bytes
+        :return: The namespaced name of the structure
+        """
+        if not isinstance(template, bytes):
+            out = io.BytesIO()
+            write_nbt(out, template)
+            template = gzip.compress(out.getvalue(), mtime=0)
+        self.structures[name] = template
+        return self._namespaced(name)
+
+    def mount(self, path: str | os.PathLike) -> Mount:
+        """
+        Mounts an existing datapack folder or zip archive, whose advancements, loot tables, predicates, recipes and
+        item modifiers are then written with this pack and can be referenced by it.
+
+        Only the names of the files are listed when mounting. A file is read when it is written or searched
+        for references, and only parsed into its :py:class:`JsonFormat` class when it is accessed
+        with :py:meth:`resource`. Mounted files are copied byte for byte, or only have renamed functions, objectives and
+        players replaced in them when the pack is minified, so to change one,
+        register a replacement with the same name, which takes precedence. Later mounts take precedence over earlier ones.
+
+        :param path: The root folder of the datapack, containing ``data``, or a zip archive of it
+        :return: The mounted datapack
+        """
+        mount = Mount(path)
+        self.mounts.append(mount)
+        return mount
+
+    def resource(self, kind: str, name: str) -> Any:
+        """
+        Finds a resource registered to or mounted on this pack.
+
+        :param str kind: The kind of resource, i.e. ``advancements``, ``loot_tables``, ``predicates``, ``recipes`` or ``item_modifiers``
+        :param str name: The resource location of the resource, in this pack's namespace if it has none
+        :raises KeyError: If there is no such resource
+        """
+        obj = self._index()[kind, self._namespaced(name)]
+        return obj.value if isinstance(obj, MountedResource) else obj
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            'funcs': len(self.funcs),
+            'advancements': len(self.advancements),
+            'recipes': len(self.recipes),
+            'resources': {kind: set(getattr(self, kind)) for kind in ('loot_tables', 'predicates', 'item_modifiers', 'structures')},
+            'tags': {group: {tag: len(values) for tag, values in tags.items()} for group, tags in self.tags.items()},
+            'minecraft_tags': {tag: len(values) for tag, values in self.minecraft_tags.items()},
+            'internal_objectives': len(self.internal_objectives),
+            'internal_players': len(self.internal_players)
+        }
+
+    def _registrations_since(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        """
+        Collects everything registered to the pack since :py:meth:`_snapshot`, in a form that can be pickled.
+        Kinds of object that nothing was registered to are left out.
+        """
+        registrations = {
+            'funcs': [(f.namespace, f.name, [(c.name, c.command_string) for c in f.fh.commands])
+                      for f in self.funcs[snapshot['funcs']:]],
+            'advancements': self.advancements[snapshot['advancements']:],
+            'recipes': self.recipes[snapshot['recipes']:],
+            'resources': {kind: new for kind, names in snapshot['resources'].items()
+                          if (new := {name: obj for name, obj in getattr(self, kind).items() if name not in names})},
+            'tags': {group: new for group, tags in self.tags.items()
+                     if (new := {tag: [str(v) for v in values[start:]] for tag, values in tags.items()
+                                 if len(values) > (start := snapshot['tags'].get(group, {}).get(tag, 0))})},
+            'minecraft_tags': {tag: [str(v) for v in values[start:]] for tag, values in self.minecraft_tags.items()
+                               if len(values) > (start := snapshot['minecraft_tags'].get(tag, 0))},
+            'internal_objectives': list(self.internal_objectives)[snapshot['internal_objectives']:],
+            'internal_players': list(self.internal_players)[snapshot['internal_players']:]
+        }
+        return {kind: registered for kind, registered in registrations.items() if registered}
+
+    def _merge(self, registrations: dict[str, Any]):
+        """Adds the registrations collected by :py:meth:`_registrations_since` in a worker process to the pack."""
+        for namespace, name, commands in registrations.get('funcs', ()):
+            fh = JavaFunctionHandler(self)
+            fh.commands = [ExecutedCommand(fh, command_name, string) for command_name, string in commands]
+            self.funcs.append(Function(self, fh, namespace, name))
+        self.advancements.extend(registrations.get('advancements', ()))
+        self.recipes.extend(registrations.get('recipes', ()))
+        for kind, resources in registrations.get('resources', {}).items():
+            getattr(self, kind).update(resources)
+        for group, tags in registrations.get('tags', {}).items():
+            for tag, values in tags.items():
+                self.tags.setdefault(group, {}).setdefault(tag, []).extend(values)
+        for tag, values in registrations.get('minecraft_tags', {}).items():
+            self.minecraft_tags.setdefault(tag, []).extend(values)
+        self.internal_objectives.update(dict.fromkeys(registrations.get('internal_objectives', ())))
+        self.internal_players.update(dict.fromkeys(registrations.get('internal_players', ())))
+
+    def generate(self, workers: int | None = None, functions: list[Function] | None = None,
+                 report: BuildReport | None = None):
+        """
+        Generates every function of the pack that hasn't been generated yet.
+
+        With ``workers``, the functions are generated in a process pool. Each worker imports the pack from the module
+        attribute that it is assigned to, looking in the module that defines the function first, so the pack must be
+        created when that module is imported, and functions must not depend on each other's registrations.
+        The commands and registrations of each function are merged back in the order the functions were registered,
+        so the output doesn't depend on which worker finishes first.
+
+        :param workers: The number of worker processes, or None to generate in this process
+        :type workers: int | None
+        :param functions: The functions to generate, or None for all of them.
+                          Functions registered while generating these are generated too.
+        :type functions: list[Function] | None
+        :param report: The report to record the time and memory of each generator in, if any
+        :type report: BuildReport | None
+        """
+        start = len(self.funcs)
+        pending = [f for f in (self.funcs if functions is None else functions) if not f.generated]
+        if workers is not None and pending:
+            with ProcessPoolExecutor(workers) as executor:
+                profile = None if report is None else report.profile
+                references = {module: self._reference(module) for module in {f.generator.__module__ for f in pending}}
+                futures = [executor.submit(_generate_in_worker, references[f.generator.__module__], f.namespaced, profile)
+                           for f in pending]
+                for function, future in zip(pending, futures):
+                    commands, registrations, generators = future.result()
+                    if report is not None: report.generators.update(generators)
+                    function.generator = None
+                    function.fh.commands = [ExecutedCommand(function.fh, name, string) for name, string in commands]
+                    self._merge(registrations)
+        for function in pending: function.generate(report)
+        i = start if functions is not None else 0
+        while i < len(self.funcs):
+            self.funcs[i].generate(report)
+            i += 1
+
+    def _reference(self, module: str) -> str:
+        """
+        Finds the pack as ``module:attribute``, for worker processes to import it from,
+        looking in the given module first.
+        """
+        for name in (module, *list(sys.modules)):
+            for attribute, value in list(getattr(sys.modules.get(name), '__dict__', {}).items()):
+                if value is self: return f"{name}:{attribute}"
+        raise ValueError(f"Pack `{self.name}` isn't assigned to an attribute of any module, "
+                         f"so worker processes can't import it")
+
+    def _namespaced(self, name: str) -> str:
+        return name if ":" in name else f"{self.namespace}:{name}"
+
+    def _name_files(self):
+        """Gives the predicates and item modifiers of the pack their namespaced names, for references to them."""
+        for kind in ('predicates', 'item_modifiers'):
+            for name, obj in getattr(self, kind).items(): obj.namespaced = self._namespaced(name)
+
+    def _index(self) -> dict[tuple[str, str], Any]:
+        """Maps the kind and namespaced name of every object that can be referenced to the object."""
+        index: dict[tuple[str, str], Any] = {}
+        for mount in self.mounts:
+            for kind, resources in mount.resources.items():
+                index.update(((kind, name), resource) for name, resource in resources.items())
+        index.update((('functions', f.namespaced), f) for f in self.funcs)
+        index.update((('advancements', self._namespaced(a.namespaced)), a) for a in self.advancements)
+        index.update((('recipes', self._namespaced(r.namespaced)), r) for r in self.recipes)
+        for kind in ('loot_tables', 'predicates', 'item_modifiers', 'structures'):
+            index.update(((kind, self._namespaced(name)), obj) for name, obj in getattr(self, kind).items())
+        index.update((('tags/functions', "#" + self._namespaced(tag)), values)
+                     for tag, values in self.tags.get('functions', {}).items())
+        index.update((('tags/functions', f"#minecraft:{tag}"), values) for tag, values in self.minecraft_tags.items())
+        return index
+
+    def _reachable(self, workers: int | None = None, report: BuildReport | None = None) -> set[tuple[str, str]]:
+        """
+        Generates every function reachable from the entry points of the pack, and returns everything reachable.
+
+        References are found by looking for resource locations in the text of functions, tags and JSON files,
+        so a function that isn't referenced anywhere is never generated.
+        """
+        reached: set[tuple[str, str]] = set()
+        queue = [('tags/functions', "#minecraft:load"), ('tags/functions', "#minecraft:tick")]
+        queue.extend(('functions' if isinstance(o, Function) else 'advancements', self._namespaced(o.namespaced))
+                     for o in self.exports)
+        while queue:
+            wave = [key for key in dict.fromkeys(queue) if key not in reached]
+            if not wave: break
+            reached.update(wave)
+            queue = []
+            index = self._index()
+            self.generate(workers, [index[key] for key in wave if key[0] == 'functions' and key in index], report)
+            index = self._index()
+            for key in wave:
+                obj = index.get(key)
+                if obj is None: continue
+                if key[0] == 'functions': text = str(obj.fh)
+                elif key[0] == 'tags/functions': text = " ".join(self._tag_values(obj))
+                elif isinstance(obj, MountedResource): text = obj.text()
+                elif key[0] == 'structures': continue
+                else: text = json.dumps(obj.as_json())
+                for ref in _RESOURCE_LOCATION.findall(text):
+                    if ref.startswith("#"): queue.append(('tags/functions', ref))
+                    else: queue.extend((kind, ref) for kind in _REFERENCEABLE if (kind, ref) in index)
+            queue.extend(('tags/functions', f"#minecraft:{tag}") for tag in self.minecraft_tags)
+        return reached
+
+    def _resource_path(self, kind: str, name: str, extension: str = "json") -> str:
+        namespace, _, path = name.rpartition(":")
+        return f"data/{namespace or self.namespace}/{kind}/{path}.{extension}"
+
+    def _tag_values(self, values: list) -> list[str]:
+        return [str(v) if ":" in str(v) else f"{self.namespace}:{v}" for v in values]
+
+    def _minifier(self, reachable: set[tuple[str, str]] | None = None) -> Minifier:
+        """
+        Chooses new names for the functions of this pack's namespace that aren't exported, and internal objectives
+        and players. Functions that share a name with another kind of resource keep their name,
+        since references to them can't be told apart, and objectives and players aren't renamed to ones
+        that the pack's commands use.
+        """
+        index = self._index()
+        exported = {self._namespaced(o.namespaced) for o in self.exports}
+        shared = {name for kind, name in index if kind not in ('functions', 'tags/functions')}
+        functions = [f.namespaced for f in self.funcs
+                     if f.namespace == self.namespace and f.namespaced not in exported and f.namespaced not in shared
+                     and (reachable is None or ('functions', f.namespaced) in reachable)]
+        objectives, players = Minifier.score_names(c.command_string for f in self.funcs for c in f.fh.commands)
+        return Minifier.rename(self.namespace, functions, self.internal_objectives, self.internal_players,
+                               reserved=(f.namespaced for f in self.funcs),
+                               reserved_objectives=objectives, reserved_players=players)
+
+    def _shared_files(self, threshold: int, reachable: set[tuple[str, str]] | None = None) -> SharedFiles:
+        """Finds the inline predicates and item modifiers that are repeated across the files that will be written."""
+        keep = lambda kind, name: reachable is None or (kind, self._namespaced(name)) in reachable
+        predicates = {self._namespaced(name): p for name, p in self.predicates.items() if keep("predicates", name)}
+        item_modifiers = {self._namespaced(name): m for name, m in self.item_modifiers.items()
+                          if keep("item_modifiers", name)}
+        roots = [a for a in self.advancements if keep("advancements", a.namespaced)]
+        roots.extend(t for name, t in self.loot_tables.items() if keep("loot_tables", name))
+        roots.extend(predicates.values())
+        roots.extend(item_modifiers.values())
+        return SharedFiles.find(self.namespace, roots, threshold, predicates, item_modifiers)
+
+    def _plan(self, pack_format: int, description: str, indent: int | None,
+              reachable: set[tuple[str, str]] | None = None, minifier: Minifier | None = None,
+              shared: SharedFiles | None = None) -> BuildPlan:
+        """
+        Computes every output file of the pack, or only the reachable ones, without serialising any of them.
+        With a minifier, functions and JSON files are minified, and ``indent`` is ignored.
+        With shared files, repeated predicates and item modifiers are written as references to them.
+        """
+        keep = lambda kind, name: reachable is None or (kind, self._namespaced(name)) in reachable
+        replace = None if shared is None else shared.replace
+        if minifier is None:
+            dumps = lambda value: json.dumps(value, indent=indent)
+            stream = lambda obj: _json_text(obj, indent=indent, replace=replace)
+            function_text = lambda fh: lambda: str(fh)
+            function_name = lambda name: name
+            copy = lambda resource: lambda: resource.data()
+        else:
+            dumps = lambda value: minifier.text(json.dumps(value, separators=(",", ":")))
+            stream = lambda obj: minifier.text(_json_text(obj, separators=(",", ":"), replace=replace))
+            function_text = lambda fh: lambda: minifier.function(fh)
+            function_name = lambda name: minifier.functions.get(name, name)
+            copy = lambda resource: lambda: minifier.text(resource.text())
+        dump = lambda obj: lambda: stream(obj)
+        dump_tag = lambda values: lambda: dumps({'values': self._tag_values(values)})
+        raw = lambda data: lambda: data
+
+        plan: BuildPlan = {
+            'pack.mcmeta': lambda: dumps({'pack': {'pack_format': pack_format, 'description': description}})
+        }
+        for function in self.funcs:
+            if not keep("functions", function.namespaced): continue
+            plan[self._resource_path("functions", function_name(function.namespaced), "mcfunction")] = \
+                function_text(function.fh)
+        for mount in self.mounts:
+            for kind, resources in mount.resources.items():
+                for name, resource in resources.items():
+                    if kind != "recipes" and not keep(kind, name): continue
+                    plan[self._resource_path(kind, name)] = copy(resource)
+        for advancement in self.advancements:
+            if not keep("advancements", advancement.namespaced): continue
+            plan[self._resource_path("advancements", advancement.namespaced)] = dump(advancement)
+        for name, loot_table in self.loot_tables.items():
+            if not keep("loot_tables", name): continue
+            plan[self._resource_path("loot_tables", name)] = dump(loot_table)
+        for name, predicate in self.predicates.items():
+            if not keep("predicates", name): continue
+            plan[self._resource_path("predicates", name)] = dump(predicate)
+        for recipe in self.recipes:
+            plan[self._resource_path("recipes", recipe.namespaced)] = dump(recipe)
+        for name, item_modifier in self.item_modifiers.items():
+            if not keep("item_modifiers", name): continue
+            plan[self._resource_path("item_modifiers", name)] = dump(item_modifier)
+        if shared is not None:
+            for name, predicate in shared.predicates.items():
+                plan[self._resource_path("predicates", name)] = dump(predicate)
+            for name, item_modifier in shared.item_modifiers.items():
+                plan[self._resource_path("item_modifiers", name)] = dump(item_modifier)
+        for name, template in self.structures.items():
+            if not keep("structures", name): continue
+            plan[self._resource_path("structures", name, "nbt")] = raw(template)
+        for group, tags in self.tags.items():
+            for tag, values in tags.items():
+                if group == 'functions' and not keep("tags/functions", "#" + self._namespaced(tag)): continue
+                plan[self._resource_path(f"tags/{group}", tag)] = dump_tag(values)
+        for tag, values in self.minecraft_tags.items():
+            if values:
+                plan[self._resource_path("tags/functions", f"minecraft:{tag}")] = dump_tag(values)
+        return plan
+
+    def build(self, pack_format: int, description: str, datapack_folder: str = '.', indent: int | None = 2, *,
+              threads: int | None = None, max_in_flight: int = 64, incremental: bool = False,
+              zip_path: str | os.PathLike | None = None, workers: int | None = None,
+              tree_shake: bool = False, report: str | os.PathLike | None = None, profile: bool = False,
+              report_sort: str = 'wall_time', minify: bool = False,
+              minify_map: str | os.PathLike | None = None, dedupe: int | None = None) -> BuildSummary:
+        """
+        Builds the pack into ``<datapack_folder>/<name>``.
+
+        The whole output tree is computed before anything is written, then files are serialised
+        and written concurrently. The process working directory is never changed,
+        so builds are safe to run from other threads.
+
+        Every build records the content hash of each file in a manifest, and deletes the files in the manifest
+        that the pack no longer generates. An incremental build only writes files whose hash differs from the manifest,
+        unless the manifest was written by a different version of pymcfunc.
+
+        Functions of a deferred pack are generated first, in ``workers`` processes if given (see :py:meth:`generate`).
+        With ``tree_shake``, only objects reachable from the entry points of the pack are generated and written
+        (see :py:meth:`export`). Recipes and non-function tags are always written.
+
+        If ``zip_path`` is given, the pack is streamed straight into a zip archive instead,
+        and ``datapack_folder`` is ignored. Archives of the same pack are byte-identical.
+
+        If ``report`` is given, a :py:class:`BuildReport` is written there as JSON. It has the wall and CPU time,
+        validation time and peak memory of every generator run during the build, the number of each command
+        in every function, the size and serialisation and writing time of every file, and the time spent
+        in each phase of the build. Memory allocations are traced while generating, which slows generation down.
+
+        With ``minify``, comments are left out, JSON files other than mounted ones have no whitespace, and functions that aren't exported
+        (see :py:meth:`export`), internal objectives and internal players (see :py:meth:`internal_objective`)
+        are renamed to short identifiers. The new names are written to ``minify_map``,
+        which defaults to ``<name>.minify.json`` next to the pack.
+
+        The predicates and item modifiers of the pack are given their namespaced names first, so ``reference``
+        predicates and item modifiers can refer to them by the object rather than by name.
+
+        With ``dedupe``, inline predicates and item modifiers that are repeated at least that many times across
+        the advancements, loot tables, predicates and item modifiers of the pack are written once
+        into ``<namespace>:shared/``, and referenced with ``reference`` predicates and item modifiers
+        (see :py:class:`~pymcfunc.dedupe.SharedFiles`).
+
+        :param int pack_format: The pack format of the pack
+        :param str description: The description of the pack
+        :param str datapack_folder: The folder to build the pack in
+        :param indent: The indent of JSON files, or None for no whitespace
+        :type indent: int | None
+        :param threads: The number of threads to write files with, or None for the default
+        :type threads: int | None
+        :param int max_in_flight: The maximum number of serialised files waiting to be written at once
+        :param bool incremental: Whether to only write changed files
+        :param zip_path: The zip archive to build the pack into, or None to build into a folder
+        :type zip_path: str | os.PathLike | None
+        :param workers: The number of processes to generate deferred functions with, or None to generate in this process
+        :type workers: int | None
+        :param bool tree_shake: Whether to leave out objects that can't be reached from the entry points of the pack
+        :param report: The JSON file to write a report of the build to, if any
+        :type report: str | os.PathLike | None
+        :param bool profile: Whether to include the 20 slowest calls of every generator in the report, from :py:mod:`cProfile`
+        :param str report_sort: The field to sort the report by, see :py:meth:`BuildReport.as_json`
+        :param bool minify: Whether to minify the pack
+        :param minify_map: The JSON file to write the new names of renamed objects to
+        :type minify_map: str | os.PathLike | None
+        :param dedupe: If given, the number of times an inline predicate or item modifier has to be repeated
+                       to be moved into a shared file
+        :type dedupe: int | None
+        :return: The files that were added, changed, removed and left unchanged
+        """
+        if zip_path is not None and incremental:
+            raise ValueError("Incremental builds are only supported for folders")
+        build_report = None if report is None else BuildReport(profile)
+        stats: FileStats | None = None if report is None else {}
+        phase = (lambda _: contextlib.nullcontext()) if build_report is None else build_report.phase
+        tracing = contextlib.nullcontext() if build_report is None else build_report.tracing()
+
+        self._name_files()
+        with phase('total'):
+            with tracing, phase('generation'):
+                if tree_shake:
+                    reachable = self._reachable(workers, build_report)
+                else:
+                    reachable = None
+                    self.generate(workers, report=build_report)
+            with phase('planning'):
+                minifier = self._minifier(reachable) if minify else None
+                shared = None if dedupe is None else self._shared_files(dedupe, reachable)
+                plan = self._plan(pack_format, description, indent, reachable, minifier, shared)
+            with phase('writing'):
+                if zip_path is not None:
+                    summary = write_zip(zip_path, plan, threads=threads, max_in_flight=max_in_flight, stats=stats)
+                else:
+                    summary = write_tree(pathlib.Path(datapack_folder, self.name), plan, threads=threads,
+                                         max_in_flight=max_in_flight, incremental=incremental, stats=stats)
+        if minifier is not None:
+            if minify_map is None:
+                minify_map = pathlib.Path(zip_path).parent if zip_path is not None else pathlib.Path(datapack_folder)
+                minify_map /= f"{self.name}.minify.json"
+            with open(minify_map, "w", encoding="utf-8") as f:
+                json.dump(minifier.mapping(), f, indent=2)
+        if build_report is not None:
+            rename = (lambda name: name) if minifier is None else (lambda name: minifier.functions.get(name, name))
+            functions = {self._resource_path("functions", rename(f.namespaced), "mcfunction"): f for f in self.funcs}
+            build_report.record(functions, stats)
+            build_report.write(report, report_sort)
+        return summary
+
+
+_REFERENCEABLE = ('functions', 'advancements', 'loot_tables', 'predicates', 'item_modifiers', 'structures')
+
+_worker_packs: dict[str, JavaPack] = {}
+
+def _json_text(obj: JsonFormat, **kwargs) -> str:
+    """Serialises a JSON file with :py:meth:`JsonFormat.write_json`, so its :py:meth:`JsonFormat.as_json` dict is never built."""
+    buffer = io.StringIO()
+    obj.write_json(buffer, **kwargs)
+    return buffer.getvalue()
+
+def _generate_in_worker(reference: str, function_name: str, profile: bool | None) \
+        -> tuple[list[tuple[str, str]], dict[str, Any], dict[str, Any]]:
+    """
+    Generates one function of a deferred pack in a worker process of :py:meth:`JavaPack.generate`.
+    If ``profile`` isn't None, the generator is measured as if by :py:meth:`BuildReport.generate`.
+
+    :param reference: The pack, as ``module:attribute``
+    """
+    pack = _worker_packs.get(reference)
+    if pack is None:
+        module, _, attribute = reference.partition(":")
+        pack = _worker_packs[reference] = getattr(importlib.import_module(module), attribute)
+    function = next(f for f in pack.funcs if f.namespaced == function_name)
+    snapshot = pack._snapshot()
+    pack.deferred = False
+    report = None if profile is None else BuildReport(profile)
+    if report is not None and not tracemalloc.is_tracing(): tracemalloc.start()
+    function.generate(report)
+    return [(c.name, c.command_string) for c in function.fh.commands], pack._registrations_since(snapshot), \
+        {} if report is None else report.generators
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import ast
+import inspect
+import mmap
+import os
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Iterator, NamedTuple
+
+from pymcfunc.command import AE, LE, SE, Command, Element, ExecutedCommand
+from pymcfunc.raw_commands import JavaRawCommands
+
+if TYPE_CHECKING: from pymcfunc.functions import BaseFunctionHandler
+
+_ALIASES = {'tp': "teleport", 'tell': "msg", 'w': "msg", 'xp': "experience"}
+
+_Span = tuple[int, int]
+_Args = dict[str, Any]
+
+
+class ParsedCommand(ExecutedCommand):
+    """A command read from an existing function, with the arguments it was given."""
+
+    def __init__(self, fh: BaseFunctionHandler | None, name: str, command_string: str, segment: str, args: _Args):
+        """
+        :param fh: The function handler the command belongs to, if any
+        :param str name: The name of the command, as in :py:attr:`Command.name`
+        :param str command_string: The command, as written
+        :param str segment: The literal words that start the command, e.g. ``scoreboard players set``
+        :param args: The text of each argument, by parameter name.
+                     The subcommands of ``execute`` are a list of ``(segment, args)`` pairs,
+                     and the command that ``execute run`` runs is a :py:class:`ParsedCommand` without a function handler.
+        """
+        super().__init__(fh, name, command_string)
+        self.segment = segment
+        self.args = args
+
+    def __repr__(self):
+        return f"ParsedCommand({self.command_string!r}, segment={self.segment!r}, args={self.args!r})"
+
+
+class UnparseableLine(NamedTuple):
+    """A line that didn't match any command."""
+    path: str
+    line_number: int
+    line: str
+    reason: str
+
+
+class _Grammar(NamedTuple):
+    segment: tuple[str, ...]
+    name: str
+    order: list[Element]
+    func: Callable[..., Any]
+
+
+_WORD = re.compile(r"\S+")
+_GROUPING = re.compile(r"[\"'\[{(]")
+
+def _tokenise(line: str) -> list[_Span]:
+    """Splits a command into words, keeping quoted strings and bracketed JSON, NBT and selector arguments whole."""
+    if _GROUPING.search(line) is None: return [m.span() for m in _WORD.finditer(line)]
+    spans = []
+    depth, quote, escaped, start = 0, None, False, None
+    for i, char in enumerate(line):
+        if start is None:
+            if char == " ": continue
+            start = i
+        if quote is not None:
+            if escaped: escaped = False
+            elif char == "\\": escaped = True
+            elif char == quote: quote = None
+        elif char in "\"'" and (depth or i == start): quote = char
+        elif char in "[{(": depth += 1
+        elif char in "]})": depth -= 1
+        elif char == " " and depth <= 0:
+            spans.append((start, i))
+            start, depth = None, 0
+    if start is not None: spans.append((start, len(line)))
+    return spans
+
+def _widths(annotation: Any) -> tuple[int, ...]:
+    """The possible numbers of words an argument with this annotation takes up, with 0 meaning the rest of the line."""
+    annotation = str(annotation)
+    if "ExecutedCommand" in annotation: return 0,
+    widths = []
+    if re.search(r"\b(Block)?Coord\b", annotation): widths.append(3)
+    if re.search(r"\b(Coord2d|ChunkCoord|Rotation)\b", annotation): widths.append(2)
+    if not widths or re.sub(r"\b(Block)?Coord(2d)?\b|\bChunkCoord\b|\bRotation\b|\bNone\b|[\s|]", "", annotation):
+        widths.append(1)
+    return tuple(widths)
+
+def _options(annotation: Any) -> list[str] | None:
+    """The only values an argument can take, if its annotation is a ``Literal``."""
+    annotation = str(annotation).replace(" | None", "")
+    match = re.fullmatch(r"Literal\[(.*)]", annotation)
+    if match is None: return None
+    try:
+        options = ast.literal_eval(f"[{match.group(1)}]")
+    except (ValueError, SyntaxError):
+        return None
+    return [str(o).lower() if isinstance(o, bool) else str(o) for o in options]
+
+@lru_cache(maxsize=None)
+def _parameters(func: Callable[..., Any]) -> dict[str, tuple[tuple[int, ...], list[str] | None, bool]]:
+    parameters = {}
+    for name, param in inspect.signature(func).parameters.items():
+        optional = param.default is not inspect.Parameter.empty or "None" in str(param.annotation)
+        parameters[name] = _widths(param.annotation), _options(param.annotation), optional
+    return parameters
+
+@lru_cache(maxsize=None)
+def _grammar() -> dict[str, list[_Grammar]]:
+    """Indexes every Java command by its first word, with the longest segments first."""
+    grammar: dict[str, list[_Grammar]] = {}
+    for attr in vars(JavaRawCommands).values():
+        if isinstance(attr, Command):
+            segment = tuple(attr.segment_name.split())
+            grammar.setdefault(segment[0], []).append(_Grammar(segment, attr.name, attr.order, attr.func))
+    for rules in grammar.values():
+        rules.sort(key=lambda rule: len(rule.segment), reverse=True)
+    return grammar
+
+@lru_cache(maxsize=None)
+def _subcommand_grammar() -> dict[str, list[_Grammar]]:
+    """Indexes every subcommand of ``execute`` by its first word, with the longest segments first."""
+    grammar: dict[str, list[_Grammar]] = {}
+    for attr in vars(JavaRawCommands.ExecuteSubcommandHandler).values():
+        if callable(attr) and hasattr(attr, 'order'):
+            segment = tuple(attr.segment_name.split())
+            grammar.setdefault(segment[0], []).append(_Grammar(segment, segment[0], attr.order, attr))
+    for rules in grammar.values():
+        rules.sort(key=lambda rule: len(rule.segment), reverse=True)
+    return grammar
+
+def _match(elements: list[Element], func: Callable[..., Any], line: str, spans: list[_Span], i: int,
+           args: _Args, greedy: bool = False) -> Iterator[tuple[int, _Args]]:
+    """
+    Yields every way that a list of grammar elements matches the words from ``i`` onwards.
+    If ``greedy``, the last argument may also take up the rest of the line, as free text such as a message does.
+    """
+    if not elements:
+        yield i, args
+        return
+    element, rest = elements[0], elements[1:]
+    if isinstance(element, LE):
+        words = element.content.split()
+        if [line[slice(*span)] for span in spans[i:i+len(words)]] == words:
+            yield from _match(rest, func, line, spans, i + len(words), args, greedy)
+        if element.optional:
+            yield from _match(rest, func, line, spans, i, args, greedy)
+    elif isinstance(element, SE):
+        for branch in element.branches:
+            yield from _match(list(branch) + rest, func, line, spans, i, args, greedy)
+        if element.optional:
+            yield from _match(rest, func, line, spans, i, args, greedy)
+    elif isinstance(element, AE):
+        widths, options, optional = _parameters(func).get(element.name, ((1,), None, False))
+        options = element.options or options
+        for width in widths:
+            end = len(spans) if width == 0 else i + width
+            if end > len(spans) or end <= i: continue
+            value = line[spans[i][0]:spans[end-1][1]]
+            if options is not None and value not in [str(o) for o in options]: continue
+            yield from _match(rest, func, line, spans, end, {**args, element.name: value}, greedy)
+        if greedy and not rest and 1 in widths and len(spans) > i + 1:
+            yield from _match(rest, func, line, spans, len(spans), {**args, element.name: line[spans[i][0]:]})
+        if element.optional or optional:
+            yield from _match(rest, func, line, spans, i, args, greedy)
+
+def _parse_execute(line: str, spans: list[_Span], i: int) -> list[tuple[str, _Args]]:
+    """Parses the subcommands of ``execute`` from word ``i`` onwards, backtracking if a subcommand matches wrongly."""
+    if i >= len(spans): return []
+    for rule in _subcommand_grammar().get(line[slice(*spans[i])], ()):
+        if tuple(line[slice(*s)] for s in spans[i:i+len(rule.segment)]) != rule.segment: continue
+        segment = " ".join(rule.segment)
+        if segment == "run":
+            return [(segment, {'command': parse_command(line[spans[i+1][0]:])})]
+        for end, args in _match(rule.order, rule.func, line, spans, i + len(rule.segment), {}):
+            try:
+                return [(segment, args)] + _parse_execute(line, spans, end)
+            except ValueError:
+                continue
+    raise ValueError(f"Unknown execute subcommand `{line[slice(*spans[i])]}`")
+
+def parse_command(line: str, fh: BaseFunctionHandler | None = None) -> ParsedCommand:
+    """
+    Parses a command with the grammar of :py:class:`JavaRawCommands`, trying the longest command names first.
+
+    :param str line: The command, without a leading ``/``
+    :param fh: The function handler the command belongs to, if any
+    :raises ValueError: If the command doesn't match the grammar of any command
+    """
+    name, segment, args = _parse(line.strip())
+    return ParsedCommand(fh, name, line.strip(), segment, dict(args))
+
+@lru_cache(maxsize=65536)
+def _parse(line: str) -> tuple[str, str, _Args]:
+    """Parses a command without a function handler, caching the result as functions often repeat lines."""
+    spans = _tokenise(line)
+    if not spans: raise ValueError("Empty command")
+    rules = _grammar().get(_ALIASES.get(line[slice(*spans[0])], line[slice(*spans[0])]))
+    if not rules: raise ValueError(f"Unknown command `{line[slice(*spans[0])]}`")
+    words = tuple(line[slice(*s)] for s in spans)
+    words = (_ALIASES.get(words[0], words[0]),) + words[1:]
+    for rule in rules:
+        if words[:len(rule.segment)] != rule.segment: continue
+        if rule.segment == ("execute",):
+            return rule.name, "execute", {'subcommands': _parse_execute(line, spans, 1)}
+        for greedy in (False, True):
+            for end, args in _match(rule.order, rule.func, line, spans, len(rule.segment), {}, greedy):
+                if end == len(spans):
+                    return rule.name, " ".join(rule.segment), args
+    raise ValueError(f"Arguments don't match the syntax of `{line[slice(*spans[0])]}`")
+
+def _lines(path: str | os.PathLike) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0: return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            yield from iter(m.readline, b"")
+
+def parse_function(path: str | os.PathLike, fh: BaseFunctionHandler | None = None) \
+        -> tuple[list[ExecutedCommand], list[UnparseableLine]]:
+    """
+    Parses a ``.mcfunction`` file, which is memory-mapped rather than read whole.
+    Comments are kept as ``#`` commands, like :py:meth:`BaseFunctionHandler.comment` makes.
+
+    :param path: The path of the file
+    :param fh: The function handler the commands belong to, if any
+    :return: The commands, and the lines that couldn't be parsed
+    """
+    commands: list[ExecutedCommand] = []
+    errors: list[UnparseableLine] = []
+    for number, raw in enumerate(_lines(path), 1):
+        line = raw.decode("utf-8").strip()
+        if not line: continue
+        if line.startswith("#"):
+            commands.append(ExecutedCommand(fh, '#', line))
+            continue
+        try:
+            commands.append(parse_command(line.removeprefix("/"), fh))
+        except (ValueError, RecursionError) as e:
+            errors.append(UnparseableLine(str(path), number, line, str(e)))
+    return commands, errors
+
+def parse_functions(root: str | os.PathLike, workers: int | None = None) \
+        -> tuple[dict[str, list[ExecutedCommand]], list[UnparseableLine]]:
+    """
+    Parses every function in a datapack, with the files spread across a process pool.
+
+    :param root: The root folder of the datapack, containing ``data``
+    :param workers: The number of worker processes, or None for the :py:class:`ProcessPoolExecutor` default
+    :type workers: int | None
+    :return: The commands of each function by resource location, and the lines that couldn't be parsed
+    """
+    data = pathlib.Path(root, "data")
+    paths = sorted(data.glob("*/functions/**/*.mcfunction"))
+    names = []
+    for path in paths:
+        namespace, _, *parts = path.relative_to(data).with_suffix("").parts
+        names.append(f"{namespace}:{'/'.join(parts)}")
+    functions: dict[str, list[ExecutedCommand]] = {}
+    errors: list[UnparseableLine] = []
+    with ProcessPoolExecutor(workers) as executor:
+        for name, (commands, unparseable) in zip(names, executor.map(parse_function, paths, chunksize=16)):
+            functions[name] = commands
+            errors.extend(unparseable)
+    return functions, errors
@@ -10,6 +10,12 @@ from pymcfunc.data_formats.nbt_tags import String, Short, Byte, IntArray, Int, L
 from pymcfunc.proxies.selectors import JavaSelector
 
 
+def _nbt_path(key: str, type_: type) -> property:
+    """Makes a property that gives the path to an entry of the entity's NBT, which is only built once."""
+    path = NamedTag[type_](key)
+    return property(lambda self: path)
+
+
 class JavaEntity(JavaSelector):
     def __init_subclass__(cls, type_: str | None = None, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -23,25 +29,19 @@ class JavaEntity(JavaSelector):
                     JavaEntity.__init__(self, var, fh, **arguments)
             cls.__init__ = __init__
 
-    @property
-    def air(self) -> Path[Short]:
-        return NamedTag[Short]("Air")
+    air = _nbt_path("Air", Short)
 
     @air.setter
     def air(self, value: int):
         self.modify_nbt(self.air, "set", value=Short(value))
 
-    @property
-    def custom_name(self) -> Path[String]:
-        return NamedTag[String]("CustomName")
+    custom_name = _nbt_path("CustomName", String)
 
     @custom_name.setter
     def custom_name(self, value: str | None):
         self.modify_nbt(self.custom_name, "set", value=String(value or ""))
 
-    @property
-    def custom_name_visible(self) -> Path[Byte]:
-        return NamedTag[Byte]("custom_name_visible")
+    custom_name_visible = _nbt_path("custom_name_visible", Byte)
 
     @custom_name_visible.setter
     def custom_name_visible(self, value: bool):
@@ -51,69 +51,49 @@ class JavaEntity(JavaSelector):
     def custom_name_visible(self):
         del self.nbt.custom_name_visible
 
-    @property
-    def fall_distance(self) -> Path[Float]:
-        return NamedTag[Float]("fall_distance")
+    fall_distance = _nbt_path("fall_distance", Float)
 
     @fall_distance.setter
     def fall_distance(self, value: float):
         self.modify_nbt(self.fall_distance, "set", value=Float(value))
 
-    @property
-    def fire(self) -> Path[Short]:
-        return NamedTag[Short]("fire")
+    fire = _nbt_path("fire", Short)
 
     @fire.setter
     def fire(self, value: int):
         self.modify_nbt(self.fire, "set", value=Short(value))
 
-    @property
-    def glowing(self) -> Path[Byte]:
-        return NamedTag[Byte]("glowing")
+    glowing = _nbt_path("glowing", Byte)
 
     @glowing.setter
     def glowing(self, value: bool):
         self.modify_nbt(self.glowing, "set", value=Byte(int(value)))
 
-    @property
-    def has_visual_fire(self) -> Path[Byte]:
-        return NamedTag[Byte]("has_visual_fire")
+    has_visual_fire = _nbt_path("has_visual_fire", Byte)
 
     @has_visual_fire.setter
     def has_visual_fire(self, value: bool):
         self.modify_nbt(self.has_visual_fire, "set", value=Byte(int(value)))
 
-    @property
-    def id(self) -> Path[String]:
-        return NamedTag[String]("id")
+    id = _nbt_path("id", String)
 
     @id.setter
     def id(self, value: str):
         self.modify_nbt(self.id, "set", value=String(value))
 
-    @property
-    def invulnerable(self) -> Path[Byte]:
-        return NamedTag[Byte]("invulnerable")
+    invulnerable = _nbt_path("invulnerable", Byte)
 
     @invulnerable.setter
     def invulnerable(self, value: bool):
         self.modify_nbt(self.invulnerable, "set", value=Byte(int(value)))
 
-    @property
-    def motion(self) -> Path[List[Double]]:
-        return NamedTag[List[Double]]("motion")
+    motion = _nbt_path("motion", List[Double])
 
-    @property
-    def motion_x(self) -> Path[Double]:
-        return NamedTag[Double]("motion_x")
+    motion_x = _nbt_path("motion_x", Double)
 
-    @property
-    def motion_y(self) -> Path[Double]:
-        return NamedTag[Double]("motion_y")
+    motion_y = _nbt_path("motion_y", Double)
 
-    @property
-    def motion_z(self) -> Path[Double]:
-        return NamedTag[Double]("motion_z")
+    motion_z = _nbt_path("motion_z", Double)
 
     def set_motion(self, *,
                    x: float | None = None,
@@ -126,9 +106,7 @@ class JavaEntity(JavaSelector):
         if z is not None:
             self.nbt.motion[2] = Double(z)
 
-    @property
-    def no_gravity(self) -> Path[Byte]:
-        return NamedTag[Byte]("no_gravity")
+    no_gravity = _nbt_path("no_gravity", Byte)
 
     @no_gravity.setter
     def no_gravity(self, value: bool):
@@ -142,29 +120,19 @@ class JavaEntity(JavaSelector):
     def passengers(self, value: list[JavaEntity.NBT]):
         self.modify_nbt(self.passengers, "set", value=List[JavaEntity.NBT](value))
 
-    @property
-    def portal_cooldown(self) -> Path[Int]:
-        return NamedTag[Int]("portal_cooldown")
+    portal_cooldown = _nbt_path("portal_cooldown", Int)
 
     @portal_cooldown.setter
     def portal_cooldown(self, value: float):
         self.modify_nbt(self.portal_cooldown, "set", value=Int(value))
 
-    @property
-    def pos(self) -> Path[List[Double]]:
-        return NamedTag[List[Double]]("pos")
+    pos = _nbt_path("pos", List[Double])
 
-    @property
-    def pos_x(self) -> Path[Double]:
-        return NamedTag[Double]("pos_x")
+    pos_x = _nbt_path("pos_x", Double)
 
-    @property
-    def pos_y(self) -> Path[Double]:
-        return NamedTag[Double]("pos_y")
+    pos_y = _nbt_path("pos_y", Double)
 
-    @property
-    def pos_z(self) -> Path[Double]:
-        return NamedTag[Double]("pos_z")
+    pos_z = _nbt_path("pos_z", Double)
 
     def set_pos(self, *,
                 position: Coord | None = None,
@@ -180,17 +148,11 @@ class JavaEntity(JavaSelector):
             if y: self.nbt.pos[1] = Double(y)
             if z: self.nbt.pos[2] = Double(z)
 
-    @property
-    def rotation(self) -> Path[List[Float]]:
-        return NamedTag[List[Float]]("rotation")
+    rotation = _nbt_path("rotation", List[Float])
 
-    @property
-    def pitch(self) -> Path[Float]:
-        return NamedTag[Float]("pitch")
+    pitch = _nbt_path("pitch", Float)
 
-    @property
-    def yaw(self) -> Path[Float]:
-        return NamedTag[Float]("yaw")
+    yaw = _nbt_path("yaw", Float)
 
     def set_rotation(self, *,
                      rotation: Rotation | None = None,
@@ -203,9 +165,7 @@ class JavaEntity(JavaSelector):
             if pitch is not None: self.nbt.rotation[0] = Float(pitch)
             if yaw is not None: self.nbt.rotation[1] = Float(yaw)
 
-    @property
-    def silent(self) -> Path[Byte]:
-        return NamedTag[Byte]("silent")
+    silent = _nbt_path("silent", Byte)
 
     @silent.setter
     def silent(self, value: bool):
@@ -215,25 +175,19 @@ class JavaEntity(JavaSelector):
     def silent(self):
         del self.nbt.silent
 
-    @property
-    def tags(self) -> Path[List[String]]:
-        return NamedTag[List[String]]("tags")
+    tags = _nbt_path("tags", List[String])
 
     @tags.setter
     def tags(self, value: list[str]):
         self.modify_nbt(self.tags, "set", value=List[String](value))
 
-    @property
-    def ticks_frozen(self) -> Path[Int]:
-        return NamedTag[Int]("ticks_frozen")
+    ticks_frozen = _nbt_path("ticks_frozen", Int)
 
     @ticks_frozen.setter
     def ticks_frozen(self, value: float):
         self.modify_nbt(self.ticks_frozen, "set", value=Int(value))
 
-    @property
-    def uuid(self) -> Path[IntArray]:
-        return NamedTag[IntArray]("uuid")
+    uuid = _nbt_path("uuid", IntArray)
 
     @uuid.setter
     def uuid(self, value: UUID):
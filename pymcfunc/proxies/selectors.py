@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Literal, Any, TypedDict, Annotated, Union, TYPE_CHECKING
+import contextlib
+from typing import Literal, Any, TypedDict, Annotated, Union, TYPE_CHECKING, Iterator
 
 import pymcfunc.internal as internal
 from pymcfunc.data_formats.nbt_path import Path
@@ -27,7 +28,7 @@ class BaseSelector:
 
     @property
     def singleonly(self) -> bool:
-        return self.var in ['p', 'r']
+        return self.var in ['p', 'r', 's']
 
     @property
     def playeronly(self) -> bool:
@@ -82,6 +83,8 @@ class BaseSelector:
 
 class JavaSelector(BaseSelector):
     fh: JavaFunctionHandler
+    # the entries to merge and the data modify arguments collected by batch(), while it is active
+    _batch: tuple[dict[str, Any], list[dict[str, Any]]] | None = None
     def __init__(self, var: Literal['p', 'r', 'a', 'e', 's'],
                  fh: JavaFunctionHandler | None = None,
                  **arguments: Any):
@@ -90,7 +93,7 @@ class JavaSelector(BaseSelector):
     @property
     def singleonly(self) -> bool:
         self.arguments: JavaSelector.Arguments
-        return self.var in ['p', 'r'] or self.arguments.limit in {1, -1}
+        return self.var in ['p', 'r', 's'] or self.arguments.limit in {1, -1}
 
     @internal.immutable
     class Arguments:
@@ -212,8 +215,39 @@ class JavaSelector(BaseSelector):
         return self.fh.r.data_get(entity=self, path=path, scale=scale)
 
     @BaseSelector._ensure_fh_set
-    def merge_nbt(self, nbt: NBT) -> ExecutedCommand:
-        return self.fh.r.data_merge(entity=self, nbt=nbt)
+    def merge_nbt(self, nbt: NBT) -> ExecutedCommand | None:
+        if self._batch is None: return self.fh.r.data_merge(entity=self, nbt=nbt)
+        if self._batch[1]: self._flush_batch()
+        _merge_compound(self._batch[0], nbt)
+
+    @BaseSelector._ensure_fh_set
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Collects the NBT set on the entity inside the ``with`` block, and writes it when the block ends
+        as a single ``data merge``, instead of a command per property.
+
+        Values that merging can't write exactly, such as those at list indices or whole compounds (which merging would
+        combine with the existing compound instead of replacing it), are still written by ``data modify``,
+        after the merge. Writes are applied in the order they were made.
+        While batching, :py:meth:`merge_nbt` and :py:meth:`modify_nbt` return None.
+        Nothing is written if the block raises an exception.
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._batch = ({}, [])
+        try:
+            yield
+            self._flush_batch()
+        finally:
+            self._batch = None
+
+    def _flush_batch(self):
+        merge, modifications = self._batch
+        if merge: self.fh.r.data_merge(entity=self, nbt=Compound(merge))
+        for arguments in modifications: self.fh.r.data_modify(target_entity=self, **arguments)
+        self._batch = ({}, [])
 
     @BaseSelector._ensure_fh_set
     def modify_nbt(self, target_path: Path,
@@ -223,15 +257,25 @@ class JavaSelector(BaseSelector):
                    source_entity: _JavaSingleTarget | None = None,
                    source_storage: ResourceLocation | None = None,
                    source_path: Path | None = None,
-                   value: NBT | None = None) -> ExecutedCommand:
-        return self.fh.r.data_modify(target_entity=self,
-                                     target_path=target_path,
-                                     mode=mode, index=index,
-                                     source_block=source_block,
-                                     source_entity=source_entity,
-                                     source_storage=source_storage,
-                                     source_path=source_path,
-                                     value=value)
+                   value: NBT | None = None) -> ExecutedCommand | None:
+        arguments = dict(target_path=target_path,
+                         mode=mode, index=index,
+                         source_block=source_block,
+                         source_entity=source_entity,
+                         source_storage=source_storage,
+                         source_path=source_path,
+                         value=value)
+        if self._batch is None: return self.fh.r.data_modify(target_entity=self, **arguments)
+
+        keys = target_path.compound_keys() if mode == 'set' and value is not None and not isinstance(value, Compound) \
+            else None
+        target = str(target_path)
+        if keys is not None:
+            # later writes replace earlier ones below the path, but ones above it have to be written first
+            if any(_is_below(target, str(m['target_path'])) for m in self._batch[1]): self._flush_batch()
+            self._batch[1][:] = [m for m in self._batch[1] if not _is_below(str(m['target_path']), target)]
+            if _merge_value(self._batch[0], keys, value): return
+        self._batch[1].append(arguments)
 
     @BaseSelector._ensure_fh_set
     def tp(self, *,
@@ -247,6 +291,31 @@ class JavaSelector(BaseSelector):
     # TODO more of this
 
 
+def _is_below(path: str, parent: str) -> bool:
+    return path.startswith(parent) and (len(path) == len(parent) or path[len(parent)] in ".[{")
+
+def _merge_value(merge: dict[str, Any], keys: list[str], value: NBT) -> bool:
+    """Puts a value into the entries to merge at the end of ``keys``, unless a value that isn't a compound is in the way."""
+    for key in keys[:-1]:
+        entry = merge.get(key)
+        if entry is None: entry = merge[key] = {}
+        elif isinstance(entry, Compound): entry = merge[key] = dict(entry)
+        elif not isinstance(entry, dict): return False
+        merge = entry
+    merge[keys[-1]] = value
+    return True
+
+def _merge_compound(merge: dict[str, Any], nbt: NBT):
+    """Merges a compound into the entries to merge, in the way ``data merge`` does."""
+    for key, value in nbt.items():
+        entry = merge.get(key)
+        if isinstance(value, dict) and isinstance(entry, dict):
+            if isinstance(entry, Compound): entry = merge[key] = dict(entry)
+            _merge_compound(entry, value)
+        else:
+            merge[key] = value
+
+
 class BedrockSelector(BaseSelector):
     fh: BedrockFunctionHandler
     def __init__(self, var: Literal['p', 'r', 'a', 'e', 's'],
@@ -257,7 +326,7 @@ class BedrockSelector(BaseSelector):
     @property
     def singleonly(self) -> bool:
         self.arguments: BedrockSelector.Arguments
-        return self.var in ['p', 'r'] or self.arguments.c in {1, -1}
+        return self.var in ['p', 'r', 's'] or self.arguments.c in {1, -1}
 
     @internal.immutable
     class Arguments:
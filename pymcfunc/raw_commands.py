@@ -597,9 +597,9 @@ class BedrockRawCommands(BaseRawCommands):
                    AE("objective", True)])
                ])
     @_version(introduced="1.7.0.2")
-    def scoreboard_objective_setdisplay(self, slot: Literal['list', 'sidebar', 'belowname'],
-                                        objective: _BedrockObjectiveName | None = None,
-                                        sort_order: Literal['ascending', 'descending'] | None = None) -> ExecutedCommand: pass
+    def scoreboard_objectives_setdisplay(self, slot: Literal['list', 'sidebar', 'belowname'],
+                                         objective: _BedrockObjectiveName | None = None,
+                                         sort_order: Literal['ascending', 'descending'] | None = None) -> ExecutedCommand: pass
 
     @_command([AE("target", True)])
     @_version(introduced="1.7.0.2")
@@ -1215,11 +1215,11 @@ class JavaRawCommands(BaseRawCommands):
               AE("amplifier", True),
               AE("hide_particles", True)])
     @_version(introduced="13w09b")
-    def effect_clear(self, targets: _JavaTarget,
-                     effect: str,
-                     seconds: Annotated[int, Range(0, 1000000)] | None = None,
-                     amplifier: Annotated[int, Range(0, 255)] = 0,
-                     hide_particles: bool = False) -> ExecutedCommand: pass
+    def effect_give(self, targets: _JavaTarget,
+                    effect: str,
+                    seconds: Annotated[int, Range(0, 1000000)] | None = None,
+                    amplifier: Annotated[int, Range(0, 255)] = 0,
+                    hide_particles: bool = False) -> ExecutedCommand: pass
 
     @_command([AE("targets"),
               AE("enchantment"),
@@ -1294,6 +1294,9 @@ class JavaRawCommands(BaseRawCommands):
                     JavaRawCommands.ExecuteSubcommandHandler\
                         .Subcommand.subcommand(self, order, cmd_name, segment_name)(func)(self, *args, **kwargs)
                     return self
+                # kept for parsers, which need the grammar without a handler
+                wrapper.order = order
+                wrapper.segment_name = segment_name or func.__name__.replace("_", " ").strip()
                 return wrapper
             return decorator
 
@@ -1496,20 +1499,20 @@ class JavaRawCommands(BaseRawCommands):
                       AE("path"),
                       AE("type_"),
                       AE("scale")])
-        def store_result_block(self, target_pos: ResourceLocation,
-                               path: Path,
-                               type_: Literal["byte", "short", "int", "long", "float", "double"],
-                               scale: float) -> Self: pass
+        def store_result_storage(self, target: ResourceLocation,
+                                 path: Path,
+                                 type_: Literal["byte", "short", "int", "long", "float", "double"],
+                                 scale: float) -> Self: pass
 
         @_check_run
         @_subcommand([AE("target"),
                       AE("path"),
                       AE("type_"),
                       AE("scale")])
-        def store_success_block(self, target_pos: ResourceLocation,
-                                path: Path,
-                                type_: Literal["byte", "short", "int", "long", "float", "double"],
-                                scale: float) -> Self: pass
+        def store_success_storage(self, target: ResourceLocation,
+                                  path: Path,
+                                  type_: Literal["byte", "short", "int", "long", "float", "double"],
+                                  scale: float) -> Self: pass
 
         @_check_run
         @_subcommand([AE("command")])
@@ -1799,7 +1802,7 @@ class JavaRawCommands(BaseRawCommands):
     @_version(introduced="13w04a")
     def scoreboard_objectives_list(self) -> ExecutedCommand: pass
 
-    @_command([AE("objective"), AE("criteria"), AE("display_name")])
+    @_command([AE("objective"), AE("criteria"), AE("display_name", True)])
     @_version(introduced="13w04a")
     def scoreboard_objectives_add(self, objective: _JavaObjectiveName,
                                   criteria: str,
@@ -1811,8 +1814,8 @@ class JavaRawCommands(BaseRawCommands):
 
     @_command([AE("slot"), AE("objective", True)])
     @_version(introduced="13w04a")
-    def scoreboard_objective_setdisplay(self, slot: Literal['list', 'sidebar', 'belowname'],
-                                        objective: _JavaObjectiveName | None = None) -> ExecutedCommand: pass
+    def scoreboard_objectives_setdisplay(self, slot: Literal['list', 'sidebar', 'belowname'],
+                                         objective: _JavaObjectiveName | None = None) -> ExecutedCommand: pass
 
     @_command([AE("objective"),
                SE([LE("displayname"), AE("display_name")],
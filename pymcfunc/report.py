@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable
+
+from pymcfunc.build import FileStats
+from pymcfunc.command import validation_timer
+
+if TYPE_CHECKING: from pymcfunc.functions import BaseFunctionHandler, Function
+
+
+class BuildReport:
+    """
+    Records where the time, memory and bytes of a build go.
+
+    Generators are only measured if they run during the build, i.e. if the pack is deferred.
+    Other packs run their generators when they are decorated, so only their output is recorded.
+    """
+
+    def __init__(self, profile: bool = False):
+        """
+        Initialises the report.
+
+        :param bool profile: Whether to run every generator under :py:mod:`cProfile`
+        """
+        self.profile = profile
+        self.generators: dict[str, dict[str, Any]] = {}
+        self.functions: list[dict[str, Any]] = []
+        self.resources: list[dict[str, Any]] = []
+        self.phases: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Adds the wall time of the ``with`` block to a phase of the build."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def tracing(self):
+        """Traces memory allocations for the ``with`` block, if they aren't being traced already."""
+        started = not tracemalloc.is_tracing()
+        if started: tracemalloc.start()
+        try:
+            yield
+        finally:
+            if started: tracemalloc.stop()
+
+    def generate(self, name: str, generator: Callable[[BaseFunctionHandler], Any], fh: BaseFunctionHandler):
+        """
+        Runs a generator, recording its wall and CPU time, the time spent validating commands,
+        the peak memory it allocated, and optionally a profile.
+
+        :param str name: The namespaced name of the function
+        :param generator: The Python function that generates the commands
+        :param fh: The function handler to generate into
+        """
+        timer = [0.0]
+        token = validation_timer.set(timer)
+        memory = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile else None
+        wall_time, cpu_time = time.perf_counter(), time.process_time()
+        try:
+            if profiler is None: generator(fh)
+            else: profiler.runcall(generator, fh)
+        finally:
+            wall_time, cpu_time = time.perf_counter() - wall_time, time.process_time() - cpu_time
+            validation_timer.reset(token)
+            stats = self.generators[name] = {
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'validation_time': timer[0],
+                'peak_memory': tracemalloc.get_traced_memory()[1] - memory
+                if memory is not None and tracemalloc.is_tracing() else None
+            }
+            if profiler is not None:
+                profile = pstats.Stats(profiler)
+                stats['profile'] = [
+                    {'function': pstats.func_std_string(func), 'calls': calls, 'total_time': total, 'cumulative_time': cumulative}
+                    for func, (_, calls, total, cumulative, _) in
+                    sorted(profile.stats.items(), key=lambda item: item[1][3], reverse=True)[:20]
+                ]
+
+    def record(self, functions: dict[str, Function], files: FileStats):
+        """
+        Records every output file of the build.
+
+        :param functions: The function written to each output path
+        :param files: The size and timings of each output path
+        """
+        self.functions, self.resources = [], []
+        for path, (size, serialise_time, write_time) in files.items():
+            entry = {'path': path, 'bytes': size, 'serialise_time': serialise_time, 'write_time': write_time}
+            function = functions.get(path)
+            if function is None:
+                self.resources.append(entry)
+                continue
+            commands = Counter(c.name for c in function.fh.commands)
+            self.functions.append({
+                'name': function.namespaced, **entry,
+                **self.generators.get(function.namespaced, dict.fromkeys(('wall_time', 'cpu_time', 'validation_time', 'peak_memory'))),
+                'command_count': sum(commands.values()),
+                'commands': dict(commands.most_common())
+            })
+        self.phases['validation'] = sum(g['validation_time'] for g in self.generators.values())
+        self.phases['serialisation'] = sum(size[1] for size in files.values())
+        self.phases['io'] = sum(size[2] for size in files.values())
+
+    def as_json(self, sort: str = 'wall_time') -> dict[str, Any]:
+        """
+        Returns the report as JSON, with the functions and resources sorted in descending order.
+
+        :param str sort: The field to sort by, or ``commands.<name>`` for the number of a command
+        """
+        return {
+            'phases': self.phases,
+            'functions': sort_entries(self.functions, sort),
+            'resources': sort_entries(self.resources, sort if any(sort in r for r in self.resources) else 'bytes')
+        }
+
+    def write(self, path: str | os.PathLike, sort: str = 'wall_time'):
+        """
+        Writes the report to a JSON file.
+
+        :param path: The path of the file
+        :param str sort: The field to sort by, see :py:meth:`as_json`
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_json(sort), f, indent=2)
+
+
+def sort_entries(entries: list[dict[str, Any]], key: str) -> list[dict[str, Any]]:
+    """
+    Sorts the functions or resources of a report in descending order. Entries without the field go last.
+
+    :param entries: The entries to sort
+    :param str key: The field to sort by, or ``commands.<name>`` for the number of a command
+    """
+    def value(entry: dict[str, Any]):
+        if key.startswith("commands."): return entry.get('commands', {}).get(key.removeprefix("commands."), 0)
+        return entry.get(key)
+    return sorted(entries, key=lambda entry: (value(entry) is not None, value(entry) or 0), reverse=True)
@@ -0,0 +1,537 @@
+from __future__ import annotations
+
+import functools
+import re
+from typing import Iterable, Literal, NamedTuple, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pymcfunc.command import ExecutedCommand
+from pymcfunc.data_formats.nbt_tags import Int
+from pymcfunc.internal import split_arguments
+from pymcfunc.proxies.selectors import JavaSelector
+
+if TYPE_CHECKING:
+    from pymcfunc.functions import BaseFunctionHandler, Function
+
+_FAKE_PLAYER, _PLAYER, _ENTITY = 0, 1, 2
+
+def _wrap(val: int) -> int:
+    return (val - Int.min) % 2**32 + Int.min
+
+def _parse_range(range_: str) -> tuple[int, int]:
+    if ".." not in range_:
+        return int(range_), int(range_)
+    lower, upper = range_.split("..")
+    return int(lower) if lower else Int.min, int(upper) if upper else Int.max
+
+
+class _Selector(NamedTuple):
+    var: Literal['p', 'r', 'a', 'e', 's'] | None
+    name: str | None = None
+    tag: tuple[str, ...] = ()
+    not_tag: tuple[str, ...] = ()
+    type_: str | None = None
+    not_type: tuple[str, ...] = ()
+    scores: tuple[tuple[str, int, int], ...] = ()
+    limit: int | None = None
+
+    @classmethod
+    def parse(cls, target: str | JavaSelector) -> _Selector:
+        if isinstance(target, JavaSelector):
+            args = target.arguments
+            as_tuple = lambda v: () if v is None else (v,) if isinstance(v, str) else tuple(v)
+            scores = tuple((k, *(_parse_range(str(v)))) for k, v in (args.scores or {}).items())
+            return cls(target.var, tag=as_tuple(args.tag), not_tag=as_tuple(args.not_tag),
+                       type_=args.type_, not_type=as_tuple(args.not_type), scores=scores, limit=args.limit)
+        if not target.startswith("@"):
+            return cls(None, name=target)
+
+        var, _, arguments = target[1:].partition("[")
+        tag, not_tag, type_, not_type, scores, limit = [], [], None, [], [], None
+        for argument in split_arguments(arguments.removesuffix("]").replace(",", " ")) if "{" not in arguments \
+                else re.findall(r"[\w.+-]+=!?(?:\{[^}]*}|[^,\]]*)", arguments):
+            key, _, value = argument.partition("=")
+            negated = value.startswith("!")
+            value = value.removeprefix("!")
+            if key == "tag": (not_tag if negated else tag).append(value)
+            elif key == "type":
+                if negated: not_type.append(value)
+                else: type_ = value
+            elif key == "limit": limit = int(value)
+            elif key == "scores":
+                for score in value.strip("{}").split(","):
+                    if score: scores.append((score.split("=")[0], *_parse_range(score.split("=")[1])))
+            else:
+                raise ValueError(f"Selector argument `{key}` is not supported by the simulation (Got `{target}`)")
+        return cls(var, tag=tuple(tag), not_tag=tuple(not_tag), type_=type_, not_type=tuple(not_type),
+                   scores=tuple(scores), limit=limit)
+
+_SELF = _Selector('s')
+
+@functools.lru_cache(maxsize=4096)
+def _parse(command: str) -> tuple:
+    tokens = split_arguments(command.strip().removeprefix("/"))
+    if len(tokens) == 0 or tokens[0].startswith("#"):
+        return ("noop",)
+    if tokens[0] == "execute":
+        subcommands = []
+        i = 1
+        while i < len(tokens):
+            if tokens[i] == "run":
+                return ("execute", tuple(subcommands), _parse(" ".join(tokens[i+1:])))
+            elif tokens[i] == "as":
+                subcommands.append(("as", _Selector.parse(tokens[i+1])))
+                i += 2
+            elif tokens[i] in ("if", "unless") and tokens[i+1] == "entity":
+                subcommands.append((tokens[i], "entity", _Selector.parse(tokens[i+2])))
+                i += 3
+            elif tokens[i] in ("if", "unless") and tokens[i+1] == "score" and tokens[i+4] == "matches":
+                subcommands.append((tokens[i], "score", _Selector.parse(tokens[i+2]), tokens[i+3],
+                                    *_parse_range(tokens[i+5])))
+                i += 6
+            elif tokens[i] == "at":
+                subcommands.append(("at", _Selector.parse(tokens[i+1])))
+                i += 2
+            elif tokens[i] in ("in", "anchored", "align"):
+                # positions are not simulated, so these only consume their arguments
+                i += 2
+            elif tokens[i] in ("positioned", "rotated", "facing"):
+                i += 3 if tokens[i+1] == "as" or tokens[i] == "rotated" else 4
+            else:
+                raise ValueError(f"Execute subcommand `{tokens[i]}` is not supported by the simulation (Got `{command}`)")
+        return ("noop",)
+    if tokens[0] == "scoreboard" and tokens[1] == "objectives" and tokens[2] == "add":
+        return ("objective", tokens[3])
+    if tokens[0] == "scoreboard" and tokens[1] == "players":
+        action = tokens[2]
+        if action in ("set", "add", "remove"):
+            return (action, _Selector.parse(tokens[3]), tokens[4], int(tokens[5]))
+        elif action == "reset":
+            return (action, _Selector.parse(tokens[3]), tokens[4] if len(tokens) > 4 else None)
+        elif action == "operation":
+            return (action, _Selector.parse(tokens[3]), tokens[4], tokens[5], _Selector.parse(tokens[6]), tokens[7])
+        return ("noop",)
+    if tokens[0] == "tag" and tokens[2] in ("add", "remove"):
+        return ("tag", _Selector.parse(tokens[1]), tokens[2], tokens[3])
+    if tokens[0] == "kill":
+        return ("kill", _Selector.parse(tokens[1] if len(tokens) > 1 else "@s"))
+    if tokens[0] == "function":
+        return ("function", tokens[1])
+    return ("noop",)
+
+
+class ScoreboardSimulation:
+    """
+    Simulates the scoreboard state of many entities at once, for capacity planning.
+
+    Scores are kept as NumPy ``int32`` columns per objective over an entity axis,
+    and selector-filtered scoreboard commands are applied as masked vector operations
+    with the same 32-bit wraparound, floor division and floor modulo semantics as Java Edition.
+    Positions are not simulated; ``@p`` and ``@r`` pick from players in the order they were added.
+
+    .. note::
+       Requires NumPy to be installed.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialises the simulation.
+
+        :param int capacity: The number of entities to allocate space for up front
+        """
+        if np is None:
+            raise ImportError("ScoreboardSimulation requires NumPy to be installed")
+        self._size = 0
+        self._capacity = max(capacity, 1)
+        self._kind = np.zeros(self._capacity, dtype=np.int8)
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._type = np.full(self._capacity, -1, dtype=np.int32)
+        self._type_codes: dict[str, int] = {}
+        self._tags: dict[str, np.ndarray] = {}
+        self._objectives: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._names: dict[str, int] = {}
+        # selectors that only depend on entity kind, type, tags and liveness are cached until one of those changes
+        self._resolved: dict[_Selector, np.ndarray] = {}
+        self.functions: dict[str, list[str]] = {}
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, count: int) -> np.ndarray:
+        if self._size + count > self._capacity:
+            capacity = max(self._capacity*2, self._size+count)
+            grow = lambda a, fill: np.concatenate([a, np.full(capacity-len(a), fill, dtype=a.dtype)])
+            self._kind = grow(self._kind, 0)
+            self._alive = grow(self._alive, False)
+            self._type = grow(self._type, -1)
+            self._tags = {k: grow(v, False) for k, v in self._tags.items()}
+            self._objectives = {k: (grow(v, 0), grow(p, False)) for k, (v, p) in self._objectives.items()}
+            self._capacity = capacity
+        indices = np.arange(self._size, self._size+count)
+        self._size += count
+        self._alive[indices] = True
+        self._resolved.clear()
+        return indices
+
+    def spawn(self, count: int, type_: str = "minecraft:armor_stand", tags: Iterable[str] = ()) -> np.ndarray:
+        """
+        Adds entities to the simulation.
+
+        :param int count: The number of entities to add
+        :param str type_: The entity type, for ``type=`` selector arguments
+        :param tags: The tags to give the entities
+        :return: The indices of the new entities on the entity axis
+        """
+        indices = self._reserve(count)
+        self._kind[indices] = _ENTITY
+        self._type[indices] = self._type_codes.setdefault(type_.removeprefix("minecraft:"), len(self._type_codes))
+        for tag in tags:
+            self._tag_column(tag)[indices] = True
+        return indices
+
+    def player(self, name: str) -> int:
+        """
+        Adds a player to the simulation, or returns the existing one.
+
+        :param str name: The name of the player
+        :return: The index of the player on the entity axis
+        """
+        index = self._holder(name)
+        self._kind[index] = _PLAYER
+        self._resolved.clear()
+        self._type[index] = self._type_codes.setdefault("player", len(self._type_codes))
+        return index
+
+    def objective(self, name: str):
+        """
+        Adds an objective, if it does not exist yet.
+
+        :param str name: The name of the objective
+        """
+        self._column(name)
+
+    def define_function(self, name: str, commands: Iterable[str | ExecutedCommand] | BaseFunctionHandler):
+        """
+        Makes a function available to the ``function`` command.
+
+        :param str name: The namespaced name of the function
+        :param commands: The commands of the function
+        """
+        self.functions[name] = [c.command_string if isinstance(c, ExecutedCommand) else c for c in commands]
+
+    def scores(self, objective: str) -> np.ma.MaskedArray:
+        """
+        Returns the scores of an objective over the entity axis. Score holders without a score are masked.
+
+        :param str objective: The name of the objective
+        """
+        values, present = self._column(objective)
+        return np.ma.MaskedArray(values[:self._size], mask=~present[:self._size])
+
+    def score(self, holder: str | int, objective: str) -> int | None:
+        """
+        Returns the score of a single score holder, or None if it does not have one.
+
+        :param holder: The name or index of the score holder
+        :param str objective: The name of the objective
+        """
+        index = self._names.get(holder) if isinstance(holder, str) else holder
+        values, present = self._column(objective)
+        if index is None or not present[index]: return None
+        return int(values[index])
+
+    def run(self, commands: str | ExecutedCommand | Function | BaseFunctionHandler | Iterable[str | ExecutedCommand]):
+        """
+        Runs commands against the simulated scoreboard. Commands that do not affect scores are ignored.
+
+        :param commands: A command string, or an iterable of commands such as a function handler
+        """
+        if isinstance(commands, (str, ExecutedCommand)): commands = [commands]
+        elif hasattr(commands, 'fh'): commands = commands.fh
+        for command in commands:
+            self._execute(_parse(command.command_string if isinstance(command, ExecutedCommand) else command), None)
+
+    def tick(self, commands: str | Function | BaseFunctionHandler | Iterable[str | ExecutedCommand], ticks: int = 1):
+        """
+        Runs the same commands once per tick for several ticks.
+
+        :param commands: The commands to run every tick
+        :param int ticks: The number of ticks to simulate
+        """
+        if isinstance(commands, (str, ExecutedCommand)): commands = [commands]
+        elif hasattr(commands, 'fh'): commands = commands.fh
+        parsed = [_parse(c.command_string if isinstance(c, ExecutedCommand) else c) for c in commands]
+        for _ in range(ticks):
+            for p in parsed: self._execute(p, None)
+
+    def _holder(self, name: str) -> int:
+        if name not in self._names:
+            index, = self._reserve(1)
+            self._kind[index] = _FAKE_PLAYER
+            self._names[name] = int(index)
+        return self._names[name]
+
+    def _tag_column(self, tag: str) -> np.ndarray:
+        if tag not in self._tags:
+            self._tags[tag] = np.zeros(self._capacity, dtype=bool)
+        return self._tags[tag]
+
+    def _column(self, objective: str) -> tuple[np.ndarray, np.ndarray]:
+        if objective not in self._objectives:
+            self._objectives[objective] = (np.zeros(self._capacity, dtype=np.int32),
+                                           np.zeros(self._capacity, dtype=bool))
+        return self._objectives[objective]
+
+    def _mask(self, selector: _Selector, candidates: np.ndarray | None = None) -> np.ndarray:
+        """Returns a mask over ``candidates`` (or the whole entity axis) of the entities the selector's filters match."""
+        index = slice(0, self._size) if candidates is None else candidates
+        mask = self._alive[index].copy()
+        if selector.var in ('p', 'r', 'a'): mask &= self._kind[index] == _PLAYER
+        elif selector.var == 'e': mask &= self._kind[index] != _FAKE_PLAYER
+        for tag in selector.tag:
+            mask &= self._tags[tag][index] if tag in self._tags else False
+        for tag in selector.not_tag:
+            if tag in self._tags: mask &= ~self._tags[tag][index]
+        if selector.type_ is not None:
+            mask &= self._type[index] == self._type_codes.get(selector.type_.removeprefix("minecraft:"), -2)
+        for type_ in selector.not_type:
+            mask &= self._type[index] != self._type_codes.get(type_.removeprefix("minecraft:"), -2)
+        for objective, lower, upper in selector.scores:
+            values, present = self._column(objective)
+            mask &= present[index] & (values[index] >= lower) & (values[index] <= upper)
+        return mask
+
+    def _filter(self, selector: _Selector, executors: np.ndarray | None) -> np.ndarray | None:
+        """Filters the executors by an ``@s`` selector's arguments."""
+        if executors is None or selector == _SELF: return executors
+        return executors[self._mask(selector, executors)]
+
+    def _resolve(self, selector: _Selector) -> np.ndarray:
+        """Resolves a selector that does not depend on the executor."""
+        if selector in self._resolved: return self._resolved[selector]
+        if selector.var is None:
+            indices = np.array([self._holder(selector.name)])
+        else:
+            indices = np.flatnonzero(self._mask(selector))
+            limit = 1 if selector.var in ('p', 'r') else selector.limit
+            if selector.var == 'r' and len(indices) > 0:
+                indices = np.random.permutation(indices)
+            indices = indices[:limit] if limit is not None else indices
+        if selector.var != 'r' and len(selector.scores) == 0:
+            self._resolved[selector] = indices
+        return indices
+
+    def _execute(self, parsed: tuple, executors: np.ndarray | None, unique: bool = True):
+        """
+        Runs a parsed command once from the server if ``executors`` is None, otherwise once per executor.
+        ``unique`` is whether no executor appears more than once, which allows paired operations to be vectorised.
+        """
+        kind = parsed[0]
+        if kind == "execute":
+            _, subcommands, inner = parsed
+            for subcommand in subcommands:
+                if executors is not None and len(executors) == 0: return
+                if subcommand[0] == "as":
+                    selector = subcommand[1]
+                    if selector.var == 's':
+                        executors = self._filter(selector, executors)
+                    else:
+                        resolved = self._resolve(selector)
+                        unique = executors is None or len(executors) == 1
+                        executors = resolved if executors is None else np.tile(resolved, len(executors))
+                elif subcommand[0] == "at":
+                    selector = subcommand[1]
+                    if selector.var == 's':
+                        executors = self._filter(selector, executors)
+                    elif executors is not None:
+                        count = len(self._resolve(selector))
+                        unique &= count <= 1
+                        executors = np.repeat(executors, count)
+                    elif len(self._resolve(selector)) != 1:
+                        raise ValueError("`execute at` from the server is only supported for a single entity")
+                elif subcommand[1] == "entity":
+                    selector = subcommand[2]
+                    if selector.var == 's' and executors is not None:
+                        mask = self._mask(selector, executors)
+                    else:
+                        mask = len(self._resolve(selector)) > 0
+                    if subcommand[0] == "unless": mask = np.logical_not(mask)
+                    if executors is None and not mask: return
+                    elif executors is not None: executors = executors[np.broadcast_to(mask, executors.shape)]
+                else:
+                    _, _, holder, objective, lower, upper = subcommand
+                    values, present = self._column(objective)
+                    holders = executors if holder.var == 's' and executors is not None else self._resolve(holder)
+                    mask = present[holders] & (values[holders] >= lower) & (values[holders] <= upper)
+                    if holder.var != 's' or executors is None: mask = len(holders) == 1 and bool(mask[0])
+                    if subcommand[0] == "unless": mask = np.logical_not(mask)
+                    if executors is None and not mask: return
+                    elif executors is not None: executors = executors[np.broadcast_to(mask, executors.shape)]
+            self._execute(inner, executors, unique)
+        elif kind == "objective":
+            self._column(parsed[1])
+        elif kind in ("set", "add", "remove"):
+            _, targets, objective, value = parsed
+            targets, repeats = self._targets(targets, executors)
+            values, present = self._column(objective)
+            if kind == "set":
+                values[targets] = value
+            else:
+                if kind == "remove": value = -value
+                if repeats is None:
+                    repeats = 1
+                    if not unique: targets, repeats = np.unique(targets, return_counts=True)
+                values[targets] = (values[targets].astype(np.int64) + repeats*value).astype(np.int32)
+            present[targets] = True
+        elif kind == "reset":
+            _, targets, objective = parsed
+            targets, _ = self._targets(targets, executors)
+            for values, present in [self._column(objective)] if objective else self._objectives.values():
+                present[targets] = False
+                values[targets] = 0
+        elif kind == "operation":
+            self._operation(*parsed[1:], executors, unique)
+        elif kind == "tag":
+            _, targets, action, tag = parsed
+            targets, _ = self._targets(targets, executors)
+            self._tag_column(tag)[targets] = action == "add"
+            self._resolved.clear()
+        elif kind == "kill":
+            targets, _ = self._targets(parsed[1], executors)
+            targets = targets[self._kind[targets] != _FAKE_PLAYER]
+            self._alive[targets] = False
+            self._resolved.clear()
+            for values, present in self._objectives.values():
+                present[targets] = False
+        elif kind == "function":
+            for command in self.functions.get(parsed[1], []):
+                self._execute(_parse(command), executors, unique)
+
+    def _targets(self, selector: _Selector, executors: np.ndarray | None) -> tuple[np.ndarray, int | None]:
+        """
+        Returns the targets of a command, and how many times the command runs on them.
+        A count of None means the targets are paired with the executors and each runs once per occurrence.
+        """
+        if selector.var == 's':
+            if executors is None: return np.array([], dtype=np.int64), 1
+            return self._filter(selector, executors), None
+        return self._resolve(selector), 1 if executors is None else len(executors)
+
+    def _operation(self, targets: _Selector, target_objective: str, operation: str,
+                   sources: _Selector, source_objective: str, executors: np.ndarray | None, unique: bool):
+        target_values, target_present = self._column(target_objective)
+        source_values, source_present = self._column(source_objective)
+        independent = target_objective != source_objective and operation != "><"
+        if executors is None and 's' in (targets.var, sources.var): return
+
+        if targets.var == 's' and sources.var == 's':
+            pairs = self._filter(sources, self._filter(targets, executors))
+            if unique:
+                a = target_values[pairs].astype(np.int64)
+                b = source_values[pairs].astype(np.int64)
+                target_present[pairs] = source_present[pairs] = True
+                if operation == "><":
+                    target_values[pairs], source_values[pairs] = b, a
+                else:
+                    target_values[pairs] = self._apply(operation, a, b[:, None])
+                return
+            for e in pairs: self._scalar_operation(e, target_objective, operation, e, source_objective)
+            return
+
+        targets_unique = True
+        if targets.var == 's':
+            target_indices = self._filter(targets, executors)
+            targets_unique = unique
+            source_indices = self._resolve(sources)
+            sequence = [(t, source_indices) for t in target_indices]
+        elif sources.var == 's':
+            target_indices = self._resolve(targets)
+            source_indices = self._filter(sources, executors)
+            sequence = [(e, target_indices) for e in source_indices]
+        else:
+            target_indices = self._resolve(targets)
+            source_indices = np.tile(self._resolve(sources), 1 if executors is None else len(executors))
+            sequence = None
+        if len(target_indices) == 0 or len(source_indices) == 0: return
+
+        if operation != "><" and targets_unique and (independent or not self._overlaps(target_indices, source_indices)):
+            target_present[target_indices] = True
+            source_present[source_indices] = True
+            a = target_values[target_indices].astype(np.int64)
+            b = source_values[source_indices].astype(np.int64)
+            target_values[target_indices] = self._apply(operation, a, b[None, :])
+            return
+
+        if targets.var == 's':
+            for t, sources_ in sequence:
+                for s in sources_: self._scalar_operation(t, target_objective, operation, s, source_objective)
+        elif sources.var == 's':
+            for s, targets_ in sequence:
+                for t in targets_: self._scalar_operation(t, target_objective, operation, s, source_objective)
+        else:
+            for _ in range(1 if executors is None else len(executors)):
+                for t in target_indices:
+                    for s in self._resolve(sources):
+                        self._scalar_operation(t, target_objective, operation, s, source_objective)
+
+    def _overlaps(self, a: np.ndarray, b: np.ndarray) -> bool:
+        marked = np.zeros(self._size, dtype=bool)
+        marked[a] = True
+        return bool(marked[b].any())
+
+    @staticmethod
+    def _apply(operation: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Applies an operation from each row of ``b`` in order onto ``a``, with Java ``int`` semantics.
+        ``b`` has shape ``(len(a), 1)`` for paired operands, or ``(1, n)`` for ``n`` sources applied to every target.
+        """
+        if operation == "=":
+            res = np.broadcast_to(b[:, -1], a.shape)
+        elif operation == "+=":
+            res = a + b.sum(axis=1)
+        elif operation == "-=":
+            res = a - b.sum(axis=1)
+        elif operation == "*=":
+            # int64 multiplication wraps modulo 2**64, which preserves the low 32 bits
+            with np.errstate(over='ignore'):
+                res = a * np.multiply.reduce(b, axis=1)
+        elif operation == "<":
+            res = np.minimum(a, b.min(axis=1))
+        elif operation == ">":
+            res = np.maximum(a, b.max(axis=1))
+        elif operation in ("/=", "%="):
+            res = a.copy()
+            for column in b.T:
+                column = np.broadcast_to(column, res.shape)
+                nonzero = column != 0
+                if operation == "/=":
+                    res[nonzero] = (res[nonzero] // column[nonzero]).astype(np.int32)
+                else:
+                    res[nonzero] = res[nonzero] % column[nonzero]
+        else:
+            raise ValueError(f"Invalid operation `{operation}`")
+        return res.astype(np.int32)
+
+    def _scalar_operation(self, target: int, target_objective: str, operation: str, source: int, source_objective: str):
+        target_values, target_present = self._column(target_objective)
+        source_values, source_present = self._column(source_objective)
+        target_present[target] = source_present[source] = True
+        a, b = int(target_values[target]), int(source_values[source])
+        if operation == "><":
+            target_values[target], source_values[source] = b, a
+            return
+        if operation in ("/=", "%=") and b == 0: return
+        target_values[target] = {
+            "=": lambda: b,
+            "+=": lambda: _wrap(a+b),
+            "-=": lambda: _wrap(a-b),
+            "*=": lambda: _wrap(a*b),
+            "/=": lambda: _wrap(a//b),
+            "%=": lambda: a % b,
+            "<": lambda: min(a, b),
+            ">": lambda: max(a, b)
+        }[operation]()
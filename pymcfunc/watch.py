@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import ast
+import contextlib
+import importlib
+import os
+import pathlib
+import sys
+import time
+from types import ModuleType
+from typing import Any, Iterator
+
+from pymcfunc.build import BuildSummary
+from pymcfunc.pack import JavaPack
+
+
+@contextlib.contextmanager
+def _deferred() -> Iterator[None]:
+    """Makes packs created inside the block deferred, so that their modules can be imported without generating them."""
+    previous = JavaPack.deferred_by_default
+    JavaPack.deferred_by_default = True
+    try:
+        yield
+    finally:
+        JavaPack.deferred_by_default = previous
+
+
+class Watcher:
+    """
+    Rebuilds a pack whenever the Python source it is generated from changes.
+
+    Source files are polled with :py:func:`os.stat`. Every function remembers the modules its generator's module
+    imports, directly or indirectly, and when a file changes, only the generators that depend on it are run again.
+    Every other function reuses its previous commands and registrations, and only changed files are written.
+    """
+
+    def __init__(self, target: str, pack_format: int, description: str, datapack_folder: str = '.',
+                 indent: int | None = 2, interval: float = 0.25):
+        """
+        Initialises the watcher. Nothing is imported or built until :py:meth:`build` or :py:meth:`run` is called.
+
+        :param str target: The pack to watch, as ``module:attribute``, or ``module`` if the module contains one pack.
+                           The module should be the one that creates the pack.
+        :param int pack_format: The pack format of the pack
+        :param str description: The description of the pack
+        :param str datapack_folder: The folder to build the pack in
+        :param indent: The indent of JSON files, or None for no whitespace
+        :type indent: int | None
+        :param float interval: The number of seconds between polls of the source files
+        """
+        self.module_name, _, self.attribute = target.partition(":")
+        self.pack_format = pack_format
+        self.description = description
+        self.datapack_folder = datapack_folder
+        self.indent = indent
+        self.interval = interval
+        self.root = pathlib.Path.cwd().resolve()
+        self.mtimes: dict[str, float] = {}
+        self.dependencies: dict[str, set[str]] = {}
+        self.imports: dict[str, tuple[float, set[str]]] = {}
+        self.is_source: dict[str, bool] = {}
+        self.outputs: dict[str, tuple[str, list[Any], dict[str, Any]]] = {}
+
+    def _is_source(self, module: ModuleType) -> bool:
+        file = getattr(module, '__file__', None)
+        if file is None or module.__name__.split(".")[0] == 'pymcfunc': return False
+        if file not in self.is_source:
+            path = pathlib.Path(file).resolve()
+            self.is_source[file] = path.suffix == ".py" and self.root in path.parents \
+                and "site-packages" not in path.parts
+        return self.is_source[file]
+
+    def _sources(self) -> dict[str, ModuleType]:
+        return {name: module for name, module in list(sys.modules.items())
+                if name != '__main__' and self._is_source(module)}
+
+    def _imports(self, module: ModuleType, mtime: float) -> set[str]:
+        """Returns the names of the modules a module imports, parsing its source only if it has changed."""
+        if module.__name__ in self.imports and self.imports[module.__name__][0] == mtime:
+            return self.imports[module.__name__][1]
+        package = module.__name__ if hasattr(module, '__path__') else module.__name__.rpartition(".")[0]
+        imported = set()
+        for node in ast.walk(ast.parse(pathlib.Path(module.__file__).read_bytes())):
+            if isinstance(node, ast.Import):
+                imported.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ""
+                if node.level:
+                    parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                    base = f"{parent}.{base}".strip(".")
+                imported.add(base)
+                imported.update(f"{base}.{alias.name}" for alias in node.names)
+        self.imports[module.__name__] = (mtime, imported)
+        return imported
+
+    def _scan(self):
+        """Records the modification time of every source file, and which source modules each one imports."""
+        sources = self._sources()
+        self.mtimes = {name: os.stat(module.__file__).st_mtime for name, module in sources.items()}
+        direct = {name: {used for used in self._imports(module, self.mtimes[name]) if used in sources and used != name}
+                  for name, module in sources.items()}
+        self.dependencies = {}
+        for name in sources:
+            seen, stack = {name}, [name]
+            while stack:
+                for used in direct[stack.pop()] - seen:
+                    seen.add(used)
+                    stack.append(used)
+            self.dependencies[name] = seen
+
+    def _pack(self) -> JavaPack:
+        module = importlib.import_module(self.module_name)
+        if self.attribute: return getattr(module, self.attribute)
+        return next(value for value in vars(module).values() if isinstance(value, JavaPack))
+
+    def changed(self) -> set[str]:
+        """Returns the source modules whose files have changed since they were last loaded."""
+        changed = set()
+        for name, mtime in self.mtimes.items():
+            module = sys.modules.get(name)
+            try:
+                if module is None or os.stat(module.__file__).st_mtime != mtime: changed.add(name)
+            except OSError:
+                changed.add(name)
+        return changed
+
+    def build(self, changed: set[str] | None = None) -> BuildSummary:
+        """
+        Builds the pack, reloading the changed modules and running only the generators that depend on them.
+
+        :param changed: The modules that changed, or None to import and generate everything
+        :type changed: set[str] | None
+        :return: The files that were added, changed and removed
+        """
+        if changed is None:
+            importlib.invalidate_caches()
+            self.outputs = {}
+            stale = None
+        else:
+            # every module that registers onto the pack is reloaded, so that the pack is rebuilt from scratch,
+            # but only generators that depend on a changed module are run again
+            stale = {name for name, uses in self.dependencies.items() if uses & changed}
+        with _deferred():
+            if changed is not None:
+                reload = stale | {name for name, uses in self.dependencies.items() if self.module_name in uses}
+                reload.discard(self.module_name)
+                # the pack's module goes first, as it usually imports the modules that register onto the pack
+                order = [self.module_name] + sorted((name for name in reload if name in sys.modules),
+                                                    key=lambda name: len(self.dependencies.get(name, ())))
+                for name in order:
+                    importlib.reload(sys.modules[name])
+            pack = self._pack()
+        self._scan()
+
+        for function in list(pack.funcs):
+            if function.generated: continue
+            module = function.generator.__module__
+            cached = self.outputs.get(function.namespaced)
+            if stale is not None and cached is not None and cached[0] == module and module not in stale:
+                function.generator = None
+                function.fh.commands = cached[1]
+                if cached[2]: pack._merge(cached[2])
+                continue
+            snapshot = pack._snapshot()
+            pack.generate(functions=[function])
+            self.outputs[function.namespaced] = (module, function.fh.commands, pack._registrations_since(snapshot))
+
+        return pack.build(self.pack_format, self.description, self.datapack_folder, self.indent, incremental=True)
+
+    def run(self):
+        """Builds the pack, then rebuilds it every time a source file changes, until interrupted."""
+        start = time.perf_counter()
+        print(self.build())
+        print(f"Built in {time.perf_counter() - start:.2f}s, watching for changes")
+        while True:
+            time.sleep(self.interval)
+            changed = self.changed()
+            if not changed: continue
+            start = time.perf_counter()
+            try:
+                summary = self.build(changed)
+            except Exception as e:
+                print(f"Build failed: {type(e).__name__}: {e}")
+                self.mtimes.update((name, os.stat(sys.modules[name].__file__).st_mtime)
+                                   for name in changed if name in sys.modules)
+                continue
+            print(f"{', '.join(sorted(changed))} changed, rebuilt in {time.perf_counter() - start:.2f}s")
+            print(summary)
@@ -1,3 +1,7 @@
+import sys
+
+import pytest
+
 import pymcfunc as pmf
 
 def test_pytest():
@@ -6,4 +10,910 @@ def test_pytest():
     @p.function()
     def test_function(f: pmf.functions.JavaFunctionHandler):
         f.r.list()
-    print(p.funcs)
\ No newline at end of file
+    print(p.funcs)
+
+def test_simulation_execute_if_unless_entity():
+    pytest.importorskip("numpy")
+    from pymcfunc.simulation import ScoreboardSimulation
+    sim = ScoreboardSimulation()
+    entities = list(sim.spawn(3))
+    sim.run("execute if entity @e[tag=npc] run scoreboard players set #if o 1")
+    sim.run("execute unless entity @e[tag=npc] run scoreboard players set #unless o 1")
+    assert sim.score("#if", "o") is None and sim.score("#unless", "o") == 1
+    entities += list(sim.spawn(1, tags=["npc"]))
+    sim.run("execute if entity @e[tag=npc] run scoreboard players set #if o 2")
+    sim.run("execute unless entity @e[tag=npc] run scoreboard players set #unless o 2")
+    assert sim.score("#if", "o") == 2 and sim.score("#unless", "o") == 1
+
+    sim.run("scoreboard players set @e o 1")
+    sim.run("execute as @e unless entity @s[tag=npc] run scoreboard players add @s o 100")
+    sim.run("execute as @e if entity @s[tag=npc] run scoreboard players add @s o 1000")
+    assert [sim.score(e, "o") for e in entities] == [101, 101, 101, 1001]
+
+def test_simulation_execute_if_unless_score():
+    pytest.importorskip("numpy")
+    from pymcfunc.simulation import ScoreboardSimulation
+    sim = ScoreboardSimulation()
+    sim.run("scoreboard players set #a o 5")
+    sim.run("execute if score #a o matches 5 run scoreboard players set #if o 1")
+    sim.run("execute unless score #a o matches 5 run scoreboard players set #unless o 1")
+    sim.run("execute if score #a o matches 6.. run scoreboard players set #if2 o 1")
+    sim.run("execute unless score #a o matches 6.. run scoreboard players set #unless2 o 1")
+    assert [sim.score(h, "o") for h in ("#if", "#unless", "#if2", "#unless2")] == [1, None, None, 1]
+
+    entities = sim.spawn(3)
+    sim.run("scoreboard players set @e t 0")
+    sim.run("scoreboard players set @e[limit=1] t 7")
+    sim.run("execute as @e unless score @s t matches 7 run scoreboard players add @s t 1")
+    assert [sim.score(e, "t") for e in entities] == [7, 1, 1]
+
+def test_simulation_duplicate_targets():
+    pytest.importorskip("numpy")
+    from pymcfunc.simulation import ScoreboardSimulation
+    sim = ScoreboardSimulation()
+    sim.spawn(3)
+    sim.run("scoreboard players set @e o 0")
+    sim.run("execute as @e at @e run scoreboard players add @s o 1")
+    assert sim.scores("o").tolist() == [3, 3, 3]
+    sim.run("execute as @e at @e run scoreboard players remove @s o 2")
+    assert sim.scores("o").tolist() == [-3, -3, -3]
+
+def test_minifier_renames_only_score_arguments():
+    from pymcfunc.minify import Minifier
+    minifier = Minifier.rename('p', [], ['timer'], ['$x'])
+    objective, player = minifier.objectives['timer'], minifier.players['$x']
+    for unchanged in ['tellraw @a {"text":"timer done"}', 'tag @s add timer', 'say $x timer',
+                      'data modify storage p:timer timer set value "timer"']:
+        assert minifier.command(unchanged) == unchanged
+        assert minifier.text(unchanged) == unchanged
+    assert minifier.command("scoreboard players add $x timer 1") == f"scoreboard players add {player} {objective} 1"
+    assert minifier.command("scoreboard objectives add timer dummy") == f"scoreboard objectives add {objective} dummy"
+    assert minifier.command("execute as @e[scores={timer=1..}] if score $x timer matches 1 run scoreboard players "
+                            "operation @s timer += $x timer") == \
+        f"execute as @e[scores={{{objective}=1..}}] if score {player} {objective} matches 1 run scoreboard players " \
+        f"operation @s {objective} += {player} {objective}"
+    assert minifier.command('tellraw @a [{"score":{"name":"$x","objective":"timer"}}," timer"]') == \
+        f'tellraw @a [{{"score":{{"name":"{player}","objective":"{objective}"}}}}," timer"]'
+
+def test_minifier_keeps_objectives_and_players_separate():
+    from pymcfunc.minify import Minifier
+    minifier = Minifier({}, {'a': 'obj'}, {'a': 'player'})
+    assert minifier.command("scoreboard players set a a 1") == "scoreboard players set player obj 1"
+
+def test_minifier_avoids_names_the_pack_uses(tmp_path):
+    import json
+    from pymcfunc.minify import Minifier, short_name
+    clash, player_clash = short_name('timer', set()), short_name('$x', set(), "$")
+    assert Minifier.score_names(["scoreboard players add $y other 1", "execute if score @s timer matches 1",
+                                 'tellraw @a {"score":{"name":"$z","objective":"shown"}}']) == \
+        ({'other', 'timer', 'shown'}, {'$y', '@s', '$z'})
+    minifier = Minifier.rename('p', [], ['timer'], ['$x'], reserved_objectives=['timer', clash],
+                               reserved_players=[player_clash])
+    assert minifier.objectives['timer'] != clash and minifier.players['$x'] != player_clash
+
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function(export=True)
+    def main(f: pmf.functions.JavaFunctionHandler):
+        f.r.scoreboard_objectives_add(p.internal_objective("timer"), "dummy")
+        f.r.scoreboard_objectives_add(clash, "dummy")
+        f.r.scoreboard_players_add(p.sel('s', fh=f), clash, 1)
+        f.r.scoreboard_players_add(p.sel('s', fh=f), "timer", 1)
+    p.build(10, "A pack", str(tmp_path), minify=True)
+    renamed = json.loads((tmp_path / "name.minify.json").read_text())['objectives']['timer']
+    assert (tmp_path / "name/data/name/functions/main.mcfunction").read_text().splitlines() == [
+        f"scoreboard objectives add {renamed} dummy", f"scoreboard objectives add {clash} dummy",
+        f"scoreboard players add @s[] {clash} 1", f"scoreboard players add @s[] {renamed} 1"]
+    assert renamed != clash
+
+VANILLA_LOOT_TABLE = {
+    "type": "minecraft:chest",
+    "pools": [{
+        "rolls": {"type": "minecraft:uniform", "min": 1.0, "max": 3.0},
+        "bonus_rolls": 0.0,
+        "entries": [
+            {"type": "minecraft:item", "weight": 20, "name": "minecraft:saddle"},
+            {"type": "minecraft:item", "weight": 10, "name": "minecraft:wheat",
+             "functions": [{"function": "minecraft:set_count",
+                            "count": {"type": "minecraft:uniform", "min": 1.0, "max": 4.0}, "add": False}]},
+            {"type": "minecraft:item", "weight": 20, "name": "minecraft:book",
+             "functions": [{"function": "minecraft:enchant_randomly"}]}
+        ]
+    }]
+}
+VANILLA_PREDICATE = {"condition": "minecraft:entity_properties", "entity": "this",
+                     "predicate": {"flags": {"is_sneaking": True}}}
+VANILLA_ITEM_MODIFIER = {"function": "minecraft:set_count", "count": 2}
+
+@pytest.mark.parametrize("cls, data", [
+    ("loot_tables.LootTable", VANILLA_LOOT_TABLE),
+    ("predicates.Predicate", VANILLA_PREDICATE),
+    ("item_modifiers.ItemModifier", VANILLA_ITEM_MODIFIER),
+])
+def test_json_format_round_trip(cls, data):
+    import importlib, io, json
+    from pymcfunc.data_formats.base_formats import _same_json
+    module, _, name = cls.partition(".")
+    obj = getattr(importlib.import_module("pymcfunc.data_formats." + module), name).from_json(data)
+    assert _same_json(obj.as_json(), data)
+    stream = io.StringIO()
+    obj.write_json(stream)
+    assert json.loads(stream.getvalue()) == json.loads(json.dumps(obj.as_json()))
+
+def test_json_format_keeps_unknown_json():
+    from pymcfunc.data_formats.base_formats import UnparsedJson
+    from pymcfunc.data_formats.item_modifiers import ItemModifier
+    modifier = ItemModifier.from_json(VANILLA_ITEM_MODIFIER)
+    assert isinstance(modifier, UnparsedJson)
+    assert modifier.as_json() == VANILLA_ITEM_MODIFIER
+
+def test_mounted_files_are_copied(tmp_path):
+    import json
+    text = json.dumps(VANILLA_LOOT_TABLE, indent=4).encode("utf-8") + b"\n"
+    (tmp_path / "vanilla/data/minecraft/loot_tables/chests").mkdir(parents=True)
+    (tmp_path / "vanilla/data/minecraft/loot_tables/chests/simple_dungeon.json").write_bytes(text)
+    p = pmf.pack.JavaPack("name", version="1.19")
+    p.mount(tmp_path / "vanilla")
+    assert p.resource("loot_tables", "minecraft:chests/simple_dungeon").pools[0].entries[1].name == "minecraft:wheat"
+    p.build(10, "test", str(tmp_path / "out"))
+    assert (tmp_path / "out/name/data/minecraft/loot_tables/chests/simple_dungeon.json").read_bytes() == text
+
+@pytest.mark.parametrize("line, segment, args", [
+    ("effect give @s speed 10 1", "effect give",
+     {'targets': "@s", 'effect': "speed", 'seconds': "10", 'amplifier': "1"}),
+    ("effect give @a[distance=..5] minecraft:regeneration 30 2 true", "effect give",
+     {'targets': "@a[distance=..5]", 'effect': "minecraft:regeneration", 'seconds': "30", 'amplifier': "2",
+      'hide_particles': "true"}),
+    ("effect clear @s", "effect clear", {'targets': "@s"}),
+    ("effect clear @s minecraft:speed", "effect clear", {'targets': "@s", 'effect': "minecraft:speed"}),
+    ("data merge entity @s {NoAI:1b}", "data merge", {'entity': "@s", 'nbt': "{NoAI:1b}"}),
+    ("data get entity @s Pos[0]", "data get", {'entity': "@s", 'path': "Pos[0]"}),
+    ("data modify entity @s Motion set from storage p:s motion", "data modify",
+     {'target_entity': "@s", 'target_path': "Motion", 'mode': "set", 'source_storage': "p:s", 'source_path': "motion"}),
+    ("data modify storage p:s value set value 5", "data modify",
+     {'target_storage': "p:s", 'target_path': "value", 'mode': "set", 'value': "5"}),
+    ("data remove block ~ ~ ~ Items", "data remove", {'block': "~ ~ ~", 'path': "Items"}),
+    ("scoreboard objectives add kills playerKillCount", "scoreboard objectives add",
+     {'objective': "kills", 'criteria': "playerKillCount"}),
+    ("scoreboard objectives remove kills", "scoreboard objectives remove", {'objective': "kills"}),
+    ("scoreboard objectives setdisplay sidebar kills", "scoreboard objectives setdisplay",
+     {'slot': "sidebar", 'objective': "kills"}),
+    ("scoreboard players set @s o 1", "scoreboard players set", {'target': "@s", 'objective': "o", 'score': "1"}),
+    ("scoreboard players operation @s o += #x o", "scoreboard players operation",
+     {'targets': "@s", 'target_objective': "o", 'operation': "+=", 'source': "#x", 'source_objective': "o"}),
+    ("scoreboard players reset @a kills", "scoreboard players reset", {'targets': "@a", 'objective': "kills"}),
+])
+def test_parse_command(line, segment, args):
+    from pymcfunc.parser import parse_command
+    command = parse_command(line)
+    assert (command.segment, command.args) == (segment, args)
+
+def test_parse_execute_chain():
+    from pymcfunc.parser import parse_command
+    command = parse_command("execute as @e[type=zombie] at @s if score @s kills matches 5.. "
+                            "store result storage p:s v int 1 run data get entity @s Health")
+    subcommands = command.args['subcommands']
+    assert [segment for segment, _ in subcommands] == ["as", "at", "if score", "store result storage", "run"]
+    assert subcommands[2][1] == {'target': "@s", 'target_objective': "kills", 'comparator': "matches", 'range_': "5.."}
+    assert subcommands[3][1] == {'target': "p:s", 'path': "v", 'type_': "int", 'scale': "1"}
+    run = subcommands[-1][1]['command']
+    assert (run.segment, run.args) == ("data get", {'entity': "@s", 'path': "Health"})
+    assert parse_command("execute store success block ~ ~ ~ Items byte 1 run say hi").args['subcommands'][0] == \
+        ("store success block", {'target_pos': "~ ~ ~", 'path': "Items", 'type_': "byte", 'scale': "1"})
+
+def test_selector_batch():
+    from pymcfunc.proxies.selectors import JavaSelector
+    from pymcfunc.data_formats.nbt_path import NamedTag
+    from pymcfunc.data_formats.nbt_tags import Byte, Compound, Int, String
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function()
+    def batched(f: pmf.functions.JavaFunctionHandler):
+        s = JavaSelector('s', fh=f)
+        with s.batch():
+            s.modify_nbt(NamedTag("Health"), 'set', value=Int(5))
+            s.modify_nbt(NamedTag("Inventory")[0], 'set', value=Compound({'id': String("minecraft:stone")}))
+            s.modify_nbt(NamedTag("Tags"), 'append', value=String("x"))
+            s.modify_nbt(NamedTag("Brain").memories, 'set', value=Byte(1))
+            s.modify_nbt(NamedTag("Health"), 'set', value=Int(6))
+
+    assert str(p.funcs[0].fh).splitlines() == [
+        "data merge entity @s[] {Health:6,Brain:{memories:1b}}",
+        'data modify entity @s[] Inventory[0] set value {id:"minecraft:stone"}',
+        'data modify entity @s[] Tags append value "x"',
+    ]
+
+def test_selector_batch_keeps_order_of_overlapping_writes():
+    from pymcfunc.proxies.selectors import JavaSelector
+    from pymcfunc.data_formats.nbt_path import NamedTag
+    from pymcfunc.data_formats.nbt_tags import Byte, Compound
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function()
+    def batched(f: pmf.functions.JavaFunctionHandler):
+        s = JavaSelector('s', fh=f)
+        with s.batch():
+            s.modify_nbt(NamedTag("Brain"), 'set', value=Compound({}))
+            s.modify_nbt(NamedTag("Brain").memories, 'set', value=Byte(1))
+
+    assert str(p.funcs[0].fh).splitlines() == [
+        "data modify entity @s[] Brain set value {}",
+        "data merge entity @s[] {Brain:{memories:1b}}",
+    ]
+
+@pytest.mark.parametrize("snbt, tag, value", [
+    ("1e5", "String", "1e5"),
+    ("01", "String", "01"),
+    ("1.2.3", "String", "1.2.3"),
+    ("300b", "String", "300b"),
+    ("1.e5", "Double", 100000.0),
+    ("1e5d", "Double", 100000.0),
+    ("1E5D", "Double", 100000.0),
+    ("01d", "Double", 1.0),
+    (".5", "Double", 0.5),
+    ("5.", "Double", 5.0),
+    ("1.5e-3F", "Float", 0.0015),
+    ("+2", "Int", 2),
+    ("-7s", "Short", -7),
+    ("1b", "Byte", 1),
+])
+def test_snbt_scalars(snbt, tag, value):
+    from pymcfunc.data_formats.snbt import parse_snbt
+    parsed = parse_snbt(snbt)
+    assert type(parsed).__name__ == tag
+    assert parsed.py == pytest.approx(value) if isinstance(value, float) else parsed.py == value
+
+def test_snbt_round_trip():
+    from pymcfunc.data_formats.snbt import parse_snbt
+    text = '{a:1e5,b:[1.5d,2d],c:01,d:[I;1,2],e:"x\\"y",f:[B;true,0b],g:{h:[L;5l]},i:2147483648}'
+    parsed = parse_snbt(text)
+    assert parsed.py['a'] == "1e5" and parsed.py['c'] == "01" and parsed.py['i'] == "2147483648"
+    assert parse_snbt(str(parsed)) == parsed
+    with pytest.raises(ValueError):
+        parse_snbt("{a:1,}b")
+
+WORKER_PACK_MODULE = '''
+import pymcfunc as pmf
+
+decoy = pmf.pack.JavaPack("workers", version="1.19")
+pack = pmf.pack.JavaPack("workers", version="1.19", deferred=True)
+
+@pack.function()
+def first(f):
+    f.r.scoreboard_objectives_add("first", "dummy")
+    f.r.scoreboard_objectives_remove("first")
+
+@pack.function()
+def second(f):
+    f.r.scoreboard_objectives_add("second", "dummy")
+'''
+
+def test_generate_in_workers(tmp_path, monkeypatch):
+    import importlib
+    (tmp_path / "worker_pack_module.py").write_text(WORKER_PACK_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("worker_pack_module")
+    try:
+        module.pack.generate(workers=2)
+        assert [str(f.fh) for f in module.pack.funcs] == \
+            ["scoreboard objectives add first dummy\nscoreboard objectives remove first",
+             "scoreboard objectives add second dummy"]
+        assert module.pack._reference("worker_pack_module") == "worker_pack_module:pack"
+    finally:
+        del sys.modules["worker_pack_module"]
+
+def test_watcher_build_scopes_deferred_packs(tmp_path, monkeypatch):
+    import os
+    from pymcfunc.watch import Watcher
+    source = tmp_path / "watched_pack_module.py"
+    source.write_text(WORKER_PACK_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    watcher = Watcher("watched_pack_module:pack", 10, "test", str(tmp_path / "out"))
+    try:
+        watcher.build()
+        assert pmf.pack.JavaPack.deferred_by_default is False
+        assert sys.modules["watched_pack_module"].pack.deferred
+        output = tmp_path / "out/workers/data/workers/functions/second.mcfunction"
+        assert output.read_text() == "scoreboard objectives add second dummy"
+
+        source.write_text(WORKER_PACK_MODULE.replace('"second", "dummy"', '"changed", "dummy"'))
+        os.utime(source, (os.stat(source).st_atime, os.stat(source).st_mtime + 10))
+        watcher.build(watcher.changed())
+        assert pmf.pack.JavaPack.deferred_by_default is False
+        assert output.read_text() == "scoreboard objectives add changed dummy"
+    finally:
+        del sys.modules["watched_pack_module"]
+
+def test_report_generate():
+    import tracemalloc
+    from pymcfunc.command import validation_timer
+    from pymcfunc.report import BuildReport
+    p = pmf.pack.JavaPack("name", version="1.19", deferred=True)
+
+    @p.function()
+    def commands(f: pmf.functions.JavaFunctionHandler):
+        for i in range(50): f.r.scoreboard_objectives_add(f"o{i}", "dummy")
+
+    @p.function()
+    def starts_tracing(f: pmf.functions.JavaFunctionHandler):
+        tracemalloc.start()
+
+    report = BuildReport()
+    with report.tracing():
+        report.generate("name:commands", p.funcs[0].generator, p.funcs[0].fh)
+    try:
+        report.generate("name:starts_tracing", p.funcs[1].generator, p.funcs[1].fh)
+    finally:
+        tracemalloc.stop()
+    assert validation_timer.get() is None
+    assert 0 < report.generators["name:commands"]['validation_time'] <= report.generators["name:commands"]['wall_time']
+    assert report.generators["name:commands"]['peak_memory'] > 0
+    assert report.generators["name:starts_tracing"]['peak_memory'] is None
+    assert report.generators["name:starts_tracing"]['validation_time'] == 0
+
+def test_write_zip(tmp_path):
+    import zipfile
+    from pymcfunc.build import write_zip
+    plan = {"pack.mcmeta": lambda: '{"pack": {}}', "data/p/functions/ünïcode.mcfunction": lambda: "say hi\n" * 100,
+            "data/p/structures/s.nbt": lambda: bytes(range(256))}
+    write_zip(tmp_path / "a.zip", plan)
+    write_zip(tmp_path / "b.zip", plan, threads=1, max_in_flight=1)
+    with zipfile.ZipFile(tmp_path / "a.zip") as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == sorted(plan)
+        assert archive.read("data/p/functions/ünïcode.mcfunction") == b"say hi\n" * 100
+        assert archive.getinfo("data/p/functions/ünïcode.mcfunction").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("data/p/structures/s.nbt") == bytes(range(256))
+        assert archive.getinfo("data/p/structures/s.nbt").compress_type == zipfile.ZIP_STORED
+    assert (tmp_path / "a.zip").read_bytes() == (tmp_path / "b.zip").read_bytes()
+
+def test_write_zip_limits(tmp_path, monkeypatch):
+    from pymcfunc import build
+    plan = {f"f{i}": lambda: bytes(range(256)) for i in range(3)}
+    monkeypatch.setattr(build, "_ZIP_MAX_ENTRIES", 2)
+    with pytest.raises(ValueError, match="3 files"):
+        build.write_zip(tmp_path / "entries.zip", plan)
+    monkeypatch.setattr(build, "_ZIP_MAX_ENTRIES", 0xFFFE)
+    # each entry is a 32 byte header and 256 stored bytes
+    monkeypatch.setattr(build, "_ZIP_MAX_OFFSET", 400)
+    with pytest.raises(ValueError, match="offset of `f2`"):
+        build.write_zip(tmp_path / "offset.zip", plan)
+    monkeypatch.setattr(build, "_ZIP_MAX_OFFSET", 200)
+    with pytest.raises(ValueError, match="`f0` is 256 bytes"):
+        build.write_zip(tmp_path / "size.zip", plan)
+    assert list(tmp_path.iterdir()) == []
+
+SNEAKING = {'condition': "minecraft:entity_properties", 'entity': "this", 'predicate': {'flags': {'is_sneaking': True}}}
+
+def test_dedupe_shared_predicates(tmp_path):
+    import json
+    from pymcfunc.data_formats.predicates import AlternativePredicate, Predicate, RandomChancePredicate
+    p = pmf.pack.JavaPack("name", version="1.19")
+    for i in range(3):
+        # equal predicates that are separate objects
+        p.predicates[f"p{i}"] = AlternativePredicate(terms=[Predicate.from_json(SNEAKING),
+                                                            RandomChancePredicate(chance=i / 10)])
+    shared = p._shared_files(threshold=3)
+    assert len(shared.predicates) == 1
+    (name, predicate), = shared.predicates.items()
+    assert name.startswith("name:shared/") and predicate.as_json()['condition'] == "entity_properties"
+    reference = {'condition': "reference", 'name': name}
+
+    # objects made after the shared files were found are still replaced, as they are compared by their JSON
+    assert shared.replace(Predicate.from_json(SNEAKING)).as_json() == reference
+    changed = Predicate.from_json(SNEAKING)
+    changed.entity = "killer"
+    assert shared.replace(changed) is changed
+
+    p.build(10, "test", str(tmp_path), dedupe=3)
+    data = tmp_path / "name/data/name/predicates"
+    assert json.loads((data / (name.partition(":")[2] + ".json")).read_text())['entity'] == "this"
+    for i in range(3):
+        assert json.loads((data / f"p{i}.json").read_text())['terms'] == \
+            [reference, {'condition': "random_chance", 'chance': i / 10}]
+
+def test_reference_to_predicate_object(tmp_path):
+    import json
+    from pymcfunc.dedupe import canonical_json
+    from pymcfunc.data_formats.item_modifiers import ExplosionDecayItemModifier, ReferenceItemModifier
+    from pymcfunc.data_formats.predicates import AlternativePredicate, Predicate, ReferencePredicate
+    p = pmf.pack.JavaPack("name", version="1.19")
+    sneaking = Predicate.from_json(SNEAKING)
+    modifier = ExplosionDecayItemModifier()
+    reference = ReferencePredicate(reference=sneaking)
+    with pytest.raises(ValueError, match="has no name"):
+        reference.as_json()
+    p.predicates["sneaking"] = sneaking
+    p.predicates["either"] = AlternativePredicate(terms=[reference, ReferencePredicate(reference="other:p")])
+    p.item_modifiers["decay"] = modifier
+    p.item_modifiers["decay_again"] = ReferenceItemModifier(name=modifier)
+
+    p.build(10, "test", str(tmp_path), dedupe=2)
+    assert reference.name == "name:sneaking"
+    assert canonical_json(reference) == '{"condition":"reference","name":"name:sneaking"}'
+    data = tmp_path / "name/data/name"
+    assert json.loads((data / "predicates/either.json").read_text())['terms'] == \
+        [{'condition': "reference", 'name': "name:sneaking"}, {'condition': "reference", 'name': "other:p"}]
+    assert json.loads((data / "item_modifiers/decay_again.json").read_text())['name'] == "name:decay"
+
+def test_write_tree(tmp_path):
+    from pymcfunc.build import write_tree
+    plan = {f"data/p/functions/{i // 10}/f{i}.mcfunction": (lambda i=i: f"say {i}") for i in range(200)}
+    plan["data/p/structures/s.nbt"] = lambda: bytes(range(256))
+    stats = {}
+    summary = write_tree(tmp_path, plan, threads=4, max_in_flight=8, stats=stats)
+    assert sorted(summary.added) == sorted(plan) and not summary.changed and not summary.removed
+    for i in range(200):
+        assert (tmp_path / f"data/p/functions/{i // 10}/f{i}.mcfunction").read_text() == f"say {i}"
+    assert (tmp_path / "data/p/structures/s.nbt").read_bytes() == bytes(range(256))
+    assert stats["data/p/structures/s.nbt"][0] == 256 and stats.keys() == plan.keys()
+
+def test_pack_build(tmp_path):
+    import json
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function()
+    def setup(f: pmf.functions.JavaFunctionHandler):
+        f.r.scoreboard_objectives_add("o", "dummy")
+    p.minecraft_tags['load'].append("name:setup")
+
+    summary = p.build(10, "A pack", str(tmp_path))
+    root = tmp_path / "name"
+    assert json.loads((root / "pack.mcmeta").read_text()) == {'pack': {'pack_format': 10, 'description': "A pack"}}
+    assert (root / "data/name/functions/setup.mcfunction").read_text() == "scoreboard objectives add o dummy"
+    assert json.loads((root / "data/minecraft/tags/functions/load.json").read_text()) == {'values': ["name:setup"]}
+    assert "data/name/functions/setup.mcfunction" in summary.added
+
+NBT_SAMPLE = ('{name:"Steve \\"\\\\ \u00e9 \U0001F600",b:1b,s:-2s,i:2147483647,l:-9223372036854775808L,f:0.5f,d:1.25d,'
+              'ba:[B;-128b,0b,127b],ia:[I;1,-2,3],la:[L;1L,-2L],empty:[],'
+              'list:[{id:"minecraft:stone",Count:1b},{id:"minecraft:dirt"}],nested:{a:{b:[[1,2],[3]]}}}')
+
+@pytest.mark.parametrize("compression", [None, 'gzip', 'zlib'])
+@pytest.mark.parametrize("little_endian", [False, True])
+def test_nbt_binary_round_trip(compression, little_endian):
+    import io
+    from pymcfunc.data_formats.nbt_binary import read_nbt, write_nbt
+    from pymcfunc.data_formats.snbt import parse_snbt
+    tag = parse_snbt(NBT_SAMPLE)
+    fp = io.BytesIO()
+    write_nbt(fp, tag, "root", little_endian, compression)
+    for read_as in ('auto', compression):
+        name, read = read_nbt(io.BytesIO(fp.getvalue()), little_endian, read_as)
+        assert name == "root" and str(read) == str(tag) and read == tag
+    again = io.BytesIO()
+    write_nbt(again, read, "root", little_endian, compression)
+    assert again.getvalue() == fp.getvalue()
+
+def test_nbt_binary_file(tmp_path):
+    import gzip
+    from pymcfunc.data_formats.nbt_binary import read_nbt_file, write_nbt_file
+    from pymcfunc.data_formats.snbt import parse_snbt
+    tag = parse_snbt(NBT_SAMPLE)
+    write_nbt_file(tmp_path / "level.dat", tag)
+    assert gzip.decompress((tmp_path / "level.dat").read_bytes())[:10] == b"\x0a\x00\x00\x08\x00\x04name"
+    name, read = read_nbt_file(tmp_path / "level.dat", arrays='numpy')
+    assert name == "" and str(read) == str(tag)
+
+def _apply_patch(tag, patch):
+    """Applies a patch the way the game applies the commands it gives, to check that it reaches the new NBT."""
+    from pymcfunc.data_formats.nbt_tags import Compound
+    from pymcfunc.data_formats.snbt import parse_snbt
+
+    def merge(into, compound):
+        for key, value in compound.items():
+            if isinstance(into.get(key), Compound) and isinstance(value, Compound): merge(into[key], value)
+            else: into[key] = parse_snbt(str(value))
+
+    def steps(path):
+        components, node = [], path
+        while node is not None:
+            component = node._component.lstrip(".")
+            components.append(int(component[1:-1]) if component.startswith("[") else component.strip('"'))
+            node = node._parent
+        return components[::-1]
+
+    tag = parse_snbt(str(tag))
+    for mode, path, _ in patch.operations:
+        if mode == 'remove':
+            *parents, last = steps(path)
+            container = tag
+            for step in parents: container = container[step]
+            del container[last]
+    merge(tag, patch.merge)
+    for mode, path, value in patch.operations:
+        if mode == 'remove': continue
+        *parents, last = steps(path)
+        container = tag
+        for step in parents: container = container[step]
+        if mode == 'merge': merge(container[last], value)
+        else: container[last] = parse_snbt(str(value))
+    return tag
+
+@pytest.mark.parametrize("old, new", [
+    ('{a:1,b:{c:2,d:3}}', '{a:1,b:{c:2,d:4}}'),
+    ('{a:1,b:{c:2,d:3}}', '{b:{c:2}}'),
+    ('{a:1}', '{a:1b}'),
+    ('{a:[I;1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16]}', '{a:[I;1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,0]}'),
+    ('{a:[I;1,2,3]}', '{a:[I;1,2]}'),
+    ('{Inventory:[{id:"minecraft:stone",Count:1b,tag:{Damage:0}},{id:"minecraft:dirt",Count:64b}]}',
+     '{Inventory:[{id:"minecraft:stone",Count:2b,tag:{}},{id:"minecraft:dirt",Count:64b}]}'),
+    ('{a:[[1,2],[3,4]],b:{c:{d:"x"}}}', '{a:[[1,2],[3,5]],b:{c:{e:"y"}}}'),
+    ('{a:{b:1}}', '{a:"b"}'),
+    ('{a:1,b:2}', '{a:1,b:2}'),
+])
+def test_nbt_diff(old, new):
+    from pymcfunc.data_formats.nbt_diff import diff_nbt
+    from pymcfunc.data_formats.snbt import parse_snbt
+    old, new = parse_snbt(old), parse_snbt(new)
+    patch = diff_nbt(old, new)
+    assert bool(patch) == (str(old) != str(new))
+    assert str(_apply_patch(old, patch)) == str(new)
+
+def test_nbt_diff_commands():
+    from pymcfunc.data_formats.nbt_diff import diff_nbt
+    from pymcfunc.data_formats.snbt import parse_snbt
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function()
+    def func(f: pmf.functions.JavaFunctionHandler):
+        old, new = '{a:1,b:[{c:1b,d:"%s"}],e:3}', '{a:2,b:[{c:0b,d:"%s"}]}'
+        diff_nbt(parse_snbt(old % ("x" * 50)), parse_snbt(new % ("x" * 50))).commands(f, storage="p:s")
+    p.generate()
+    assert str(p.funcs[0].fh).splitlines() == ["data remove storage p:s e", "data merge storage p:s {a:2}",
+                                               "data modify storage p:s b[0] merge value {c:0b}"]
+
+def _evaluate(predicate, world):
+    """Evaluates a predicate as the game would, given whether each of its game-dependent terms passes."""
+    import json
+    from pymcfunc.data_formats.predicates import AlternativePredicate, InvertedPredicate, KilledByPlayerPredicate, \
+        RandomChancePredicate, ValueCheckPredicate
+    if isinstance(predicate, AlternativePredicate): return any(_evaluate(t, world) for t in predicate.terms)
+    if isinstance(predicate, InvertedPredicate): return not _evaluate(predicate.term, world)
+    if isinstance(predicate, KilledByPlayerPredicate): return world['killed_by_player'] != bool(predicate.inverse)
+    if isinstance(predicate, RandomChancePredicate) and predicate.chance in (0, 1): return predicate.chance == 1
+    if isinstance(predicate, ValueCheckPredicate): return predicate.value == predicate.range
+    return world[json.dumps(predicate.as_json(), sort_keys=True)]
+
+def test_simplify_predicate_equivalence():
+    import itertools
+    import json
+    import random
+    from pymcfunc.data_formats.predicates import AlternativePredicate, InvertedPredicate, KilledByPlayerPredicate, \
+        RandomChancePredicate, ReferencePredicate, TimeCheckPredicate, ValueCheckPredicate, WeatherCheckPredicate
+    from pymcfunc.data_formats.predicate_simplifier import simplify_conditions, simplify_predicate
+    leaves = [RandomChancePredicate(chance=0.5), WeatherCheckPredicate(raining=True, thundering=None), ReferencePredicate(reference="p:r"),
+              TimeCheckPredicate(value=100)]
+    names = [json.dumps(leaf.as_json(), sort_keys=True) for leaf in leaves] + ['killed_by_player']
+    terms = leaves + [KilledByPlayerPredicate(inverse=False), KilledByPlayerPredicate(inverse=True),
+                      RandomChancePredicate(chance=1), RandomChancePredicate(chance=0),
+                      ValueCheckPredicate(value=1, range=2)]
+    worlds = [dict(zip(names, values)) for values in itertools.product((False, True), repeat=len(names))]
+    rng = random.Random(0)
+
+    def tree(depth):
+        if depth == 0 or rng.random() < 0.3: return rng.choice(terms)
+        if rng.random() < 0.3: return InvertedPredicate(term=tree(depth - 1))
+        return AlternativePredicate(terms=[tree(depth - 1) for _ in range(rng.randint(0, 3))])
+
+    for _ in range(200):
+        predicate = tree(4)
+        simplified = simplify_predicate(predicate)
+        assert all(_evaluate(simplified, world) == _evaluate(predicate, world) for world in worlds), predicate
+        conditions = [tree(3) for _ in range(rng.randint(0, 3))]
+        simplified_conditions = simplify_conditions(conditions)
+        assert all(all(_evaluate(c, world) for c in simplified_conditions) == all(_evaluate(c, world) for c in conditions)
+                   for world in worlds), conditions
+
+def test_simplify_predicate():
+    from pymcfunc.data_formats.predicates import AlternativePredicate, InvertedPredicate, RandomChancePredicate, \
+        ReferencePredicate, WeatherCheckPredicate
+    from pymcfunc.data_formats.predicate_simplifier import predicate_cost, simplify_conditions, simplify_predicate
+    cheap, expensive = WeatherCheckPredicate(raining=True, thundering=None), ReferencePredicate(reference="p:r")
+    simplified = simplify_predicate(AlternativePredicate(terms=[expensive, AlternativePredicate(terms=[cheap, cheap])]))
+    assert simplified == AlternativePredicate(terms=[cheap, expensive])
+    assert predicate_cost(cheap) < predicate_cost(expensive)
+    assert simplify_conditions([expensive, RandomChancePredicate(chance=1), cheap]) == [cheap, expensive]
+    assert simplify_conditions([expensive, RandomChancePredicate(chance=0)]) == [AlternativePredicate(terms=[])]
+    assert simplify_predicate(AlternativePredicate(terms=[cheap, InvertedPredicate(term=cheap)])) \
+        == InvertedPredicate(term=AlternativePredicate(terms=[]))
+
+def test_write_tree_incremental(tmp_path, monkeypatch):
+    import json
+    from pymcfunc import build
+    plan = {"a.txt": lambda: "a", "b.txt": lambda: "b", "sub/c.txt": lambda: "c"}
+    assert sorted(build.write_tree(tmp_path, plan, incremental=True).added) == sorted(plan)
+    before = {path: (tmp_path / path).stat().st_mtime_ns for path in plan}
+
+    plan = {"a.txt": lambda: "a", "b.txt": lambda: "b2", "d.txt": lambda: b"d"}
+    summary = build.write_tree(tmp_path, plan, incremental=True)
+    assert (summary.added, summary.changed, summary.removed, summary.unchanged) == \
+           (["d.txt"], ["b.txt"], ["sub/c.txt"], ["a.txt"])
+    assert (tmp_path / "a.txt").stat().st_mtime_ns == before["a.txt"]
+    assert (tmp_path / "b.txt").read_text() == "b2" and not (tmp_path / "sub").exists()
+    assert json.loads((tmp_path / build.MANIFEST_NAME).read_text())['files'].keys() == plan.keys()
+
+    monkeypatch.setattr(build, "_generator_version", lambda: "another version")
+    summary = build.write_tree(tmp_path, plan, incremental=True)
+    assert not summary.unchanged and sorted(summary.changed) == sorted(plan)
+
+def test_write_tree_full_build_removes_stale_files(tmp_path):
+    from pymcfunc.build import write_tree
+    write_tree(tmp_path, {"a.txt": lambda: "a", "old/b.txt": lambda: "b"})
+    (tmp_path / "mine.txt").write_text("not from a build")
+    summary = write_tree(tmp_path, {"a.txt": lambda: "a"})
+    assert summary.removed == ["old/b.txt"] and summary.changed == ["a.txt"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".pymcfunc_manifest.json", "a.txt", "mine.txt"]
+
+@pytest.mark.parametrize("deferred", [True, False])
+def test_tree_shake(tmp_path, deferred):
+    from pymcfunc.data_formats.advancements import Advancement, Rewards
+    p = pmf.pack.JavaPack("name", version="1.19", deferred=deferred)
+    ran = []
+
+    def function(name, body=lambda f: f.r.say("x"), export=False):
+        def generator(f: pmf.functions.JavaFunctionHandler):
+            ran.append(name)
+            body(f)
+        generator.__name__ = name
+        return p.function(export=export)(generator)
+
+    function("unused")
+    scheduled = function("scheduled")
+    called = function("called", lambda f: f.r.schedule_function(scheduled, "1t"))
+    function("main", lambda f: f.r.function(called), export=True)
+    function("tagged")
+    p.tags['functions'] = {'group': ["name:tagged"]}
+    p.minecraft_tags['load'].append("#name:group")
+    rewarded = function("rewarded")
+    p.advancements.append(advancement := Advancement(namespace="name", name="adv", rewards=Rewards(function=rewarded)))
+    p.export(advancement)
+
+    p.build(10, "A pack", str(tmp_path), tree_shake=True)
+    functions = tmp_path / "name/data/name/functions"
+    assert sorted(f.stem for f in functions.iterdir()) == ["called", "main", "rewarded", "scheduled", "tagged"]
+    assert (tmp_path / "name/data/name/advancements/adv.json").exists()
+    assert ("unused" in ran) != deferred
+
+def test_structure_templates():
+    import gzip
+    import io
+    import numpy
+    from pymcfunc.data_formats.nbt_binary import read_nbt
+    from pymcfunc.data_formats.nbt_tags import Compound, String
+    blocks = numpy.full((2, 3, 50), -1)
+    blocks[0, 0, 0] = 2
+    blocks[1, 2, 1] = 0
+    blocks[0, 1, 1] = 3
+    blocks[1, 0, 49] = 1
+    palette = ["stone", "minecraft:oak_log[axis=y]", "minecraft:chest[facing=north]", "stone"]
+    chest = Compound({'Items': [], 'CustomName': String('"Loot"')})
+    p = pmf.pack.JavaPack("name", version="1.19")
+
+    @p.function()
+    def build(f: pmf.functions.JavaFunctionHandler):
+        f.place_blocks("house", blocks, palette, (10, 64, 0), block_entities={(0, 0, 0): chest})
+
+    assert str(p.funcs[0].fh).splitlines() == ["place template name:house/0 10 64 0",
+                                               "place template name:house/1 10 64 48"]
+    name, template = read_nbt(io.BytesIO(gzip.decompress(p.structures["house/0"])))
+    assert template.py['size'] == [2, 3, 48] and template.py['DataVersion'] == 3120
+    assert template.py['palette'] == [{'Name': "minecraft:stone"},
+                                      {'Name': "minecraft:chest", 'Properties': {'facing': "north"}}]
+    records = sorted((tuple(b['pos']), template.py['palette'][b['state']]['Name'], b.get('nbt'))
+                     for b in template.py['blocks'])
+    assert records == [((0, 0, 0), "minecraft:chest", chest.py), ((0, 1, 1), "minecraft:stone", None),
+                       ((1, 2, 1), "minecraft:stone", None)]
+    _, second = read_nbt(io.BytesIO(gzip.decompress(p.structures["house/1"])))
+    assert second.py['size'] == [2, 3, 2] and second.py['blocks'] == [{'state': 0, 'pos': [1, 0, 1]}]
+    assert second.py['palette'] == [{'Name': "minecraft:oak_log", 'Properties': {'axis': "y"}}]
+
+def test_numerical_tags_compare_as_numbers():
+    from pymcfunc.data_formats.nbt_tags import Byte, Double, Float, Int, Long
+    assert Byte(5) == Int(5) == Long(5) == 5 and hash(Byte(5)) == hash(Int(5))
+    assert Float(0.5) == Double(0.5) and type(Byte(5)) is not type(Int(5))
+    assert (str(Byte(5)), str(Int(5)), str(Long(5)), str(Float(0.5))) == ("5b", "5", "5L", "0.5f")
+    with pytest.raises(ValueError):
+        Byte(128)
+    with pytest.raises(TypeError):
+        Int(1.5)
+
+def test_typed_arrays():
+    import array
+    import numpy
+    from pymcfunc.data_formats.nbt_tags import IntArray, Int, LongArray
+    values = [1, -2, 2147483647]
+    arrays = [IntArray(values), IntArray(array.array('i', values)), IntArray.frombuffer(array.array('i', values).tobytes()),
+              IntArray(numpy.array(values, dtype="int32"))]
+    for tag in arrays:
+        assert tag == arrays[0] and hash(tag) == hash(arrays[0])
+        assert str(tag) == "[I;1,-2,2147483647]" and tag.py == values and list(tag) == [Int(v) for v in values]
+    backing = array.array('q', [1, 2])
+    assert LongArray(backing)._val is backing
+    tag = IntArray(values)
+    tag[0] = 7
+    tag.append(8)
+    del tag[1]
+    assert str(tag) == "[I;7,2147483647,8]"
+    with pytest.raises(ValueError):
+        IntArray([2**31])
+
+def test_cached_snbt_is_invalidated():
+    from pymcfunc.data_formats.nbt_tags import Byte, Compound, IntArray, List, String
+    inner = Compound({'a': Byte(1)})
+    array = IntArray([1, 2])
+    items = List([inner])
+    root = Compound({'items': items, 'array': array})
+    assert str(root) == "{items:[{a:1b}],array:[I;1,2]}"
+    before = hash(root)
+    inner['a'] = Byte(2)
+    assert str(root) == "{items:[{a:2b}],array:[I;1,2]}" and hash(root) != before
+    array[1] = 3
+    items.append(Compound({'b': String("x")}))
+    assert str(root) == '{items:[{a:2b},{b:"x"}],array:[I;1,3]}'
+    del root['array']
+    assert str(root) == '{items:[{a:2b},{b:"x"}]}'
+    assert hash(root) == hash(Compound({'items': [{'a': Byte(2)}, {'b': "x"}]}))
+
+def test_intern():
+    from pymcfunc.data_formats.nbt_tags import Compound, String
+    first = Compound({'id': String("minecraft:stone")}).intern()
+    second = Compound({'id': String("minecraft:stone")})
+    assert second.intern() is first and second is not first
+    assert Compound({'id': String("minecraft:dirt")}).intern() is not first
+
+@pytest.mark.parametrize("indent", [None, 2, "\t"])
+def test_write_snbt(indent):
+    import io
+    from pymcfunc.data_formats.nbt_tags import Compound
+    from pymcfunc.data_formats.snbt import parse_snbt
+    tags = [parse_snbt(NBT_SAMPLE), parse_snbt("[B;1b,2b]"), parse_snbt("[[],[{}],[[L;1L]]]"), Compound({})]
+    for tag in tags:
+        out = io.StringIO()
+        tag.write_snbt(out, indent)
+        if indent is None: assert out.getvalue() == str(tag)
+        assert str(parse_snbt(out.getvalue())) == str(tag)
+    # too deep for str(), which renders recursively
+    deep = Compound({})
+    for _ in range(5000): deep = Compound({'a': deep})
+    out = io.StringIO()
+    deep.write_snbt(out)
+    assert out.getvalue() == "{a:" * 5000 + "{}" + "}" * 5000
+
+def _uncompiled_nbt(monkeypatch):
+    """Makes NBTFormat work out the serialiser of a class every time it is used."""
+    from pymcfunc.data_formats.base_formats import NBTFormat, _field_types, _nbt_converter, pascal_case_ify
+    from pymcfunc.data_formats.nbt_tags import Byte
+
+    def compile_nbt(cls):
+        return [(name, pascal_case_ify(name, isinstance(hint, type) and issubclass(hint, Byte))
+                 if cls._do_pascal_case_ify else name, _nbt_converter(name, hint))
+                for name, hint in _field_types(cls).items()]
+    monkeypatch.setattr(NBTFormat, "_compile", classmethod(compile_nbt))
+
+def test_compiled_nbt_matches_reflective_nbt(monkeypatch):
+    from typing import Literal
+    from pymcfunc.data_formats.base_formats import NBTFormat
+    from pymcfunc.data_formats.nbt_tags import Byte, Compound, Int, List, String
+
+    class Inner(NBTFormat):
+        def __init__(self, value): self.value = value
+        value: Int
+
+    class Sample(NBTFormat):
+        def __init__(self, **kwargs): self.__dict__.update(kwargs)
+        id: String
+        no_ai: Byte
+        custom_name: String | None
+        mode: Literal["a", "b"]
+        inner: Inner
+        items: list[Inner]
+        scores: dict[str, Int]
+
+    sample = Sample(id=String("minecraft:pig"), no_ai=Byte(1), custom_name=None, mode="b", inner=Inner(Int(2)),
+                    items=[Inner(Int(3))], scores={'s': Int(4)})
+    expected = Compound({'id': String("minecraft:pig"), 'NoAI': Byte(1), 'Mode': String("b"),
+                         'Inner': {'Value': Int(2)}, 'Items': List([Compound({'Value': Int(3)})]), 'Scores': {'s': Int(4)}})
+    compiled = sample.as_nbt()
+    assert str(compiled) == str(expected)
+    _uncompiled_nbt(monkeypatch)
+    assert str(sample.as_nbt()) == str(compiled)
+
+def _sample_json_formats():
+    from pymcfunc.data_formats.advancements import Advancement, AdvancementDisplay, Criterion, Icon, Rewards
+    from pymcfunc.data_formats.item_modifiers import ItemModifier
+    from pymcfunc.data_formats.loot_tables import LootTable
+    from pymcfunc.data_formats.predicates import Predicate
+    display = AdvancementDisplay(icon=Icon(item="minecraft:stone"), title="Title", description="Description",
+                                 frame="goal")
+    return [Advancement(namespace="p", name="a", display=display, criteria=[Criterion.from_json({"trigger": "minecraft:tick"})],
+                        rewards=Rewards(experience=5, loot=["p:l"])),
+            Advancement(namespace="p", name="b", parent="p:a"),
+            LootTable.from_json(VANILLA_LOOT_TABLE), Predicate.from_json(VANILLA_PREDICATE),
+            Predicate.from_json({"condition": "minecraft:random_chance", "chance": 0.5}),
+            ItemModifier.from_json({"function": "minecraft:set_count", "count": 2, "add": True})]
+
+def _uncompiled_json(monkeypatch):
+    """Makes JsonFormat work out the encoder of every object again, from the object's own ``JSON_FORMAT``."""
+    from pymcfunc.data_formats.base_formats import JsonFormat, _field_types, _json_converter
+
+    def compile_json(cls, obj, shallow=False):
+        annotations = _field_types(cls)
+        return [(key, key + "_" if key not in annotations and key + "_" in annotations else key,
+                 _json_converter(key, format_type, shallow)) for key, format_type in obj.JSON_FORMAT.items()]
+    monkeypatch.setattr(JsonFormat, "_compile", classmethod(compile_json))
+
+def test_compiled_json_matches_reflective_json(monkeypatch):
+    compiled = [obj.as_json() for obj in _sample_json_formats()]
+    _uncompiled_json(monkeypatch)
+    assert [obj.as_json() for obj in _sample_json_formats()] == compiled
+
+def test_json_format_is_the_same_for_every_object():
+    """JsonFormat caches its serialiser per class, so a JSON_FORMAT property can't depend on the object's fields."""
+    import dis
+    import importlib
+    import pkgutil
+    import pymcfunc.data_formats
+    from pymcfunc.data_formats.base_formats import JsonFormat, _field_types
+    for module in pkgutil.iter_modules(pymcfunc.data_formats.__path__):
+        try:
+            importlib.import_module(f"pymcfunc.data_formats.{module.name}")
+        except (ImportError, AttributeError):
+            pass
+    classes, stack = [], [JsonFormat]
+    while stack:
+        classes.append(cls := stack.pop())
+        stack.extend(cls.__subclasses__())
+    checked = 0
+    for cls in classes:
+        prop = next((c.__dict__['JSON_FORMAT'] for c in cls.mro() if 'JSON_FORMAT' in c.__dict__), None)
+        if not isinstance(prop, property): continue
+        fields = _field_types(cls)
+        instructions = list(dis.get_instructions(prop.fget))
+        for previous, instruction in zip(instructions, instructions[1:]):
+            if previous.opname == 'LOAD_FAST' and previous.argval == 'self' and instruction.opname == 'LOAD_ATTR':
+                assert instruction.argval not in fields, f"{cls.__name__}.JSON_FORMAT reads self.{instruction.argval}"
+        checked += 1
+    assert checked
+
+def test_write_json_matches_as_json():
+    import io
+    import json
+    for obj in _sample_json_formats():
+        for indent, separators in ((None, None), (2, None), (None, (",", ":"))):
+            stream = io.StringIO()
+            obj.write_json(stream, indent=indent, separators=separators)
+            assert stream.getvalue() == json.dumps(obj.as_json(), indent=indent, separators=separators)
+            assert json.loads(stream.getvalue()) == obj.as_json()
+
+def test_nbt_paths():
+    from pymcfunc.data_formats.nbt_path import NamedTag
+    from pymcfunc.data_formats.nbt_tags import Compound, String
+    root = NamedTag("Inventory")
+    item = root[0].tag
+    assert str(item) == "Inventory[0].tag" and item.parent().parent() is root
+    assert str(root[...]) == "Inventory[]" and str(root(Compound({'id': String("x")}))) == 'Inventory{id:"x"}'
+    assert str(NamedTag("a.b")["c d"]['say "hi"']) == '"a.b"."c d"."say \\"hi\\""'
+    assert item == NamedTag("Inventory")[0].tag and hash(item) == hash(NamedTag("Inventory")[0].tag)
+    assert {item: 1}[NamedTag("Inventory")[0].tag] == 1
+    with pytest.raises(AttributeError):
+        item.x = 1
+
+    assert NamedTag("a").b["c d"].compound_keys() == ["a", "b", "c d"]
+    assert item.compound_keys() is None and root(Compound({})).compound_keys() is None
+
+    # each node only links to its parent, so a deep path is built in linear time, and its string is worked out once
+    path = NamedTag("root")
+    for i in range(20000): path = path[f"k{i}"]
+    rendered = str(path)
+    assert str(path) is rendered and rendered.endswith(".k19998.k19999") and len(rendered.split(".")) == 20001
+    assert hash(path) == hash(rendered) and path._hash is not None
+
+def test_entity_paths():
+    from pymcfunc.data_formats.nbt_tags import List, Double, Short
+    from pymcfunc.proxies.entities import JavaEntity
+    entity = JavaEntity('s')
+    assert entity.air is JavaEntity('e').air and str(entity.air) == "Air" and entity.air.T is Short
+    assert str(entity.motion) == "motion" and entity.motion.T == List[Double]
+    assert all(str(getattr(entity, name)) == key for name, key in
+               (('custom_name', "CustomName"), ('no_gravity', "no_gravity"), ('uuid', "uuid"), ('tags', "tags")))